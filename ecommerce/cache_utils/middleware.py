@@ -1,9 +1,12 @@
 """
 Caching utility middleware.
 """
+import logging
 
 from ecommerce.cache_utils.utils import RequestCache, TieredCache
 
+logger = logging.getLogger(__name__)
+
 
 class CacheUtilsMiddleware(object):
     """
@@ -17,10 +20,15 @@ class CacheUtilsMiddleware(object):
         RequestCache.clear()
         TieredCache._get_and_set_force_cache_miss(request)  # pylint: disable=protected-access
 
-    def process_response(self, request, response):  # pylint: disable=unused-argument
+    def process_response(self, request, response):
         """
          Clear the request cache after processing a response.
          """
+        stats = RequestCache.get_stats()
+        logger.debug(
+            'Request cache stats for [%s]: hits=%d, misses=%d, evictions=%d, size=%d',
+            request.path, stats['hits'], stats['misses'], stats['evictions'], stats['size']
+        )
         RequestCache.clear()
         return response
 
@@ -1,14 +1,21 @@
 """
 Tests for the request cache.
 """
+import threading
+import time
+
 import mock
+from django.test import override_settings
+from requests import Response
+from slumber.exceptions import HttpNotFoundError
 
 from ecommerce.cache_utils.utils import (
     SHOULD_FORCE_CACHE_MISS_KEY,
     CachedResponse,
     CachedResponseError,
     RequestCache,
-    TieredCache
+    TieredCache,
+    _ComputedValue
 )
 from ecommerce.tests.testcases import TestCase
 
@@ -62,6 +69,59 @@ class TestRequestCache(TestCase):
         except KeyError:
             self.fail('Deleting a missing key from the request cache should not cause an error.')
 
+    @override_settings(REQUEST_CACHE_MAX_ENTRIES=2)
+    def test_lru_eviction(self):
+        RequestCache.set('a', 1)
+        RequestCache.set('b', 2)
+        # Reading 'a' makes 'b' the least recently used entry.
+        RequestCache.get_cached_response('a')
+        RequestCache.set('c', 3)
+
+        self.assertTrue(RequestCache.get_cached_response('a').is_hit)
+        self.assertTrue(RequestCache.get_cached_response('b').is_miss)
+        self.assertTrue(RequestCache.get_cached_response('c').is_hit)
+        self.assertEqual(RequestCache.get_stats()['evictions'], 1)
+
+    @override_settings(REQUEST_CACHE_MAX_ENTRIES=1)
+    def test_pinned_entries_not_evicted(self):
+        RequestCache.set(SHOULD_FORCE_CACHE_MISS_KEY, True, pinned=True)
+        RequestCache.set('a', 1)
+        RequestCache.set('b', 2)
+
+        self.assertTrue(RequestCache.get_cached_response(SHOULD_FORCE_CACHE_MISS_KEY).value)
+        self.assertTrue(RequestCache.get_cached_response('a').is_miss)
+        self.assertEqual(RequestCache.get_stats()['size'], 2)
+
+    @override_settings(REQUEST_CACHE_MAX_ENTRIES=None)
+    def test_unbounded(self):
+        for i in range(100):
+            RequestCache.set(i, i)
+        self.assertEqual(RequestCache.get_stats()['size'], 100)
+        self.assertEqual(RequestCache.get_stats()['evictions'], 0)
+
+    def test_thread_isolation(self):
+        RequestCache.set(TEST_KEY, EXPECTED_VALUE)
+        results = {}
+
+        def other_request():
+            results['before'] = RequestCache.get_cached_response(TEST_KEY).is_miss
+            RequestCache.set(TEST_KEY_2, EXPECTED_VALUE)
+            RequestCache.clear()
+
+        thread = threading.Thread(target=other_request)
+        thread.start()
+        thread.join()
+
+        self.assertTrue(results['before'], 'Entries must not leak across threads.')
+        self.assertEqual(RequestCache.get_cached_response(TEST_KEY).value, EXPECTED_VALUE)
+        self.assertTrue(RequestCache.get_cached_response(TEST_KEY_2).is_miss)
+
+    def test_clear_resets_stats(self):
+        RequestCache.record_hit()
+        RequestCache.record_miss()
+        RequestCache.clear()
+        self.assertEqual(RequestCache.get_stats(), {'hits': 0, 'misses': 0, 'evictions': 0, 'size': 0})
+
 
 class TestTieredCache(TestCase):
     def setUp(self):
@@ -87,6 +147,18 @@ class TestTieredCache(TestCase):
         cached_response = RequestCache.get_cached_response(TEST_KEY)
         self.assertTrue(cached_response.is_hit, 'Django cache hit should cache value in request cache.')
 
+    @mock.patch('django.core.cache.cache.get')
+    def test_get_cached_response_updates_stats(self, mock_cache_get):
+        mock_cache_get.return_value = EXPECTED_VALUE
+        TieredCache.get_cached_response(TEST_KEY)
+        TieredCache.get_cached_response(TEST_KEY)
+        TieredCache.get_cached_response(TEST_KEY)
+
+        stats = RequestCache.get_stats()
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(mock_cache_get.call_count, 1)
+
     @mock.patch('django.core.cache.cache.get')
     def test_get_cached_response_force_django_cache_miss(self, mock_cache_get):
         RequestCache.set(SHOULD_FORCE_CACHE_MISS_KEY, True)
@@ -97,6 +169,42 @@ class TestTieredCache(TestCase):
         cached_response = RequestCache.get_cached_response(TEST_KEY)
         self.assertTrue(cached_response.is_miss, 'Forced Django cache miss should not cache value in request cache.')
 
+    @mock.patch('django.core.cache.cache.get_many')
+    def test_get_many(self, mock_cache_get_many):
+        RequestCache.set(TEST_KEY, EXPECTED_VALUE)
+        mock_cache_get_many.return_value = {TEST_KEY_2: EXPECTED_VALUE}
+
+        cached_responses = TieredCache.get_many([TEST_KEY, TEST_KEY_2, 'missing'])
+
+        mock_cache_get_many.assert_called_once_with([TEST_KEY_2, 'missing'])
+        self.assertEqual(cached_responses[TEST_KEY].value, EXPECTED_VALUE)
+        self.assertEqual(cached_responses[TEST_KEY_2].value, EXPECTED_VALUE)
+        self.assertTrue(cached_responses['missing'].is_miss)
+        self.assertTrue(RequestCache.get_cached_response(TEST_KEY_2).is_hit)
+
+    @mock.patch('django.core.cache.cache.get_many')
+    def test_get_many_all_request_cache_hits(self, mock_cache_get_many):
+        RequestCache.set(TEST_KEY, EXPECTED_VALUE)
+        cached_responses = TieredCache.get_many([TEST_KEY])
+        self.assertEqual(cached_responses[TEST_KEY].value, EXPECTED_VALUE)
+        self.assertFalse(mock_cache_get_many.called)
+
+    @mock.patch('django.core.cache.cache.get_many')
+    def test_get_many_force_django_cache_miss(self, mock_cache_get_many):
+        RequestCache.set(SHOULD_FORCE_CACHE_MISS_KEY, True, pinned=True)
+        mock_cache_get_many.return_value = {TEST_KEY: EXPECTED_VALUE}
+        cached_responses = TieredCache.get_many([TEST_KEY])
+        self.assertTrue(cached_responses[TEST_KEY].is_miss)
+        self.assertFalse(mock_cache_get_many.called)
+
+    @mock.patch('django.core.cache.cache.set_many')
+    def test_set_many_all_tiers(self, mock_cache_set_many):
+        mapping = {TEST_KEY: EXPECTED_VALUE, TEST_KEY_2: None}
+        TieredCache.set_many_all_tiers(mapping, TEST_DJANGO_TIMEOUT_CACHE)
+        mock_cache_set_many.assert_called_once_with(mapping, TEST_DJANGO_TIMEOUT_CACHE)
+        self.assertEqual(RequestCache.get_cached_response(TEST_KEY).value, EXPECTED_VALUE)
+        self.assertTrue(RequestCache.get_cached_response(TEST_KEY_2).is_hit)
+
     @mock.patch('django.core.cache.cache.set')
     def test_set_all_tiers(self, mock_cache_set):
         mock_cache_set.return_value = EXPECTED_VALUE
@@ -104,6 +212,248 @@ class TestTieredCache(TestCase):
         mock_cache_set.assert_called_with(TEST_KEY, EXPECTED_VALUE, TEST_DJANGO_TIMEOUT_CACHE)
         self.assertEqual(RequestCache.get_cached_response(TEST_KEY).value, EXPECTED_VALUE)
 
+    def test_get_or_compute(self):
+        compute_fn = mock.Mock(return_value=EXPECTED_VALUE)
+
+        self.assertEqual(TieredCache.get_or_compute(TEST_KEY, compute_fn, TEST_DJANGO_TIMEOUT_CACHE), EXPECTED_VALUE)
+        self.assertEqual(TieredCache.get_or_compute(TEST_KEY, compute_fn, TEST_DJANGO_TIMEOUT_CACHE), EXPECTED_VALUE)
+        self.assertEqual(compute_fn.call_count, 1)
+
+        # A new request is served from the django cache.
+        RequestCache.clear()
+        self.assertEqual(TieredCache.get_or_compute(TEST_KEY, compute_fn, TEST_DJANGO_TIMEOUT_CACHE), EXPECTED_VALUE)
+        self.assertEqual(compute_fn.call_count, 1)
+
+    def test_get_or_compute_cached_none(self):
+        compute_fn = mock.Mock(return_value=None)
+        TieredCache.get_or_compute(TEST_KEY, compute_fn)
+        RequestCache.clear()
+        self.assertIsNone(TieredCache.get_or_compute(TEST_KEY, compute_fn))
+        self.assertEqual(compute_fn.call_count, 1)
+
+    def test_get_or_compute_error(self):
+        compute_fn = mock.Mock(side_effect=ValueError)
+        with self.assertRaises(ValueError):
+            TieredCache.get_or_compute(TEST_KEY, compute_fn)
+
+        # The lock must be released so a later caller can compute the value.
+        compute_fn.side_effect = None
+        compute_fn.return_value = EXPECTED_VALUE
+        self.assertEqual(TieredCache.get_or_compute(TEST_KEY, compute_fn), EXPECTED_VALUE)
+
+    def test_get_or_compute_cached_exception(self):
+        compute_fn = mock.Mock(side_effect=ValueError('failed'))
+        for __ in range(2):
+            with self.assertRaisesRegexp(ValueError, 'failed'):
+                TieredCache.get_or_compute(
+                    TEST_KEY, compute_fn, cached_exceptions=(ValueError,), error_cache_timeout=60
+                )
+            RequestCache.clear()
+        self.assertEqual(compute_fn.call_count, 1)
+
+    def test_get_or_compute_cached_http_error(self):
+        response = Response()
+        response.status_code = 404
+        response._content = b'{"detail": "Not found."}'  # pylint: disable=protected-access
+        error = HttpNotFoundError('Client Error 404', response=response, content=response.content)
+        compute_fn = mock.Mock(side_effect=error)
+        with self.assertRaises(HttpNotFoundError):
+            TieredCache.get_or_compute(
+                TEST_KEY, compute_fn, cached_exceptions=(HttpNotFoundError,), error_cache_timeout=60
+            )
+        RequestCache.clear()
+
+        with self.assertRaises(HttpNotFoundError) as context:
+            TieredCache.get_or_compute(TEST_KEY, compute_fn, cached_exceptions=(HttpNotFoundError,))
+        self.assertEqual(compute_fn.call_count, 1)
+        self.assertEqual(context.exception.response.status_code, 404)
+        self.assertEqual(context.exception.response.json(), {'detail': 'Not found.'})
+        self.assertEqual(context.exception.content, response.content)
+
+    def test_get_or_compute_cached_exception_request_cache_only(self):
+        compute_fn = mock.Mock(side_effect=ValueError)
+        for __ in range(2):
+            with self.assertRaises(ValueError):
+                TieredCache.get_or_compute(TEST_KEY, compute_fn, cached_exceptions=(ValueError,))
+        self.assertEqual(compute_fn.call_count, 1)
+
+        RequestCache.clear()
+        compute_fn.side_effect = None
+        compute_fn.return_value = EXPECTED_VALUE
+        self.assertEqual(TieredCache.get_or_compute(TEST_KEY, compute_fn), EXPECTED_VALUE)
+
+    def test_get_or_compute_uncached_exception(self):
+        compute_fn = mock.Mock(side_effect=KeyError)
+        for __ in range(2):
+            with self.assertRaises(KeyError):
+                TieredCache.get_or_compute(TEST_KEY, compute_fn, cached_exceptions=(ValueError,))
+        self.assertEqual(compute_fn.call_count, 2)
+
+    def test_get_or_compute_force_django_cache_miss(self):
+        TieredCache.get_or_compute(TEST_KEY, lambda: 'old')
+        RequestCache.clear()
+        RequestCache.set(SHOULD_FORCE_CACHE_MISS_KEY, True, pinned=True)
+        self.assertEqual(TieredCache.get_or_compute(TEST_KEY, lambda: EXPECTED_VALUE), EXPECTED_VALUE)
+
+    @mock.patch('django.core.cache.cache.set')
+    def test_get_or_compute_zero_timeout(self, mock_cache_set):
+        self.assertEqual(TieredCache.get_or_compute(TEST_KEY, lambda: EXPECTED_VALUE, 0), EXPECTED_VALUE)
+        self.assertFalse(mock_cache_set.called)
+        self.assertEqual(RequestCache.get_cached_response(TEST_KEY).value, EXPECTED_VALUE)
+
+    @mock.patch('ecommerce.cache_utils.utils.COMPUTE_LOCK_WAIT_TIMEOUT', 0.5)
+    def test_get_or_compute_waits_for_lock_holder(self):
+        # Simulate another worker computing the value.
+        TieredCache._acquire_compute_lock(TEST_KEY)  # pylint: disable=protected-access
+        compute_fn = mock.Mock(return_value='recomputed')
+
+        def finish_computation():
+            TieredCache._compute_and_set(  # pylint: disable=protected-access
+                TEST_KEY, lambda: EXPECTED_VALUE, TEST_DJANGO_TIMEOUT_CACHE
+            )
+            RequestCache.clear()
+
+        timer = threading.Timer(0.2, finish_computation)
+        timer.start()
+        self.assertEqual(TieredCache.get_or_compute(TEST_KEY, compute_fn, 60), EXPECTED_VALUE)
+        timer.join()
+        self.assertFalse(compute_fn.called)
+
+    @mock.patch('ecommerce.cache_utils.utils.COMPUTE_LOCK_WAIT_TIMEOUT', 0.2)
+    def test_get_or_compute_lock_holder_timeout(self):
+        TieredCache._acquire_compute_lock(TEST_KEY)  # pylint: disable=protected-access
+        self.assertEqual(TieredCache.get_or_compute(TEST_KEY, lambda: EXPECTED_VALUE), EXPECTED_VALUE)
+
+    def test_get_or_compute_early_refresh(self):
+        TieredCache.get_or_compute(TEST_KEY, lambda: 'old', 60)
+        RequestCache.clear()
+
+        with mock.patch('ecommerce.cache_utils.utils._ComputedValue.should_refresh_early', return_value=True):
+            # Another caller is already refreshing the value, so the current value is served.
+            TieredCache._acquire_compute_lock(TEST_KEY)  # pylint: disable=protected-access
+            self.assertEqual(TieredCache.get_or_compute(TEST_KEY, lambda: EXPECTED_VALUE, 60), 'old')
+            TieredCache._release_compute_lock(TEST_KEY)  # pylint: disable=protected-access
+
+            RequestCache.clear()
+            self.assertEqual(TieredCache.get_or_compute(TEST_KEY, lambda: EXPECTED_VALUE, 60), EXPECTED_VALUE)
+
+    def test_get_or_compute_early_refresh_error(self):
+        TieredCache.get_or_compute(TEST_KEY, lambda: EXPECTED_VALUE, 60)
+        RequestCache.clear()
+
+        with mock.patch('ecommerce.cache_utils.utils._ComputedValue.should_refresh_early', return_value=True):
+            compute_fn = mock.Mock(side_effect=ValueError)
+            self.assertEqual(
+                TieredCache.get_or_compute(TEST_KEY, compute_fn, 60, cached_exceptions=(ValueError,)),
+                EXPECTED_VALUE
+            )
+
+        # The failed refresh must not replace the current value.
+        RequestCache.clear()
+        self.assertEqual(TieredCache.get_or_compute(TEST_KEY, compute_fn, 60), EXPECTED_VALUE)
+
+    def test_get_cached_response_of_computed_value(self):
+        TieredCache.get_or_compute(TEST_KEY, lambda: EXPECTED_VALUE, 60)
+        RequestCache.clear()
+
+        self.assertEqual(TieredCache.get_cached_response(TEST_KEY).value, EXPECTED_VALUE)
+        # Served from the request cache.
+        self.assertEqual(TieredCache.get_cached_response(TEST_KEY).value, EXPECTED_VALUE)
+
+    def test_get_many_of_computed_values(self):
+        TieredCache.get_or_compute(TEST_KEY, lambda: EXPECTED_VALUE, 60)
+        RequestCache.clear()
+
+        cached_responses = TieredCache.get_many([TEST_KEY, TEST_KEY_2])
+        self.assertEqual(cached_responses[TEST_KEY].value, EXPECTED_VALUE)
+        self.assertTrue(cached_responses[TEST_KEY_2].is_miss)
+        self.assertEqual(TieredCache.get_many([TEST_KEY])[TEST_KEY].value, EXPECTED_VALUE)
+
+    def test_get_cached_response_of_cached_exception(self):
+        with self.assertRaises(ValueError):
+            TieredCache.get_or_compute(
+                TEST_KEY, mock.Mock(side_effect=ValueError), cached_exceptions=(ValueError,), error_cache_timeout=60
+            )
+        self.assertTrue(TieredCache.get_cached_response(TEST_KEY).is_miss)
+
+        RequestCache.clear()
+        self.assertTrue(TieredCache.get_cached_response(TEST_KEY).is_miss)
+        self.assertTrue(TieredCache.get_many([TEST_KEY])[TEST_KEY].is_miss)
+
+    def test_get_or_compute_many(self):
+        keys = {'a': TEST_KEY, 'b': TEST_KEY_2}
+        computed_identifiers = []
+
+        def compute_fn(identifiers):
+            computed_identifiers.extend(identifiers)
+            return {identifier: identifier * 2 for identifier in identifiers}
+
+        self.assertEqual(TieredCache.get_or_compute_many(keys, compute_fn, 60), {'a': 'aa', 'b': 'bb'})
+        self.assertEqual(sorted(computed_identifiers), ['a', 'b'])
+
+        # A new request is served from the django cache, which is shared with get_or_compute.
+        RequestCache.clear()
+        self.assertEqual(TieredCache.get_or_compute_many(keys, compute_fn, 60), {'a': 'aa', 'b': 'bb'})
+        self.assertEqual(TieredCache.get_or_compute(TEST_KEY, lambda: 'recomputed', 60), 'aa')
+        self.assertEqual(sorted(computed_identifiers), ['a', 'b'])
+
+    def test_get_or_compute_many_partially_cached(self):
+        TieredCache.get_or_compute(TEST_KEY, lambda: EXPECTED_VALUE, 60)
+        RequestCache.clear()
+        compute_fn = mock.Mock(return_value={'b': 'computed'})
+
+        self.assertEqual(
+            TieredCache.get_or_compute_many({'a': TEST_KEY, 'b': TEST_KEY_2}, compute_fn, 60),
+            {'a': EXPECTED_VALUE, 'b': 'computed'}
+        )
+        compute_fn.assert_called_once_with(['b'])
+
+    def test_get_or_compute_many_cached_exception(self):
+        keys = {'a': TEST_KEY, 'b': TEST_KEY_2}
+        compute_fn = mock.Mock(side_effect=ValueError('failed'))
+        for __ in range(2):
+            with self.assertRaisesRegexp(ValueError, 'failed'):
+                TieredCache.get_or_compute_many(
+                    keys, compute_fn, cached_exceptions=(ValueError,), error_cache_timeout=60
+                )
+            RequestCache.clear()
+        self.assertEqual(compute_fn.call_count, 1)
+
+        # The locks must be released so a later caller can compute the values.
+        TieredCache.clear_all_tiers()
+        compute_fn.side_effect = None
+        compute_fn.return_value = {'a': 'aa', 'b': 'bb'}
+        self.assertEqual(TieredCache.get_or_compute_many(keys, compute_fn), {'a': 'aa', 'b': 'bb'})
+
+    @mock.patch('ecommerce.cache_utils.utils.COMPUTE_LOCK_WAIT_TIMEOUT', 0.5)
+    def test_get_or_compute_many_waits_for_lock_holder(self):
+        # Simulate another worker computing the value of one of the keys.
+        TieredCache._acquire_compute_lock(TEST_KEY)  # pylint: disable=protected-access
+        compute_fn = mock.Mock(return_value={'b': 'computed'})
+
+        def finish_computation():
+            TieredCache._compute_and_set(  # pylint: disable=protected-access
+                TEST_KEY, lambda: EXPECTED_VALUE, TEST_DJANGO_TIMEOUT_CACHE
+            )
+            RequestCache.clear()
+
+        timer = threading.Timer(0.2, finish_computation)
+        timer.start()
+        self.assertEqual(
+            TieredCache.get_or_compute_many({'a': TEST_KEY, 'b': TEST_KEY_2}, compute_fn, 60),
+            {'a': EXPECTED_VALUE, 'b': 'computed'}
+        )
+        timer.join()
+        compute_fn.assert_called_once_with(['b'])
+
+    @mock.patch('ecommerce.cache_utils.utils.COMPUTE_LOCK_WAIT_TIMEOUT', 0.2)
+    def test_get_or_compute_many_lock_holder_timeout(self):
+        TieredCache._acquire_compute_lock(TEST_KEY)  # pylint: disable=protected-access
+        self.assertEqual(
+            TieredCache.get_or_compute_many({'a': TEST_KEY}, lambda identifiers: {'a': EXPECTED_VALUE}),
+            {'a': EXPECTED_VALUE}
+        )
+
     @mock.patch('django.core.cache.cache.clear')
     def test_clear_all_tiers(self, mock_cache_clear):
         TieredCache.set_all_tiers(TEST_KEY, EXPECTED_VALUE)
@@ -121,6 +471,17 @@ class TestTieredCache(TestCase):
         mock_cache_delete.assert_called_with(TEST_KEY)
 
 
+class ComputedValueTests(TestCase):
+    def test_should_refresh_early(self):
+        now = time.time()
+        self.assertFalse(_ComputedValue(EXPECTED_VALUE, None, 1).should_refresh_early())
+        self.assertFalse(_ComputedValue(EXPECTED_VALUE, now + 3600, 0.01).should_refresh_early())
+        self.assertTrue(_ComputedValue(EXPECTED_VALUE, now - 1, 0.01).should_refresh_early())
+
+    def test_repr(self):
+        self.assertEqual(repr(_ComputedValue(EXPECTED_VALUE, None, 1)), '_ComputedValue (expires_at=None)')
+
+
 class CacheResponseTests(TestCase):
     def test_is_miss(self):
         is_miss = True
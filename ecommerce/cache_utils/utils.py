@@ -1,30 +1,69 @@
 """
 Cache utilities.
 """
+import logging
+import math
+import random
 import threading
+import time
+from collections import OrderedDict
 
+from django.conf import settings
 from django.core.cache import cache as django_cache
 from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from requests import Response
+from requests.exceptions import RequestException
+from slumber.exceptions import SlumberHttpBaseException
 
 SHOULD_FORCE_CACHE_MISS_KEY = 'cache_utils.should_force_cache_miss'
 FORCE_CACHE_MISS_PARAM = 'force_cache_miss'
 
+# Settings for TieredCache.get_or_compute. Values are in seconds.
+COMPUTE_LOCK_TIMEOUT = 30
+COMPUTE_LOCK_WAIT_TIMEOUT = 5
+COMPUTE_LOCK_POLL_INTERVAL = 0.1
+# Higher values make early refreshes more likely.
+EARLY_REFRESH_BETA = 1.0
+
 _CACHE_MISS = object()
 
+logger = logging.getLogger(__name__)
+
 
-class RequestCache(threading.local):
+class _RequestCacheData(threading.local):
     """
-    A thread-local for storing the per-request cache.
+    Storage for the request cache. Each thread (or greenlet, when monkey patched)
+    gets its own entries and counters.
     """
 
-    _data = {}
-
     def __init__(self):
-        super(RequestCache, self).__init__()
+        super(_RequestCacheData, self).__init__()
+        self.reset()
+
+    def reset(self):
+        # Entries are kept in least-recently-used order. Pinned entries (e.g. the
+        # request-scoped flags set by the middleware) are never evicted.
+        self.entries = OrderedDict()
+        self.pinned = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+class RequestCache(object):
+    """
+    A per-request cache, isolated to the current thread.
+
+    The number of entries may be bounded with the REQUEST_CACHE_MAX_ENTRIES setting,
+    in which case the least recently used entries are evicted first. Hit, miss and
+    eviction counts are tracked for the lifetime of the request.
+    """
+
+    _data = _RequestCacheData()
 
     @classmethod
     def clear(cls):
-        cls._data = {}
+        cls._data.reset()
 
     @classmethod
     def get_cached_response(cls, key):
@@ -38,21 +77,44 @@ class RequestCache(threading.local):
             A CachedResponse with hit/miss status and value.
 
         """
-        cached_value = cls._data.get(key, _CACHE_MISS)
+        data = cls._data
+        if key in data.pinned:
+            return CachedResponse(False, data.pinned[key])
+
+        cached_value = data.entries.pop(key, _CACHE_MISS)
         is_miss = cached_value is _CACHE_MISS
+        if not is_miss:
+            # Re-insert the entry to mark it as most recently used.
+            data.entries[key] = cached_value
         return CachedResponse(is_miss, cached_value)
 
     @classmethod
-    def set(cls, key, value):
+    def set(cls, key, value, pinned=False):
         """
         Caches the value for the provided key.
 
         Args:
             key (string)
             value (object)
+            pinned (bool): (Optional) If True, the entry does not count towards
+                REQUEST_CACHE_MAX_ENTRIES and is never evicted.
 
         """
-        cls._data[key] = value
+        data = cls._data
+        data.entries.pop(key, None)
+        data.pinned.pop(key, None)
+
+        if pinned:
+            data.pinned[key] = value
+            return
+
+        data.entries[key] = value
+
+        max_entries = getattr(settings, 'REQUEST_CACHE_MAX_ENTRIES', None)
+        if max_entries:
+            while len(data.entries) > max_entries:
+                data.entries.popitem(last=False)
+                data.evictions += 1
 
     @classmethod
     def delete(cls, key):
@@ -63,8 +125,34 @@ class RequestCache(threading.local):
             key (string)
 
         """
-        if key in cls._data:
-            del cls._data[key]
+        cls._data.entries.pop(key, None)
+        cls._data.pinned.pop(key, None)
+
+    @classmethod
+    def record_hit(cls):
+        cls._data.hits += 1
+
+    @classmethod
+    def record_miss(cls):
+        cls._data.misses += 1
+
+    @classmethod
+    def get_stats(cls):
+        """
+        Returns the hit, miss and eviction counts and the current size of the
+        request cache for the current request.
+
+        Returns:
+            dict
+
+        """
+        data = cls._data
+        return {
+            'hits': data.hits,
+            'misses': data.misses,
+            'evictions': data.evictions,
+            'size': len(data.entries) + len(data.pinned),
+        }
 
 
 class TieredCache(object):
@@ -86,11 +174,203 @@ class TieredCache(object):
         """
         request_cached_response = RequestCache.get_cached_response(key)
         if request_cached_response.is_miss:
+            RequestCache.record_miss()
             django_cached_response = cls._get_cached_response_from_django_cache(key)
             cls._set_request_cache_if_django_cache_hit(key, django_cached_response)
-            return django_cached_response
+            return _get_plain_cached_response(django_cached_response)
+
+        RequestCache.record_hit()
+        return _get_plain_cached_response(request_cached_response)
+
+    @classmethod
+    def get_many(cls, keys):
+        """
+        Retrieves CachedResponses for all of the provided keys, fetching any keys
+        missing from the request cache with a single Django cache round trip.
+
+        Note: Django cache backends do not distinguish a cached None from a miss in
+        get_many, so a cached None is reported as a miss.
+
+        Args:
+            keys (iterable of string)
+
+        Returns:
+            dict: A CachedResponse with hit/miss status and value for each key.
+
+        """
+        cached_responses = {}
+        missing_keys = []
+        for key in keys:
+            request_cached_response = RequestCache.get_cached_response(key)
+            if request_cached_response.is_hit:
+                RequestCache.record_hit()
+                cached_responses[key] = _get_plain_cached_response(request_cached_response)
+            else:
+                RequestCache.record_miss()
+                missing_keys.append(key)
+
+        if missing_keys:
+            django_cached_values = {}
+            if not cls._should_force_django_cache_miss():
+                django_cached_values = django_cache.get_many(missing_keys)
+
+            for key in missing_keys:
+                if key in django_cached_values:
+                    django_cached_response = CachedResponse(False, django_cached_values[key])
+                    cls._set_request_cache_if_django_cache_hit(key, django_cached_response)
+                    cached_responses[key] = _get_plain_cached_response(django_cached_response)
+                else:
+                    cached_responses[key] = CACHE_MISS_RESPONSE
+
+        return cached_responses
+
+    @classmethod
+    def get_or_compute(cls, key, compute_fn, django_cache_timeout=DEFAULT_TIMEOUT,
+                       cached_exceptions=(), error_cache_timeout=0):
+        """
+        Retrieves the value for the provided key, computing and caching it in both
+        tiers on a miss.
+
+        Only one caller per key computes the value at a time; concurrent callers wait
+        for it to be cached. Values are also refreshed probabilistically shortly before
+        they expire, by a single caller, while every other caller keeps being served
+        the current value.
+
+        Important: Values are stored in the django cache along with refresh metadata,
+        so keys cached with this method must only be read through this method.
+
+        Args:
+            key (string)
+            compute_fn (callable): Called without arguments to compute the value.
+                Exceptions are propagated to the caller.
+            django_cache_timeout (int): (Optional) Timeout used to determine
+                if and for how long to cache in the django cache. See set_all_tiers.
+            cached_exceptions (tuple): (Optional) Exception classes raised by compute_fn
+                that are cached, so that later callers raise them again without calling
+                compute_fn. Other exceptions are never cached.
+            error_cache_timeout (int): (Optional) Timeout for cached exceptions in the
+                django cache. Cached exceptions are kept in the request cache for the
+                rest of the request regardless.
 
-        return request_cached_response
+        Returns:
+            The cached or computed value.
+
+        """
+        request_cached_response = RequestCache.get_cached_response(key)
+        if request_cached_response.is_hit:
+            RequestCache.record_hit()
+            return _unwrap_cached_value(request_cached_response.value)
+        RequestCache.record_miss()
+
+        def compute_and_set():
+            return cls._compute_and_set(
+                key, compute_fn, django_cache_timeout, cached_exceptions, error_cache_timeout
+            )
+
+        if django_cache_timeout == 0 or cls._should_force_django_cache_miss():
+            return compute_and_set()
+
+        computed_value = cls._get_computed_value_from_django_cache(key)
+        if computed_value is not None:
+            if not computed_value.should_refresh_early() or not cls._acquire_compute_lock(key):
+                RequestCache.set(key, computed_value.value)
+                return _unwrap_cached_value(computed_value.value)
+
+            try:
+                # Errors are not cached here, so that a failed refresh does not
+                # replace the current value.
+                return cls._compute_and_set(key, compute_fn, django_cache_timeout)
+            except Exception:  # pylint: disable=broad-except
+                logger.exception('Failed to refresh the value cached for key [%s]. Serving the current value.', key)
+                RequestCache.set(key, computed_value.value)
+                return _unwrap_cached_value(computed_value.value)
+            finally:
+                cls._release_compute_lock(key)
+
+        if cls._acquire_compute_lock(key):
+            try:
+                return compute_and_set()
+            finally:
+                cls._release_compute_lock(key)
+
+        computed_value = cls._wait_for_computed_value(key)
+        if computed_value is not None:
+            RequestCache.set(key, computed_value.value)
+            return _unwrap_cached_value(computed_value.value)
+
+        # The caller holding the lock did not finish in time. Compute the value
+        # rather than fail the request.
+        return compute_and_set()
+
+    @classmethod
+    def get_or_compute_many(cls, keys, compute_fn, django_cache_timeout=DEFAULT_TIMEOUT,
+                            cached_exceptions=(), error_cache_timeout=0):
+        """
+        Retrieves the values for the provided keys, computing the missing values with
+        a single call and caching them in both tiers. The django cache is read in a
+        single round trip.
+
+        As with get_or_compute, only one caller per key computes its value at a time,
+        while concurrent callers wait for it to be cached, and cached_exceptions are
+        cached for every key being computed. Values are not refreshed early.
+
+        Args:
+            keys (dict): Cache keys, keyed by identifier.
+            compute_fn (callable): Called with the list of identifiers whose values
+                are missing, and returns their values keyed by identifier.
+                Exceptions are propagated to the caller.
+            django_cache_timeout (int): (Optional) See get_or_compute.
+            cached_exceptions (tuple): (Optional) See get_or_compute.
+            error_cache_timeout (int): (Optional) See get_or_compute.
+
+        Returns:
+            dict: The cached or computed values, keyed by identifier.
+
+        """
+        values = {}
+        missing_keys = {}
+        for identifier, key in keys.items():
+            request_cached_response = RequestCache.get_cached_response(key)
+            if request_cached_response.is_hit:
+                RequestCache.record_hit()
+                values[identifier] = request_cached_response.value
+            else:
+                RequestCache.record_miss()
+                missing_keys[identifier] = key
+
+        def compute_and_set(identifiers):
+            values.update(cls._compute_and_set_many(
+                {identifier: missing_keys[identifier] for identifier in identifiers},
+                compute_fn, django_cache_timeout, cached_exceptions, error_cache_timeout
+            ))
+
+        if missing_keys and django_cache_timeout != 0 and not cls._should_force_django_cache_miss():
+            values.update(cls._get_computed_values_from_django_cache(missing_keys))
+
+            locked_identifiers = [
+                identifier for identifier, key in missing_keys.items()
+                if identifier not in values and cls._acquire_compute_lock(key)
+            ]
+            try:
+                if locked_identifiers:
+                    compute_and_set(locked_identifiers)
+            finally:
+                for identifier in locked_identifiers:
+                    cls._release_compute_lock(missing_keys[identifier])
+
+            waiting_keys = {
+                identifier: key for identifier, key in missing_keys.items() if identifier not in values
+            }
+            if waiting_keys:
+                values.update(cls._wait_for_computed_values(waiting_keys))
+
+        # The values not yet cached, either because the django cache is skipped or
+        # because the callers holding their locks did not finish in time.
+        uncomputed_identifiers = [identifier for identifier in missing_keys if identifier not in values]
+        if uncomputed_identifiers:
+            compute_and_set(uncomputed_identifiers)
+
+        return {identifier: _unwrap_cached_value(value) for identifier, value in values.items()}
 
     @staticmethod
     def set_all_tiers(key, value, django_cache_timeout=DEFAULT_TIMEOUT):
@@ -110,6 +390,23 @@ class TieredCache(object):
         RequestCache.set(key, value)
         django_cache.set(key, value, django_cache_timeout)
 
+    @staticmethod
+    def set_many_all_tiers(mapping, django_cache_timeout=DEFAULT_TIMEOUT):
+        """
+        Caches all of the provided values in both the request cache and the django
+        cache, writing to the django cache in a single round trip.
+
+        Args:
+            mapping (dict): Values to cache, keyed by cache key.
+            django_cache_timeout (int): (Optional) Timeout used to determine
+                if and for how long to cache in the django cache. See set_all_tiers.
+
+        """
+        for key, value in mapping.items():
+            RequestCache.set(key, value)
+        if mapping:
+            django_cache.set_many(mapping, django_cache_timeout)
+
     @staticmethod
     def delete_all_tiers(key):
         """
@@ -137,6 +434,7 @@ class TieredCache(object):
         """
         Retrieves a CachedResponse for the given key from the django cache.
 
+        Values cached by get_or_compute are unwrapped from their refresh metadata.
         If the request was set to force cache misses, then this will always
         return a cache miss response.
 
@@ -151,6 +449,8 @@ class TieredCache(object):
             return CACHE_MISS_RESPONSE
 
         cached_value = django_cache.get(key, _CACHE_MISS)
+        if isinstance(cached_value, _ComputedValue):
+            cached_value = cached_value.value
         is_miss = cached_value is _CACHE_MISS
         return CachedResponse(is_miss, cached_value)
 
@@ -165,7 +465,141 @@ class TieredCache(object):
 
         """
         if django_cached_response.is_hit:
-            RequestCache.set(key, django_cached_response.value)
+            value = django_cached_response.value
+            RequestCache.set(key, value.value if isinstance(value, _ComputedValue) else value)
+
+    @classmethod
+    def _compute_and_set(cls, key, compute_fn, django_cache_timeout, cached_exceptions=(), error_cache_timeout=0):
+        """
+        Computes the value for the provided key and caches it in both tiers along
+        with the metadata needed to refresh it early. See get_or_compute.
+        """
+        start = time.time()
+        try:
+            value = compute_fn()
+        except cached_exceptions as error:
+            cls._set_computed_value(key, _CachedError(error), error_cache_timeout, time.time() - start)
+            raise
+
+        cls._set_computed_value(key, value, django_cache_timeout, time.time() - start)
+        return value
+
+    @classmethod
+    def _compute_and_set_many(cls, keys, compute_fn, django_cache_timeout, cached_exceptions=(),
+                              error_cache_timeout=0):
+        """
+        Computes the values for the provided keys, keyed by identifier, with a single call, and caches
+        them in both tiers. See get_or_compute_many.
+        """
+        start = time.time()
+        try:
+            values = compute_fn(list(keys))
+        except cached_exceptions as error:
+            cached_error = _CachedError(error)
+            cls._set_computed_values(
+                {key: cached_error for key in keys.values()}, error_cache_timeout, time.time() - start
+            )
+            raise
+
+        cls._set_computed_values(
+            {keys[identifier]: value for identifier, value in values.items()},
+            django_cache_timeout,
+            time.time() - start
+        )
+        return values
+
+    @classmethod
+    def _set_computed_value(cls, key, value, django_cache_timeout, compute_time):
+        cls._set_computed_values({key: value}, django_cache_timeout, compute_time)
+
+    @staticmethod
+    def _set_computed_values(mapping, django_cache_timeout, compute_time):
+        for key, value in mapping.items():
+            RequestCache.set(key, value)
+        if django_cache_timeout != 0 and mapping:
+            if django_cache_timeout is DEFAULT_TIMEOUT:
+                django_cache_timeout = django_cache.default_timeout
+            expires_at = None if django_cache_timeout is None else time.time() + django_cache_timeout
+            django_cache.set_many(
+                {key: _ComputedValue(value, expires_at, compute_time) for key, value in mapping.items()},
+                django_cache_timeout
+            )
+
+    @staticmethod
+    def _get_computed_value_from_django_cache(key):
+        """
+        Returns the _ComputedValue cached for the provided key, or None on a miss.
+        """
+        cached_value = django_cache.get(key)
+        return cached_value if isinstance(cached_value, _ComputedValue) else None
+
+    @staticmethod
+    def _get_computed_values_from_django_cache(keys):
+        """
+        Returns the values cached for the provided keys, keyed by identifier, in a single round trip, and
+        sets them in the request cache. Missing identifiers are left out.
+        """
+        cached_values = django_cache.get_many(keys.values())
+        values = {}
+        for identifier, key in keys.items():
+            computed_value = cached_values.get(key)
+            if isinstance(computed_value, _ComputedValue):
+                RequestCache.set(key, computed_value.value)
+                values[identifier] = computed_value.value
+        return values
+
+    @classmethod
+    def _wait_for_computed_value(cls, key):
+        """
+        Polls the django cache for a value being computed by another caller.
+
+        Returns:
+            The _ComputedValue, or None if it was not cached within COMPUTE_LOCK_WAIT_TIMEOUT.
+
+        """
+        deadline = time.time() + COMPUTE_LOCK_WAIT_TIMEOUT
+        while time.time() < deadline:
+            time.sleep(COMPUTE_LOCK_POLL_INTERVAL)
+            computed_value = cls._get_computed_value_from_django_cache(key)
+            if computed_value is not None:
+                return computed_value
+        return None
+
+    @classmethod
+    def _wait_for_computed_values(cls, keys):
+        """
+        Polls the django cache for values being computed by other callers, keyed by identifier.
+
+        Returns:
+            The values cached within COMPUTE_LOCK_WAIT_TIMEOUT, keyed by identifier.
+
+        """
+        values = {}
+        deadline = time.time() + COMPUTE_LOCK_WAIT_TIMEOUT
+        while len(values) < len(keys) and time.time() < deadline:
+            time.sleep(COMPUTE_LOCK_POLL_INTERVAL)
+            values.update(cls._get_computed_values_from_django_cache(
+                {identifier: key for identifier, key in keys.items() if identifier not in values}
+            ))
+        return values
+
+    @staticmethod
+    def _get_compute_lock_key(key):
+        return '{}.compute_lock'.format(key)
+
+    @classmethod
+    def _acquire_compute_lock(cls, key):
+        """
+        Returns True if the lock to compute the value for the provided key was acquired.
+
+        The lock relies on the atomicity of the django cache add operation, so it is
+        shared by every worker using the same cache.
+        """
+        return django_cache.add(cls._get_compute_lock_key(key), True, COMPUTE_LOCK_TIMEOUT)
+
+    @classmethod
+    def _release_compute_lock(cls, key):
+        django_cache.delete(cls._get_compute_lock_key(key))
 
     @staticmethod
     def _get_and_set_force_cache_miss(request):
@@ -178,7 +612,7 @@ class TieredCache(object):
 
         """
         force_cache_miss = request.GET.get(FORCE_CACHE_MISS_PARAM, 'false').lower() == 'true'
-        RequestCache.set(SHOULD_FORCE_CACHE_MISS_KEY, force_cache_miss)
+        RequestCache.set(SHOULD_FORCE_CACHE_MISS_KEY, force_cache_miss, pinned=True)
 
     @classmethod
     def _should_force_django_cache_miss(cls):
@@ -186,6 +620,111 @@ class TieredCache(object):
         return False if cached_response.is_miss else cached_response.value
 
 
+class _ComputedValue(object):
+    """
+    A value cached in the django cache by TieredCache.get_or_compute.
+    """
+
+    def __init__(self, value, expires_at, compute_time):
+        """
+        Args:
+            value (object): The computed value.
+            expires_at (float): Timestamp at which the value expires from the django
+                cache, or None if it never expires.
+            compute_time (float): Number of seconds it took to compute the value.
+        """
+        self.value = value
+        self.expires_at = expires_at
+        self.compute_time = compute_time
+
+    def __repr__(self):
+        # Important: Do not include the cached value, as with CachedResponse.
+        return '_ComputedValue (expires_at={})'.format(self.expires_at)
+
+    def should_refresh_early(self):
+        """
+        Returns True if this value should be refreshed ahead of its expiry.
+
+        The probability increases as the expiry approaches and with the time it
+        took to compute the value, so that expensive values are refreshed sooner.
+        See "Optimal Probabilistic Cache Stampede Prevention" (Vattani et al.).
+        """
+        if self.expires_at is None:
+            return False
+        # 1 - random() is in (0, 1], which keeps the logarithm defined.
+        early_by = -self.compute_time * EARLY_REFRESH_BETA * math.log(1.0 - random.random())
+        return time.time() + early_by >= self.expires_at
+
+
+class _CachedError(object):
+    """
+    An exception cached by TieredCache.get_or_compute.
+
+    Exceptions raised by API clients may hold references to objects that cannot be
+    pickled, so only the class and message of the exception are kept, along with a
+    copy of the status code, headers and content of the response of HTTP errors.
+    """
+
+    def __init__(self, error):
+        self.error_class = error.__class__
+        self.message = str(error)
+        self.error_kwargs = {}
+
+        if isinstance(error, (RequestException, SlumberHttpBaseException)):
+            response = getattr(error, 'response', None)
+            if isinstance(response, Response):
+                self.error_kwargs['response'] = _copy_response(response)
+        if isinstance(error, SlumberHttpBaseException) and hasattr(error, 'content'):
+            self.error_kwargs['content'] = error.content
+
+    def __repr__(self):
+        return '_CachedError ({})'.format(self.error_class.__name__)
+
+    def raise_error(self):
+        raise self.error_class(self.message, **self.error_kwargs)
+
+
+def _copy_response(response):
+    """
+    Returns a copy of the given response, without the request and connection it references.
+    """
+    copy = Response()
+    copy.status_code = response.status_code
+    copy.headers = response.headers
+    copy.url = response.url
+    copy.reason = response.reason
+    copy.encoding = response.encoding
+    copy._content = response.content  # pylint: disable=protected-access
+    return copy
+
+
+def _get_plain_cached_response(cached_response):
+    """
+    Returns the given CachedResponse with the value cached by TieredCache.get_or_compute, if any,
+    unwrapped, so that every reader of a key sees plain values. Cached exceptions are reported
+    as misses.
+    """
+    if cached_response.is_miss:
+        return cached_response
+
+    value = cached_response.value
+    if isinstance(value, _ComputedValue):
+        value = value.value
+    if isinstance(value, _CachedError):
+        return CACHE_MISS_RESPONSE
+    return cached_response if value is cached_response.value else CachedResponse(False, value)
+
+
+def _unwrap_cached_value(value):
+    """
+    Returns the value cached by TieredCache.get_or_compute, raising the cached
+    exception if computing the value failed.
+    """
+    if isinstance(value, _CachedError):
+        value.raise_error()
+    return value
+
+
 class CachedResponseError(Exception):
     """
     Error used when CachedResponse is misused.
@@ -0,0 +1,101 @@
+"""
+Circuit breaker for calls to remote services.
+
+The breaker state is kept in the Django cache, so that every worker stops calling a
+service as soon as it is found to be failing, and resumes calling it together.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from requests import Session
+from requests.exceptions import ConnectionError, Timeout
+
+from ecommerce.core.utils import get_cache_key
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker(object):
+    """
+    Tracks consecutive failures of a remote service.
+
+    After CIRCUIT_BREAKER_FAILURE_THRESHOLD consecutive failures the breaker opens,
+    and calls to the service should fail fast for CIRCUIT_BREAKER_RESET_TIMEOUT
+    seconds. Once that time has elapsed, calls are allowed through again: a success
+    closes the breaker, while another failure opens it again.
+    """
+
+    def __init__(self, service, url):
+        """
+        Args:
+            service (str): Name of the service, used for logging.
+            url (str): Root URL of the service. Sites configured with different
+                URLs for a service get separate breakers.
+        """
+        self.service = service
+        key = get_cache_key(resource='circuit_breaker', service=service, url=url)
+        self.failures_key = '{}.failures'.format(key)
+        self.open_until_key = '{}.open_until'.format(key)
+
+    def is_open(self):
+        open_until = cache.get(self.open_until_key)
+        return open_until is not None and time.time() < open_until
+
+    def record_success(self):
+        if cache.get(self.failures_key):
+            cache.delete_many([self.failures_key, self.open_until_key])
+
+    def record_failure(self):
+        # add is a no-op if the key exists, and incr is atomic, so concurrent
+        # workers do not lose failures.
+        cache.add(self.failures_key, 0, settings.CIRCUIT_BREAKER_RESET_TIMEOUT * 2)
+        try:
+            failures = cache.incr(self.failures_key)
+        except ValueError:
+            # The key expired between add and incr.
+            failures = 1
+            cache.set(self.failures_key, failures, settings.CIRCUIT_BREAKER_RESET_TIMEOUT * 2)
+
+        if failures >= settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD:
+            logger.warning(
+                'Opening the circuit breaker for the [%s] service after [%d] consecutive failures.',
+                self.service, failures
+            )
+            cache.set(
+                self.open_until_key,
+                time.time() + settings.CIRCUIT_BREAKER_RESET_TIMEOUT,
+                settings.CIRCUIT_BREAKER_RESET_TIMEOUT
+            )
+
+
+class CircuitBreakerSession(Session):
+    """
+    A requests Session that reports the outcome of every request to a CircuitBreaker.
+
+    While the breaker is open, requests fail immediately with a ConnectionError, the
+    same exception raised when the service cannot be reached.
+    """
+
+    def __init__(self, circuit_breaker):
+        super(CircuitBreakerSession, self).__init__()
+        self.circuit_breaker = circuit_breaker
+
+    def request(self, method, url, *args, **kwargs):  # pylint: disable=arguments-differ
+        if self.circuit_breaker.is_open():
+            raise ConnectionError(
+                'The circuit breaker for the [{}] service is open.'.format(self.circuit_breaker.service)
+            )
+
+        try:
+            response = super(CircuitBreakerSession, self).request(method, url, *args, **kwargs)
+        except (ConnectionError, Timeout):
+            self.circuit_breaker.record_failure()
+            raise
+
+        if response.status_code >= 500:
+            self.circuit_breaker.record_failure()
+        else:
+            self.circuit_breaker.record_success()
+        return response
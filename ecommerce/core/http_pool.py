@@ -0,0 +1,93 @@
+"""
+Keep-alive HTTP connection pool shared by the clients of remote APIs.
+
+Clients used to be built with a new requests Session each, so that most calls to the LMS,
+Discovery and Enterprise services opened a new TCP connection and paid another TLS handshake.
+Sessions created by create_pooled_session instead send their requests through one process-wide
+HTTPAdapter, whose urllib3 pool keeps the connections to each host alive between requests, and
+across sessions. Sessions themselves remain cheap, so that each client keeps its own
+authentication.
+
+Sessions may also retry requests throttled by the remote service, once the delay it asks for in
+its Retry-After header has passed. Such sessions use their own adapter, and pool, per number of
+retries.
+"""
+import threading
+
+from django.conf import settings
+from edx_rest_api_client.auth import SuppliedJwtAuth
+from requests import Session
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+THROTTLED_STATUS_CODES = (429,)
+
+_pooled_adapters = {}
+_pooled_adapter_lock = threading.Lock()
+
+
+def get_pooled_adapter(throttle_retries=0):
+    """
+    Returns the process-wide HTTPAdapter.
+
+    The adapter keeps up to API_CLIENT_POOL_MAXSIZE connections alive to each of the
+    API_CLIENT_POOL_CONNECTIONS most recently used hosts. It is thread-safe.
+
+    Args:
+        throttle_retries (int): Number of times the adapter retries a throttled request, honoring
+            the Retry-After header of the response. The last response is returned once retries run out.
+    """
+    adapter = _pooled_adapters.get(throttle_retries)
+    if adapter is None:
+        with _pooled_adapter_lock:
+            adapter = _pooled_adapters.get(throttle_retries)
+            if adapter is None:
+                max_retries = Retry(
+                    total=throttle_retries, connect=0, read=0, status_forcelist=THROTTLED_STATUS_CODES,
+                    backoff_factor=1, raise_on_status=False
+                ) if throttle_retries else 0
+                adapter = _pooled_adapters[throttle_retries] = HTTPAdapter(
+                    pool_connections=settings.API_CLIENT_POOL_CONNECTIONS,
+                    pool_maxsize=settings.API_CLIENT_POOL_MAXSIZE,
+                    max_retries=max_retries
+                )
+    return adapter
+
+
+def create_pooled_session(auth=None, session_class=Session, throttle_retries=0, **kwargs):
+    """
+    Returns a new session sending its requests through the process-wide connection pool.
+
+    Closing the session closes the idle connections of the pool, so sessions should be left open.
+
+    Args:
+        auth (AuthBase): Authentication attached to every request of the session, if any.
+        session_class (type): Session subclass to instantiate, with the remaining keyword arguments.
+        throttle_retries (int): Number of times throttled requests are retried. See get_pooled_adapter.
+
+    Returns:
+        Session
+    """
+    session = session_class(**kwargs)
+    adapter = get_pooled_adapter(throttle_retries)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.auth = auth
+    return session
+
+
+class SiteAccessTokenAuth(SuppliedJwtAuth):
+    """
+    Attaches the access token of a site's service user to every request.
+
+    The token is read from SiteConfiguration.access_token when each request is sent, rather than
+    when the client is built, so that long-lived clients pick up a new token once the previous
+    one expires.
+    """
+
+    def __init__(self, site_configuration):  # pylint: disable=super-init-not-called
+        self.site_configuration = site_configuration
+
+    @property
+    def token(self):
+        return self.site_configuration.access_token
@@ -0,0 +1,19 @@
+"""
+Middleware for the core app.
+"""
+from ecommerce.core.site_cache import get_site_bundle
+
+
+class CurrentSiteMiddleware(object):
+    """
+    Middleware that sets the `site` and `site_bundle` attributes of the request.
+
+    Replaces django_sites_extensions' CurrentSiteWithDefaultMiddleware, which it mirrors, falling back
+    to the DEFAULT_SITE_ID site for unknown hosts. Sites are resolved from the process-level site
+    bundle cache, so that steady-state requests resolve their site, site configuration, partner and
+    theme without querying the database.
+    """
+
+    def process_request(self, request):
+        request.site_bundle = get_site_bundle(request)
+        request.site = request.site_bundle.site
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.11 on 2026-10-18 05:57
+from __future__ import unicode_literals
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0045_auto_20180510_0823'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='siteconfiguration',
+            name='enrollment_fulfillment_pool_size',
+            field=models.PositiveSmallIntegerField(default=4, help_text='Maximum number of enrollments of an order posted to the LMS concurrently.', validators=[django.core.validators.MinValueValidator(1)], verbose_name='Enrollment fulfillment pool size'),
+        ),
+    ]
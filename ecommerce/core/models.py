@@ -8,10 +8,12 @@ from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.contrib.sites.models import Site
 from django.core.exceptions import ValidationError
+from django.core.validators import MinValueValidator
 from django.db import models
 from django.utils.functional import cached_property
 from django.utils.timezone import now
 from django.utils.translation import ugettext_lazy as _
+from edx_rest_api_client.auth import SuppliedJwtAuth
 from edx_rest_api_client.client import EdxRestApiClient
 from jsonfield.fields import JSONField
 from requests.exceptions import ConnectionError, Timeout
@@ -19,6 +21,8 @@ from slumber.exceptions import HttpNotFoundError, SlumberBaseException
 
 from analytics import Client as SegmentClient
 from ecommerce.cache_utils.utils import TieredCache
+from ecommerce.core.circuit_breaker import CircuitBreaker, CircuitBreakerSession
+from ecommerce.core.http_pool import SiteAccessTokenAuth, create_pooled_session
 from ecommerce.core.url_utils import get_lms_url
 from ecommerce.core.utils import log_message_and_raise_validation_error
 from ecommerce.extensions.payment.exceptions import ProcessorNotFoundError
@@ -187,6 +191,16 @@ class SiteConfiguration(models.Model):
         blank=True,
         default=False
     )
+    enrollment_fulfillment_pool_size = models.PositiveSmallIntegerField(
+        verbose_name=_('Enrollment fulfillment pool size'),
+        help_text=_('Maximum number of enrollments of an order posted to the LMS concurrently.'),
+        default=4,
+        validators=[MinValueValidator(1)]
+    )
+
+    # Number of times the API clients of this instance retry requests throttled by the remote service.
+    # Set it before the clients are first used, e.g. by management commands making many requests.
+    api_throttle_retries = 0
 
     @property
     def payment_processors_set(self):
@@ -381,27 +395,59 @@ class SiteConfiguration(models.Model):
         TieredCache.set_all_tiers(key, access_token, expires)
         return access_token
 
+    def create_api_session(self, circuit_breaker=None, access_token=None):
+        """
+        Returns a session authenticated with the access token of this site's service user.
+
+        The session sends its requests through the process-wide keep-alive connection pool,
+        and reads the access token when each request is sent. Throttled requests are retried
+        api_throttle_retries times. See ecommerce.core.http_pool.
+
+        Args:
+            circuit_breaker (CircuitBreaker): If set, requests fail fast while the breaker is open.
+            access_token (str): If set, requests are authenticated with this token instead, e.g. by
+                threads which must not read the token from the request and Django caches.
+
+        Returns:
+            Session
+        """
+        auth = SuppliedJwtAuth(access_token) if access_token else SiteAccessTokenAuth(self)
+        if circuit_breaker:
+            return create_pooled_session(
+                auth, CircuitBreakerSession, throttle_retries=self.api_throttle_retries, circuit_breaker=circuit_breaker
+            )
+        return create_pooled_session(auth, throttle_retries=self.api_throttle_retries)
+
     @cached_property
     def discovery_api_client(self):
         """
         Returns an API client to access the Discovery service.
 
+        Calls made with the client fail fast with a ConnectionError while the
+        Discovery service is failing. See CircuitBreaker.
+
         Returns:
             EdxRestApiClient: The client to access the Discovery service.
         """
 
-        return EdxRestApiClient(self.discovery_api_url, jwt=self.access_token)
+        return EdxRestApiClient(
+            self.discovery_api_url,
+            session=self.create_api_session(CircuitBreaker('discovery', self.discovery_api_url))
+        )
 
     @cached_property
     def embargo_api_client(self):
         """ Returns the URL for the embargo API """
-        return EdxRestApiClient(self.build_lms_url('/api/embargo/v1'), jwt=self.access_token)
+        return EdxRestApiClient(self.build_lms_url('/api/embargo/v1'), session=self.create_api_session())
 
     @cached_property
     def enterprise_api_client(self):
         """
         Constructs a Slumber-based REST API client for the provided site.
 
+        Calls made with the client fail fast with a ConnectionError while the
+        Enterprise service is failing. See CircuitBreaker.
+
         Example:
             site.siteconfiguration.enterprise_api_client.enterprise-learner(learner.username).get()
 
@@ -409,11 +455,16 @@ class SiteConfiguration(models.Model):
             EdxRestApiClient: The client to access the Enterprise service.
 
         """
-        return EdxRestApiClient(self.enterprise_api_url, jwt=self.access_token)
+        return EdxRestApiClient(
+            self.enterprise_api_url,
+            session=self.create_api_session(CircuitBreaker('enterprise', self.enterprise_api_url))
+        )
 
     @cached_property
     def consent_api_client(self):
-        return EdxRestApiClient(self.build_lms_url('/consent/api/v1/'), jwt=self.access_token, append_slash=False)
+        return EdxRestApiClient(
+            self.build_lms_url('/consent/api/v1/'), session=self.create_api_session(), append_slash=False
+        )
 
     @cached_property
     def user_api_client(self):
@@ -423,23 +474,31 @@ class SiteConfiguration(models.Model):
         Returns:
             EdxRestApiClient: The client to access the LMS user API service.
         """
-        return EdxRestApiClient(self.build_lms_url('/api/user/v1/'), jwt=self.access_token)
+        return EdxRestApiClient(self.build_lms_url('/api/user/v1/'), session=self.create_api_session())
 
     @cached_property
     def commerce_api_client(self):
-        return EdxRestApiClient(self.build_lms_url('/api/commerce/v1/'), jwt=self.access_token)
+        return EdxRestApiClient(self.build_lms_url('/api/commerce/v1/'), session=self.create_api_session())
 
     @cached_property
     def credit_api_client(self):
-        return EdxRestApiClient(self.build_lms_url('/api/credit/v1/'), jwt=self.access_token)
+        return EdxRestApiClient(self.build_lms_url('/api/credit/v1/'), session=self.create_api_session())
 
     @cached_property
     def enrollment_api_client(self):
-        return EdxRestApiClient(self.build_lms_url('/api/enrollment/v1/'), jwt=self.access_token, append_slash=False)
+        return self.create_enrollment_api_client(self.create_api_session())
 
     @cached_property
     def entitlement_api_client(self):
-        return EdxRestApiClient(self.build_lms_url('/api/entitlements/v1/'), jwt=self.access_token)
+        return self.create_entitlement_api_client(self.create_api_session())
+
+    def create_enrollment_api_client(self, session):
+        """ Returns a client of the LMS Enrollment API, sending its requests through the given session. """
+        return EdxRestApiClient(self.build_lms_url('/api/enrollment/v1/'), session=session, append_slash=False)
+
+    def create_entitlement_api_client(self, session):
+        """ Returns a client of the LMS Entitlement API, sending its requests through the given session. """
+        return EdxRestApiClient(self.build_lms_url('/api/entitlements/v1/'), session=session)
 
 
 class User(AbstractUser):
@@ -477,10 +536,11 @@ class User(AbstractUser):
             connection with the LMS account API endpoint.
         """
         try:
+            site_configuration = request.site.siteconfiguration
             api = EdxRestApiClient(
-                request.site.siteconfiguration.build_lms_url('/api/user/v1'),
+                site_configuration.build_lms_url('/api/user/v1'),
                 append_slash=False,
-                jwt=request.site.siteconfiguration.access_token
+                session=site_configuration.create_api_session()
             )
             response = api.accounts(self.username).get()
             return response
@@ -514,7 +574,8 @@ class User(AbstractUser):
         try:
             api = EdxRestApiClient(
                 get_lms_url('api/credit/v1/'),
-                oauth_access_token=self.access_token
+                oauth_access_token=self.access_token,
+                session=create_pooled_session()
             )
             response = api.eligibility().get(**query_strings)
         except (ConnectionError, SlumberBaseException, Timeout):  # pragma: no cover
@@ -547,7 +608,8 @@ class User(AbstractUser):
 
             api = EdxRestApiClient(
                 site.siteconfiguration.build_lms_url('api/user/v1/'),
-                oauth_access_token=self.access_token
+                oauth_access_token=self.access_token,
+                session=create_pooled_session()
             )
             response = api.accounts(self.username).verification_status().get()
 
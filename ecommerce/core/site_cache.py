@@ -0,0 +1,147 @@
+"""
+Process-level cache of the site context of requests.
+
+Every request needs its Site, along with the site's SiteConfiguration, Partner and SiteTheme.
+Rather than loading them on every request, they are loaded together once per process and host,
+and reused until any of those models is saved or deleted. Cached bundles are stamped with a
+version kept in the Django cache. Saving or deleting any of the models replaces the version, so
+that every process reloads its bundles on its next request.
+"""
+import uuid
+
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.http.request import split_domain_port
+from oscar.core.loading import get_model
+
+from ecommerce.core.models import SiteConfiguration
+from ecommerce.theming.models import SiteTheme
+
+Partner = get_model('partner', 'Partner')
+
+SITE_BUNDLE_VERSION_KEY = 'site_bundle_version'
+MAX_CACHED_HOSTS = 1000
+
+_bundles_by_host = {}
+_bundles_by_site_id = {}
+
+
+class SiteBundle(object):
+    """
+    A Site, with its SiteConfiguration and Partner loaded, and its SiteTheme.
+
+    Attributes:
+        version (str): Version of the site context the bundle was loaded at.
+        site (Site): The site.
+        theme (SiteTheme): Theme of the site, as returned by SiteTheme.get_theme.
+    """
+
+    def __init__(self, version, site, theme):
+        self.version = version
+        self.site = site
+        self.theme = theme
+
+
+def get_site_bundle_version():
+    """ Returns the current version of the site context, starting a new version if there is none. """
+    version = cache.get(SITE_BUNDLE_VERSION_KEY)
+    if version is None:
+        # The version may have been evicted, so a new one is started rather than a counter restarted.
+        cache.add(SITE_BUNDLE_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(SITE_BUNDLE_VERSION_KEY)
+    return version
+
+
+def invalidate_site_bundles():
+    """ Discards the site bundles cached by every process. """
+    cache.set(SITE_BUNDLE_VERSION_KEY, uuid.uuid4().hex, None)
+    _bundles_by_host.clear()
+    _bundles_by_site_id.clear()
+
+
+def _load_site_bundle(version, **lookup):
+    site = Site.objects.select_related('siteconfiguration__partner').get(**lookup)
+    bundle = SiteBundle(version, site, SiteTheme.get_theme(site))
+    _bundles_by_site_id[site.id] = bundle
+    return bundle
+
+
+def _load_site_bundle_for_host(version, host):
+    """ Loads the bundle of the site of the host, as django.contrib.sites does, falling back to DEFAULT_SITE_ID. """
+    try:
+        if settings.SITE_ID:
+            return _load_site_bundle(version, id=settings.SITE_ID)
+
+        try:
+            return _load_site_bundle(version, domain__iexact=host)
+        except Site.DoesNotExist:
+            domain, __ = split_domain_port(host)
+            return _load_site_bundle(version, domain__iexact=domain)
+    except Site.DoesNotExist:
+        if not settings.DEFAULT_SITE_ID:
+            raise
+        return _load_site_bundle(version, id=settings.DEFAULT_SITE_ID)
+
+
+def get_site_bundle(request):
+    """
+    Returns the SiteBundle of the site the request was made to.
+
+    Args:
+        request (HttpRequest)
+
+    Returns:
+        SiteBundle
+    """
+    host = request.get_host()
+    version = get_site_bundle_version()
+    bundle = _bundles_by_host.get(host)
+    if bundle is None or bundle.version != version:
+        bundle = _load_site_bundle_for_host(version, host)
+        if len(_bundles_by_host) >= MAX_CACHED_HOSTS:
+            # Hosts falling back to the default site are cached too, so their number is bounded.
+            _bundles_by_host.clear()
+        _bundles_by_host[host] = bundle
+    return bundle
+
+
+def get_cached_site(site_id):
+    """
+    Returns the Site with the given ID, with its SiteConfiguration and Partner loaded.
+
+    The returned site is shared with other requests, and should not be modified.
+
+    Args:
+        site_id (int)
+
+    Returns:
+        Site
+    """
+    version = get_site_bundle_version()
+    bundle = _bundles_by_site_id.get(site_id)
+    if bundle is None or bundle.version != version:
+        bundle = _load_site_bundle(version, id=site_id)
+    return bundle.site
+
+
+@receiver(post_save, sender=Site)
+@receiver(post_delete, sender=Site)
+@receiver(post_save, sender=SiteConfiguration)
+@receiver(post_delete, sender=SiteConfiguration)
+@receiver(post_save, sender=Partner)
+@receiver(post_delete, sender=Partner)
+@receiver(post_save, sender=SiteTheme)
+@receiver(post_delete, sender=SiteTheme)
+def invalidate_site_bundles_on_change(sender, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidates the site bundles when a model they are made of is saved or deleted.
+
+    Bundles are invalidated immediately, and again once the change is committed, so that other
+    processes do not keep bundles they loaded before the change was visible to them.
+    """
+    invalidate_site_bundles()
+    transaction.on_commit(invalidate_site_bundles)
@@ -0,0 +1,87 @@
+import httpretty
+import mock
+from django.test import override_settings
+from requests.exceptions import ConnectionError, Timeout
+
+from ecommerce.core.circuit_breaker import CircuitBreaker, CircuitBreakerSession
+from ecommerce.tests.testcases import TestCase
+
+SERVICE_URL = 'http://discovery.example.com/api/v1/'
+
+
+@override_settings(CIRCUIT_BREAKER_FAILURE_THRESHOLD=2, CIRCUIT_BREAKER_RESET_TIMEOUT=30)
+class CircuitBreakerTests(TestCase):
+    def setUp(self):
+        super(CircuitBreakerTests, self).setUp()
+        self.circuit_breaker = CircuitBreaker('discovery', SERVICE_URL)
+
+    def test_opens_after_consecutive_failures(self):
+        self.circuit_breaker.record_failure()
+        self.assertFalse(self.circuit_breaker.is_open())
+
+        self.circuit_breaker.record_failure()
+        self.assertTrue(self.circuit_breaker.is_open())
+
+    def test_success_resets_failures(self):
+        self.circuit_breaker.record_failure()
+        self.circuit_breaker.record_success()
+        self.circuit_breaker.record_failure()
+        self.assertFalse(self.circuit_breaker.is_open())
+
+    def test_closes_after_reset_timeout(self):
+        with mock.patch('ecommerce.core.circuit_breaker.time.time', return_value=1000):
+            self.circuit_breaker.record_failure()
+            self.circuit_breaker.record_failure()
+            self.assertTrue(self.circuit_breaker.is_open())
+
+        with mock.patch('ecommerce.core.circuit_breaker.time.time', return_value=1031):
+            self.assertFalse(self.circuit_breaker.is_open())
+
+    def test_shared_between_instances(self):
+        """ Breakers for the same service and URL share their state, e.g. across workers. """
+        self.circuit_breaker.record_failure()
+        self.circuit_breaker.record_failure()
+
+        self.assertTrue(CircuitBreaker('discovery', SERVICE_URL).is_open())
+        self.assertFalse(CircuitBreaker('discovery', 'http://other.example.com/').is_open())
+        self.assertFalse(CircuitBreaker('enterprise', SERVICE_URL).is_open())
+
+
+@httpretty.activate
+@override_settings(CIRCUIT_BREAKER_FAILURE_THRESHOLD=2, CIRCUIT_BREAKER_RESET_TIMEOUT=30)
+class CircuitBreakerSessionTests(TestCase):
+    def setUp(self):
+        super(CircuitBreakerSessionTests, self).setUp()
+        self.session = CircuitBreakerSession(CircuitBreaker('discovery', SERVICE_URL))
+
+    def test_fails_fast_when_open(self):
+        def callback(request, uri, headers):  # pylint: disable=unused-argument
+            raise Timeout
+
+        httpretty.register_uri(httpretty.GET, SERVICE_URL, body=callback)
+        for __ in range(2):
+            with self.assertRaises(ConnectionError):
+                self.session.get(SERVICE_URL)
+
+        with self.assertRaises(ConnectionError):
+            self.session.get(SERVICE_URL)
+        self.assertEqual(len(httpretty.httpretty.latest_requests), 2)
+
+    def test_server_errors_count_as_failures(self):
+        httpretty.register_uri(httpretty.GET, SERVICE_URL, status=503)
+        self.session.get(SERVICE_URL)
+        self.session.get(SERVICE_URL)
+        self.assertTrue(self.session.circuit_breaker.is_open())
+
+    def test_client_errors_do_not_count_as_failures(self):
+        httpretty.register_uri(httpretty.GET, SERVICE_URL, status=404)
+        self.session.get(SERVICE_URL)
+        self.session.get(SERVICE_URL)
+        self.assertFalse(self.session.circuit_breaker.is_open())
+
+    def test_success(self):
+        httpretty.register_uri(httpretty.GET, SERVICE_URL, body='{}', content_type='application/json')
+        self.session.circuit_breaker.record_failure()
+        self.assertEqual(self.session.get(SERVICE_URL).json(), {})
+        self.session.circuit_breaker.record_failure()
+        self.assertFalse(self.session.circuit_breaker.is_open())
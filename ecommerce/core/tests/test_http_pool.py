@@ -0,0 +1,63 @@
+import httpretty
+from requests import Request, Session
+
+from ecommerce.cache_utils.utils import TieredCache
+from ecommerce.core.circuit_breaker import CircuitBreaker, CircuitBreakerSession
+from ecommerce.core.http_pool import SiteAccessTokenAuth, create_pooled_session, get_pooled_adapter
+from ecommerce.tests.testcases import TestCase
+
+
+class PooledSessionTests(TestCase):
+    def test_create_pooled_session(self):
+        """ Sessions should send their requests through the process-wide adapter. """
+        sessions = [create_pooled_session(), create_pooled_session()]
+
+        for session in sessions:
+            self.assertIsInstance(session, Session)
+            self.assertIsNone(session.auth)
+            self.assertIs(session.get_adapter('https://lms.example.com/api/'), get_pooled_adapter())
+            self.assertIs(session.get_adapter('http://lms.example.com/api/'), get_pooled_adapter())
+
+        self.assertIsNot(sessions[0], sessions[1])
+
+    def test_create_pooled_session_subclass(self):
+        """ Sessions of the given class should be created with the given arguments. """
+        circuit_breaker = CircuitBreaker('discovery', 'https://discovery.example.com/api/v1/')
+        auth = SiteAccessTokenAuth(self.site_configuration)
+        session = create_pooled_session(auth, CircuitBreakerSession, circuit_breaker=circuit_breaker)
+
+        self.assertIsInstance(session, CircuitBreakerSession)
+        self.assertIs(session.circuit_breaker, circuit_breaker)
+        self.assertIs(session.auth, auth)
+        self.assertIs(session.get_adapter('https://discovery.example.com/api/v1/'), get_pooled_adapter())
+
+    @httpretty.activate
+    def test_create_pooled_session_throttle_retries(self):
+        """ Throttled requests should be retried the given number of times, through an adapter of their own. """
+        session = create_pooled_session(throttle_retries=1)
+        self.assertIs(session.get_adapter('https://lms.example.com/api/'), get_pooled_adapter(1))
+        self.assertIsNot(get_pooled_adapter(1), get_pooled_adapter())
+
+        url = 'http://lms.example.com/api/commerce/v1/courses/a/b/c/'
+        throttled = httpretty.Response(body='{}', status=429, adding_headers={'Retry-After': '0'})
+        httpretty.register_uri(httpretty.PUT, url, responses=[throttled, httpretty.Response(body='{}', status=200)])
+        self.assertEqual(session.put(url).status_code, 200)
+        self.assertEqual(len(httpretty.httpretty.latest_requests), 2)
+
+        # The last response is returned once retries run out.
+        httpretty.register_uri(httpretty.PUT, url, responses=[throttled, throttled])
+        self.assertEqual(session.put(url).status_code, 429)
+
+    @httpretty.activate
+    def test_site_access_token_auth(self):
+        """ Requests should be sent with the current access token of the site, which is renewed once it expires. """
+        auth = SiteAccessTokenAuth(self.site_configuration)
+        token = self.mock_access_token_response()
+        request = auth(Request('GET', 'https://lms.example.com/api/').prepare())
+        self.assertEqual(request.headers['Authorization'], 'JWT {}'.format(token))
+
+        # Simulate the expiry of the cached token.
+        TieredCache.clear_all_tiers()
+        self.mock_access_token_response(access_token='new-token')
+        request = auth(Request('GET', 'https://lms.example.com/api/').prepare())
+        self.assertEqual(request.headers['Authorization'], 'JWT new-token')
@@ -0,0 +1,96 @@
+import ddt
+from django.core.cache import cache
+from django.test import RequestFactory, override_settings
+
+from ecommerce.core.middleware import CurrentSiteMiddleware
+from ecommerce.core.site_cache import SITE_BUNDLE_VERSION_KEY, get_cached_site, get_site_bundle
+from ecommerce.tests.factories import SiteConfigurationFactory
+from ecommerce.tests.testcases import TestCase
+from ecommerce.theming.middleware import CurrentSiteThemeMiddleware
+from ecommerce.theming.models import SiteTheme
+
+
+@ddt.ddt
+class SiteBundleTests(TestCase):
+    def setUp(self):
+        super(SiteBundleTests, self).setUp()
+        self.theme = SiteTheme.objects.create(site=self.site, theme_dir_name='test-theme')
+        self.request = RequestFactory(SERVER_NAME=self.site.domain).get('/')
+
+    def assert_bundle_cached(self, request):
+        """ Asserts the site context of the request is resolved without querying the database. """
+        with self.assertNumQueries(0):
+            bundle = get_site_bundle(request)
+            self.assertEqual(bundle.site.siteconfiguration.partner, self.partner)
+            self.assertEqual(bundle.theme, self.theme)
+        return bundle
+
+    def test_get_site_bundle(self):
+        """ The site context should be loaded together, once. """
+        with self.assertNumQueries(2):
+            bundle = get_site_bundle(self.request)
+
+        self.assertEqual(bundle.site, self.site)
+        self.assertEqual(bundle.site.siteconfiguration, self.site_configuration)
+        self.assertIs(self.assert_bundle_cached(self.request), bundle)
+
+    @ddt.data(
+        lambda test: test.site.save(),
+        lambda test: test.site_configuration.save(),
+        lambda test: test.partner.save(),
+        lambda test: test.theme.save(),
+    )
+    def test_invalidation(self, save):
+        """ Saving any model of the site context should reload it. """
+        bundle = get_site_bundle(self.request)
+        save(self)
+
+        self.assertIsNot(get_site_bundle(self.request), bundle)
+        self.assert_bundle_cached(self.request)
+
+    def test_theme_deleted(self):
+        """ Deleting the theme of the site should reload its bundle. """
+        get_site_bundle(self.request)
+        self.theme.delete()
+
+        with override_settings(DEFAULT_SITE_THEME=None):
+            self.assertIsNone(get_site_bundle(self.request).theme)
+
+    def test_version_evicted(self):
+        """ Bundles should be reloaded if their version is evicted from the cache. """
+        bundle = get_site_bundle(self.request)
+        cache.delete(SITE_BUNDLE_VERSION_KEY)
+
+        self.assertIsNot(get_site_bundle(self.request), bundle)
+
+    @override_settings(SITE_ID=None)
+    def test_get_site_bundle_by_host(self):
+        """ Sites should be resolved by host, ignoring its port, and fall back to DEFAULT_SITE_ID. """
+        other_site = SiteConfigurationFactory().site
+
+        request = RequestFactory(SERVER_NAME=other_site.domain, SERVER_PORT=8000).get('/')
+        self.assertEqual(get_site_bundle(request).site, other_site)
+
+        with override_settings(ALLOWED_HOSTS=['unknown.fake'], DEFAULT_SITE_ID=self.site.id):
+            request = RequestFactory(SERVER_NAME='unknown.fake').get('/')
+            self.assertEqual(get_site_bundle(request).site, self.site)
+
+    def test_get_cached_site(self):
+        """ Sites should be cached by ID, with their configuration and partner. """
+        site = get_cached_site(self.site.id)
+        self.assertEqual(site, self.site)
+
+        with self.assertNumQueries(0):
+            self.assertIs(get_cached_site(self.site.id), site)
+            self.assertEqual(site.siteconfiguration.partner, self.partner)
+
+    def test_middleware(self):
+        """ The middleware should set the site and theme of the request from the cached bundle. """
+        get_site_bundle(self.request)
+
+        with self.assertNumQueries(0):
+            CurrentSiteMiddleware().process_request(self.request)
+            CurrentSiteThemeMiddleware().process_request(self.request)
+
+        self.assertEqual(self.request.site, self.site)
+        self.assertEqual(self.request.site_theme, self.theme)
@@ -3,13 +3,33 @@ from __future__ import unicode_literals
 
 import logging
 import os
+import time
+from multiprocessing.pool import ThreadPool
 
+from django.contrib.sites.models import Site
 from django.core.management import BaseCommand, CommandError
+from django.db import connection
 
 from ecommerce.courses.models import Course
 
 logger = logging.getLogger(__name__)
 
+# Number of courses loaded per query.
+COURSE_BATCH_SIZE = 500
+
+
+def publish_course(course):
+    """ Publishes the course, if it exists, and returns the publishing error, if any. """
+    return course.publish_to_lms() if course else None
+
+
+def publish_course_in_thread(course):
+    """ Publishes the course from a thread of the pool, which then closes its own database connection. """
+    try:
+        return publish_course(course)
+    finally:
+        connection.close()
+
 
 class Command(BaseCommand):
     """Publish the courses to LMS."""
@@ -26,6 +46,25 @@ class Command(BaseCommand):
                             dest='course_ids_file',
                             default=None,
                             help='Path to file to read courses from.')
+        parser.add_argument('--workers',
+                            action='store',
+                            dest='workers',
+                            type=int,
+                            default=1,
+                            help='Number of courses published concurrently.')
+        parser.add_argument('--checkpoint_file',
+                            action='store',
+                            dest='checkpoint_file',
+                            default=None,
+                            help='Path to file recording the published courses. Courses it lists are skipped, '
+                                 'so that an interrupted run can be resumed.')
+        parser.add_argument('--throttle_retries',
+                            action='store',
+                            dest='throttle_retries',
+                            type=int,
+                            default=3,
+                            help='Number of times a request throttled by LMS is retried, once the delay it asks '
+                                 'for in its Retry-After header has passed.')
 
     def handle(self, *args, **options):
         failed = 0
@@ -33,28 +72,101 @@ class Command(BaseCommand):
         if not course_ids_file or not os.path.exists(course_ids_file):
             raise CommandError("Pass the correct absolute path to course ids file as --course_ids_file argument.")
 
+        workers = options['workers']
+        if workers < 1:
+            raise CommandError("Pass at least 1 as --workers argument.")
+
         with open(course_ids_file, 'r') as file_handler:
-            course_ids = file_handler.readlines()
-            total_courses = len(course_ids)
-            logger.info("Publishing %d courses.", total_courses)
-            for index, course_id in enumerate(course_ids, start=1):
-                try:
-                    course_id = course_id.strip()
-                    course = Course.objects.get(id=course_id)
-                    publishing_error = course.publish_to_lms()
-                    if publishing_error:
-                        failed += 1
-                        logger.error(
-                            u"(%d/%d) Failed to publish %s: %s", index, total_courses, course_id, publishing_error
-                        )
-                    else:
-                        logger.info(u"(%d/%d) Successfully published %s.", index, total_courses, course_id)
-                except Course.DoesNotExist:
+            course_ids = [course_id.strip() for course_id in file_handler.readlines()]
+
+        checkpoint_file = options['checkpoint_file']
+        if checkpoint_file and os.path.exists(checkpoint_file):
+            with open(checkpoint_file, 'r') as file_handler:
+                published_course_ids = set(course_id.strip() for course_id in file_handler.readlines())
+            remaining_course_ids = [course_id for course_id in course_ids if course_id not in published_course_ids]
+            logger.info(
+                "Skipping %d courses published according to %s.",
+                len(course_ids) - len(remaining_course_ids), checkpoint_file
+            )
+            course_ids = remaining_course_ids
+
+        total_courses = len(course_ids)
+        logger.info("Publishing %d courses.", total_courses)
+
+        started = time.time()
+        courses = self.get_courses(course_ids, options['throttle_retries'])
+        courses = [courses.get(course_id) for course_id in course_ids]
+
+        checkpoint = open(checkpoint_file, 'a') if checkpoint_file else None
+        try:
+            publishing_errors = self.publish_courses(courses, workers)
+            for index, (course_id, course, publishing_error) in enumerate(
+                    zip(course_ids, courses, publishing_errors), start=1
+            ):
+                if not course:
                     failed += 1
                     logger.error(
                         u"(%d/%d) Failed to publish %s: Course does not exist.", index, total_courses, course_id
                     )
+                elif publishing_error:
+                    failed += 1
+                    logger.error(
+                        u"(%d/%d) Failed to publish %s: %s", index, total_courses, course_id, publishing_error
+                    )
+                else:
+                    logger.info(u"(%d/%d) Successfully published %s.", index, total_courses, course_id)
+                    if checkpoint:
+                        checkpoint.write(course_id + '\n')
+                        checkpoint.flush()
+        finally:
+            if checkpoint:
+                checkpoint.close()
+
+        elapsed = time.time() - started
+        logger.info(
+            "Processed %d courses in %.2f seconds (%.2f courses per second).",
+            total_courses, elapsed, total_courses / elapsed if elapsed else total_courses
+        )
         if failed:
             logger.error("Completed publishing courses. %d of %d failed.", failed, total_courses)
         else:
             logger.info("All %d courses successfully published.", total_courses)
+
+    def get_courses(self, course_ids, throttle_retries):
+        """ Returns the existing courses of the given IDs, by ID.
+
+        The courses of a site share its configuration, and so the API clients and HTTP sessions
+        used to publish them. The clients retry throttled requests throttle_retries times.
+        """
+        courses = {}
+        for start in range(0, len(course_ids), COURSE_BATCH_SIZE):
+            courses.update(Course.objects.in_bulk(course_ids[start:start + COURSE_BATCH_SIZE]))
+
+        sites = Site.objects.select_related('siteconfiguration').in_bulk(
+            set(course.site_id for course in courses.values() if course.site_id)
+        )
+        for site in sites.values():
+            site_configuration = getattr(site, 'siteconfiguration', None)
+            if site_configuration:
+                site_configuration.api_throttle_retries = throttle_retries
+
+        for course in courses.values():
+            if course.site_id:
+                course.site = sites[course.site_id]
+
+        return courses
+
+    def publish_courses(self, courses, workers):
+        """ Yields the publishing error of each course, in order, publishing up to `workers` courses concurrently. """
+        if workers == 1 or len(courses) < 2:
+            for course in courses:
+                yield publish_course(course)
+            return
+
+        pool = ThreadPool(min(workers, len(courses)))
+        try:
+            for publishing_error in pool.imap(publish_course_in_thread, courses):
+                yield publishing_error
+        finally:
+            pool.close()
+            pool.join()
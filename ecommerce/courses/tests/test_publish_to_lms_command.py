@@ -6,6 +6,7 @@ from __future__ import unicode_literals
 import logging
 import os
 import tempfile
+from multiprocessing.pool import ThreadPool
 
 import ddt
 import mock
@@ -27,11 +28,24 @@ class PublishCoursesToLMSTests(DiscoveryTestMixin, TransactionTestCase):
 
     tmp_file_path = os.path.join(tempfile.gettempdir(), "tmp-testfile.txt")
 
+    checkpoint_file_path = os.path.join(tempfile.gettempdir(), "tmp-checkpoint.txt")
+
     def setUp(self):
         super(PublishCoursesToLMSTests, self).setUp()
         self.course = CourseFactory()
         self.create_course_ids_file(self.tmp_file_path, [self.course.id])
 
+        # Publishing takes 2 seconds.
+        patcher = mock.patch('ecommerce.courses.management.commands.publish_to_lms.time')
+        self.mock_time = patcher.start()
+        self.mock_time.time.side_effect = [10.0, 12.0]
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        super(PublishCoursesToLMSTests, self).tearDown()
+        if os.path.exists(self.checkpoint_file_path):
+            os.remove(self.checkpoint_file_path)
+
     @classmethod
     def tearDownClass(cls):
         if os.path.exists(cls.tmp_file_path):
@@ -66,6 +80,11 @@ class PublishCoursesToLMSTests(DiscoveryTestMixin, TransactionTestCase):
                 "ERROR",
                 u"(1/1) Failed to publish {}: Course does not exist.".format(fake_course_id)
             ),
+            (
+                LOGGER_NAME,
+                "INFO",
+                "Processed 1 courses in 2.00 seconds (0.50 courses per second)."
+            ),
             (
                 LOGGER_NAME,
                 "ERROR",
@@ -96,6 +115,11 @@ class PublishCoursesToLMSTests(DiscoveryTestMixin, TransactionTestCase):
                 LOGGER_NAME,
                 "INFO",
                 u"(2/2) Successfully published {}.".format(second_course.id)),
+            (
+                LOGGER_NAME,
+                "INFO",
+                "Processed 2 courses in 2.00 seconds (1.00 courses per second)."
+            ),
             (
                 LOGGER_NAME,
                 "INFO",
@@ -125,6 +149,11 @@ class PublishCoursesToLMSTests(DiscoveryTestMixin, TransactionTestCase):
                 "ERROR",
                 u"(1/1) Failed to publish {}: {}".format(self.course.id, error_msg)
             ),
+            (
+                LOGGER_NAME,
+                "INFO",
+                "Processed 1 courses in 2.00 seconds (0.50 courses per second)."
+            ),
             (
                 LOGGER_NAME,
                 "ERROR",
@@ -153,6 +182,11 @@ class PublishCoursesToLMSTests(DiscoveryTestMixin, TransactionTestCase):
                 "INFO",
                 u"(1/1) Successfully published {}.".format(self.course.id)
             ),
+            (
+                LOGGER_NAME,
+                "INFO",
+                "Processed 1 courses in 2.00 seconds (0.50 courses per second)."
+            ),
             (
                 LOGGER_NAME,
                 "INFO",
@@ -167,3 +201,72 @@ class PublishCoursesToLMSTests(DiscoveryTestMixin, TransactionTestCase):
 
         mock_publish.assert_called_once_with()
         os.remove(unicode_file)
+
+    @ddt.data(1, 2, 4)
+    def test_course_publish_workers(self, workers):
+        """ Verify courses are published by up to the given number of workers, and logged in order. """
+        courses = [self.course] + CourseFactory.create_batch(2)
+        self.create_course_ids_file(self.tmp_file_path, [course.id for course in courses])
+
+        def publish_to_lms(course):
+            return 'The failure message.' if course == courses[1] else None
+
+        with mock.patch('ecommerce.courses.management.commands.publish_to_lms.ThreadPool', wraps=ThreadPool) as pool:
+            with mock.patch.object(Course, 'publish_to_lms', autospec=True, side_effect=publish_to_lms):
+                with LogCapture(LOGGER_NAME) as lc:
+                    call_command('publish_to_lms', course_ids_file=self.tmp_file_path, workers=workers)
+                    lc.check(
+                        (LOGGER_NAME, "INFO", "Publishing 3 courses."),
+                        (LOGGER_NAME, "INFO", u"(1/3) Successfully published {}.".format(courses[0].id)),
+                        (
+                            LOGGER_NAME,
+                            "ERROR",
+                            u"(2/3) Failed to publish {}: The failure message.".format(courses[1].id)
+                        ),
+                        (LOGGER_NAME, "INFO", u"(3/3) Successfully published {}.".format(courses[2].id)),
+                        (LOGGER_NAME, "INFO", "Processed 3 courses in 2.00 seconds (1.50 courses per second)."),
+                        (LOGGER_NAME, "ERROR", "Completed publishing courses. 1 of 3 failed."),
+                    )
+
+        if workers == 1:
+            self.assertFalse(pool.called)
+        else:
+            pool.assert_called_once_with(min(workers, 3))
+
+    def test_course_publish_checkpoint(self):
+        """ Verify published courses are recorded in the checkpoint file, and skipped when publishing again. """
+        second_course = CourseFactory()
+        failing_course = CourseFactory()
+        self.create_course_ids_file(self.tmp_file_path, [self.course.id, second_course.id, failing_course.id])
+        self.create_course_ids_file(self.checkpoint_file_path, [self.course.id, ''])
+
+        def publish_to_lms(course):
+            return 'The failure message.' if course == failing_course else None
+
+        with mock.patch.object(Course, 'publish_to_lms', autospec=True, side_effect=publish_to_lms) as mock_publish:
+            with LogCapture(LOGGER_NAME) as lc:
+                call_command(
+                    'publish_to_lms', course_ids_file=self.tmp_file_path, checkpoint_file=self.checkpoint_file_path
+                )
+                self.assertIn(
+                    (LOGGER_NAME, "INFO", "Skipping 1 courses published according to {}.".format(
+                        self.checkpoint_file_path
+                    )),
+                    [(record.name, record.levelname, record.getMessage()) for record in lc.records]
+                )
+
+        self.assertListEqual(mock_publish.call_args_list, [mock.call(second_course), mock.call(failing_course)])
+        with open(self.checkpoint_file_path) as checkpoint:
+            self.assertEqual(checkpoint.read().split(), [self.course.id, second_course.id])
+
+    def test_throttle_retries(self):
+        """ Verify the API clients used to publish courses retry throttled requests the given number of times. """
+        self.course.site = self.site
+        self.course.save()
+
+        with mock.patch.object(Course, 'publish_to_lms', autospec=True) as mock_publish:
+            mock_publish.return_value = None
+            call_command('publish_to_lms', course_ids_file=self.tmp_file_path, throttle_retries=5)
+
+        course = mock_publish.call_args[0][0]
+        self.assertEqual(course.site.siteconfiguration.api_throttle_retries, 5)
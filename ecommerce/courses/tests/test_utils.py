@@ -2,11 +2,10 @@ import hashlib
 
 import ddt
 import httpretty
-from mock import patch
 from opaque_keys.edx.keys import CourseKey
 from requests.exceptions import ConnectionError
 
-from ecommerce.cache_utils.utils import TieredCache
+from ecommerce.cache_utils.utils import RequestCache, TieredCache
 from ecommerce.coupons.tests.mixins import DiscoveryMockMixin
 from ecommerce.courses.tests.factories import CourseFactory
 from ecommerce.courses.utils import (
@@ -81,24 +80,22 @@ class UtilsTests(DiscoveryTestMixin, DiscoveryMockMixin, TestCase):
         """
         Verify that get_course_info_from_catalog is cached
 
-        We expect 2 calls to set_all_tiers in the get_course_info_from_catalog
-        method due to:
+        We expect 2 requests in the get_course_info_from_catalog method due to:
             - the site_configuration api setup
-            - the result being cached
+            - the course detail request
         """
         self.mock_access_token_response()
         product = create_or_update_course_entitlement(
             'verified', 100, self.partner, 'foo-bar', 'Foo Bar Entitlement')
         self.mock_course_detail_endpoint(product, discovery_api_url=self.site_configuration.discovery_api_url)
 
-        with patch.object(TieredCache, 'set_all_tiers', wraps=TieredCache.set_all_tiers) as mocked_set_all_tiers:
-            mocked_set_all_tiers.assert_not_called()
+        _ = get_course_info_from_catalog(self.request.site, product)
+        self.assertEqual(len(httpretty.httpretty.latest_requests), 2)
 
-            _ = get_course_info_from_catalog(self.request.site, product)
-            self.assertEqual(mocked_set_all_tiers.call_count, 2)
-
-            _ = get_course_info_from_catalog(self.request.site, product)
-            self.assertEqual(mocked_set_all_tiers.call_count, 2)
+        # The value must also be served from the django cache in later requests.
+        RequestCache.clear()
+        _ = get_course_info_from_catalog(self.request.site, product)
+        self.assertEqual(len(httpretty.httpretty.latest_requests), 2)
 
     @ddt.data(
         ('honor', 'Honor'),
@@ -3,6 +3,8 @@ import hashlib
 from django.conf import settings
 from django.utils.translation import ugettext_lazy as _
 from opaque_keys.edx.keys import CourseKey
+from requests.exceptions import ConnectionError, Timeout
+from slumber.exceptions import SlumberBaseException
 
 from ecommerce.cache_utils.utils import TieredCache
 from ecommerce.core.utils import deprecated_traverse_pagination
@@ -23,8 +25,24 @@ def mode_for_product(product):
     return mode
 
 
+def initialize_product_attributes(product):
+    """
+    Sets the attributes of the product from its prefetched attribute values, along with their attributes.
+
+    Reading product.attr would otherwise query the values again, as it selects their attributes.
+    """
+    for value in product.attribute_values.all():
+        setattr(product.attr, value.attribute.code, value.value)
+    product.attr.initialised = True
+
+
 def get_course_info_from_catalog(site, product):
-    """ Get course or course_run information from Discovery Service and cache """
+    """
+    Get course or course_run information from Discovery Service and cache.
+
+    Failures to retrieve the information are cached for API_ERROR_CACHE_TIMEOUT
+    seconds, during which the same exception is raised without calling the service.
+    """
     if product.is_course_entitlement_product:
         key = product.attr.UUID
     else:
@@ -35,17 +53,19 @@ def get_course_info_from_catalog(site, product):
 
     cache_key = 'courses_api_detail_{}{}'.format(key, partner_short_code)
     cache_key = hashlib.md5(cache_key).hexdigest()
-    course_cached_response = TieredCache.get_cached_response(cache_key)
-    if course_cached_response.is_hit:
-        return course_cached_response.value
 
-    if product.is_course_entitlement_product:
-        course = api.courses(key).get()
-    else:
-        course = api.course_runs(key).get(partner=partner_short_code)
+    def get_course():
+        if product.is_course_entitlement_product:
+            return api.courses(key).get()
+        return api.course_runs(key).get(partner=partner_short_code)
 
-    TieredCache.set_all_tiers(cache_key, course, settings.COURSES_API_CACHE_TIMEOUT)
-    return course
+    return TieredCache.get_or_compute(
+        cache_key,
+        get_course,
+        settings.COURSES_API_CACHE_TIMEOUT,
+        cached_exceptions=(ConnectionError, SlumberBaseException, Timeout),
+        error_cache_timeout=settings.API_ERROR_CACHE_TIMEOUT
+    )
 
 
 def get_course_catalogs(site, resource_id=None):
@@ -71,21 +91,16 @@ def get_course_catalogs(site, resource_id=None):
     cache_key = '{}.{}'.format(base_cache_key, resource_id) if resource_id else base_cache_key
     cache_key = hashlib.md5(cache_key).hexdigest()
 
-    cached_response = TieredCache.get_cached_response(cache_key)
-    if cached_response.is_hit:
-        return cached_response.value
+    def get_catalogs():
+        api = site.siteconfiguration.discovery_api_client
+        endpoint = getattr(api, resource)
+        response = endpoint(resource_id).get()
 
-    api = site.siteconfiguration.discovery_api_client
-    endpoint = getattr(api, resource)
-    response = endpoint(resource_id).get()
-
-    if resource_id:
-        results = response
-    else:
-        results = deprecated_traverse_pagination(response, endpoint)
+        if resource_id:
+            return response
+        return deprecated_traverse_pagination(response, endpoint)
 
-    TieredCache.set_all_tiers(cache_key, results, settings.COURSES_API_CACHE_TIMEOUT)
-    return results
+    return TieredCache.get_or_compute(cache_key, get_catalogs, settings.COURSES_API_CACHE_TIMEOUT)
 
 
 def get_certificate_type_display_value(certificate_type):
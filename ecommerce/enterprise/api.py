@@ -6,7 +6,7 @@ from urllib import urlencode
 
 from django.conf import settings
 from requests.exceptions import ConnectionError, Timeout
-from slumber.exceptions import SlumberHttpBaseException
+from slumber.exceptions import SlumberBaseException, SlumberHttpBaseException
 
 from ecommerce.cache_utils.utils import TieredCache
 from ecommerce.core.utils import get_cache_key
@@ -145,6 +145,9 @@ def fetch_enterprise_learner_data(site, user):
         Timeout: requests exception "Timeout", raised if enterprise API is taking too long for returning
             a response. This exception is raised for both connection timeout and read timeout.
 
+        These exceptions are cached for API_ERROR_CACHE_TIMEOUT seconds, during which they are raised
+        again without calling the Enterprise Service.
+
     """
     api_resource_name = 'enterprise-learner'
     partner_code = site.siteconfiguration.partner.short_code
@@ -155,17 +158,19 @@ def fetch_enterprise_learner_data(site, user):
         username=user.username
     )
 
-    cached_response = TieredCache.get_cached_response(cache_key)
-    if cached_response.is_hit:
-        return cached_response.value
-
-    api = site.siteconfiguration.enterprise_api_client
-    endpoint = getattr(api, api_resource_name)
-    querystring = {'username': user.username}
-    response = endpoint().get(**querystring)
-
-    TieredCache.set_all_tiers(cache_key, response, settings.ENTERPRISE_API_CACHE_TIMEOUT)
-    return response
+    def get_learner_data():
+        api = site.siteconfiguration.enterprise_api_client
+        endpoint = getattr(api, api_resource_name)
+        querystring = {'username': user.username}
+        return endpoint().get(**querystring)
+
+    return TieredCache.get_or_compute(
+        cache_key,
+        get_learner_data,
+        settings.ENTERPRISE_API_CACHE_TIMEOUT,
+        cached_exceptions=(ConnectionError, SlumberBaseException, Timeout),
+        error_cache_timeout=settings.API_ERROR_CACHE_TIMEOUT
+    )
 
 
 def catalog_contains_course_runs(site, course_run_ids, enterprise_customer_uuid, enterprise_customer_catalog_uuid=None):
@@ -168,18 +168,24 @@ def is_course_in_enterprise_catalog(site, course_id, enterprise_catalog_id):
         course_id=course_id,
         catalog_id=enterprise_catalog_id
     )
-    cached_response = TieredCache.get_cached_response(cache_key)
-    if cached_response.is_hit:
-        response = cached_response.value
-    else:
-        try:
-            response = site.siteconfiguration.discovery_api_client.catalogs(enterprise_catalog_id).contains.get(
-                course_run_id=course_id
-            )
-            TieredCache.set_all_tiers(cache_key, response, settings.COURSES_API_CACHE_TIMEOUT)
-        except (ConnectionError, SlumberBaseException, Timeout):
-            logger.exception('Unable to connect to Discovery Service for catalog contains endpoint.')
-            return False
+
+    def get_catalog_contains():
+        return site.siteconfiguration.discovery_api_client.catalogs(enterprise_catalog_id).contains.get(
+            course_run_id=course_id
+        )
+
+    try:
+        # Failures are cached briefly, so that later calls fail fast while the Discovery Service is unavailable.
+        response = TieredCache.get_or_compute(
+            cache_key,
+            get_catalog_contains,
+            settings.COURSES_API_CACHE_TIMEOUT,
+            cached_exceptions=(ConnectionError, SlumberBaseException, Timeout),
+            error_cache_timeout=settings.API_ERROR_CACHE_TIMEOUT
+        )
+    except (ConnectionError, SlumberBaseException, Timeout):
+        logger.exception('Unable to connect to Discovery Service for catalog contains endpoint.')
+        return False
 
     try:
         return response['courses'][course_id]
@@ -2,13 +2,12 @@
 import ddt
 import httpretty
 from django.conf import settings
-from mock import patch
 from oscar.core.loading import get_model
 from requests.exceptions import ConnectionError, Timeout
 from slumber.exceptions import SlumberBaseException
 from testfixtures import LogCapture
 
-from ecommerce.cache_utils.utils import TieredCache
+from ecommerce.cache_utils.utils import RequestCache
 from ecommerce.core.tests import toggle_switch
 from ecommerce.coupons.tests.mixins import CouponMixin, DiscoveryMockMixin
 from ecommerce.courses.tests.factories import CourseFactory
@@ -379,10 +378,9 @@ class EntitlementsTests(EnterpriseServiceMockMixin, DiscoveryTestMixin, Discover
         "is_course_in_enterprise_catalog" is cached for cases where the
         course is available in the enterprise course catalog.
 
-        We expect 2 calls to set_all_tiers in the
-        is_course_in_enterprise_catalog method due to:
+        We expect 2 requests in the is_course_in_enterprise_catalog method due to:
             - the site_configuration api setup
-            - the result being cached
+            - the catalog contains request
         """
         enterprise_catalog_id = 1
         self.mock_access_token_response()
@@ -390,18 +388,14 @@ class EntitlementsTests(EnterpriseServiceMockMixin, DiscoveryTestMixin, Discover
             discovery_api_url=self.site_configuration.discovery_api_url, catalog_id=enterprise_catalog_id,
             course_run_ids=[self.course.id]
         )
-        with patch.object(TieredCache, 'set_all_tiers', wraps=TieredCache.set_all_tiers) as mocked_set_all_tiers:
-            mocked_set_all_tiers.assert_not_called()
-
-            is_course_available = is_course_in_enterprise_catalog(
-                self.request.site, self.course.id, enterprise_catalog_id)
-            self.assertEqual(mocked_set_all_tiers.call_count, 2)
-            self.assertTrue(is_course_available)
+        is_course_available = is_course_in_enterprise_catalog(self.request.site, self.course.id, enterprise_catalog_id)
+        self._assert_num_requests(2)
+        self.assertTrue(is_course_available)
 
-            is_course_available = is_course_in_enterprise_catalog(
-                self.request.site, self.course.id, enterprise_catalog_id)
-            self.assertEqual(mocked_set_all_tiers.call_count, 2)
-            self.assertTrue(is_course_available)
+        RequestCache.clear()
+        is_course_available = is_course_in_enterprise_catalog(self.request.site, self.course.id, enterprise_catalog_id)
+        self._assert_num_requests(2)
+        self.assertTrue(is_course_available)
 
     def test_is_course_in_enterprise_catalog_for_unavailable_course(self):
         """
@@ -429,9 +423,9 @@ class EntitlementsTests(EnterpriseServiceMockMixin, DiscoveryTestMixin, Discover
         "is_course_in_enterprise_catalog" is cached for cases where the
         course is not available in the enterprise course catalog.
 
-        We expect 2 calls to set_all_tiers due to:
+        We expect 2 requests due to:
             - the site_configuration api setup
-            - the result being cached
+            - the catalog contains request
         """
         enterprise_catalog_id = 1
         self.mock_access_token_response()
@@ -442,18 +436,14 @@ class EntitlementsTests(EnterpriseServiceMockMixin, DiscoveryTestMixin, Discover
 
         test_course = CourseFactory(id='edx/Non_Enterprise_Course/DemoX')
 
-        with patch.object(TieredCache, 'set_all_tiers', wraps=TieredCache.set_all_tiers) as mocked_set_all_tiers:
-            mocked_set_all_tiers.assert_not_called()
-
-            is_course_available = is_course_in_enterprise_catalog(
-                self.request.site, test_course.id, enterprise_catalog_id)
-            self.assertEqual(mocked_set_all_tiers.call_count, 2)
-            self.assertFalse(is_course_available)
+        is_course_available = is_course_in_enterprise_catalog(self.request.site, test_course.id, enterprise_catalog_id)
+        self._assert_num_requests(2)
+        self.assertFalse(is_course_available)
 
-            is_course_available = is_course_in_enterprise_catalog(
-                self.request.site, test_course.id, enterprise_catalog_id)
-            self.assertEqual(mocked_set_all_tiers.call_count, 2)
-            self.assertFalse(is_course_available)
+        RequestCache.clear()
+        is_course_available = is_course_in_enterprise_catalog(self.request.site, test_course.id, enterprise_catalog_id)
+        self._assert_num_requests(2)
+        self.assertFalse(is_course_available)
 
     @ddt.data(ConnectionError, SlumberBaseException, Timeout)
     def test_is_course_in_enterprise_catalog_for_error_in_get_course_catalogs(self, error):
@@ -484,3 +474,21 @@ class EntitlementsTests(EnterpriseServiceMockMixin, DiscoveryTestMixin, Discover
 
         log_message = 'Unable to connect to Discovery Service for catalog contains endpoint.'
         self._assert_is_course_in_enterprise_catalog_for_failure(2, log_message)
+
+    def test_is_course_in_enterprise_catalog_failure_cached(self):
+        """
+        Verify that a failure to reach the Discovery Service is cached, so
+        that later calls fail fast without calling the service.
+        """
+        self.mock_access_token_response()
+        self.mock_course_runs_contains_endpoint_failure(
+            course_run_ids=[self.course.id], catalog_id=1, error=Timeout,
+            discovery_api_url=self.site_configuration.discovery_api_url
+        )
+
+        self.assertFalse(is_course_in_enterprise_catalog(self.request.site, self.course.id, 1))
+        self._assert_num_requests(2)
+
+        RequestCache.clear()
+        self.assertFalse(is_course_in_enterprise_catalog(self.request.site, self.course.id, 1))
+        self._assert_num_requests(2)
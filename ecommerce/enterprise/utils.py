@@ -50,7 +50,7 @@ def get_enterprise_api_client(site):
     """
     return EdxRestApiClient(
         site.siteconfiguration.enterprise_api_url,
-        jwt=site.siteconfiguration.access_token
+        session=site.siteconfiguration.create_api_session()
     )
 
 
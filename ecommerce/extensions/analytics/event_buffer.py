@@ -0,0 +1,170 @@
+"""
+In-process buffer of Segment events.
+
+Tracking an event with the Segment client validates and serializes it before enqueueing it, which
+checkout, basket and order completion requests used to do inline. Instead, track_segment_event adds
+events to a bounded, per-process buffer, and returns. A background thread takes batches of events
+from the buffer, once SEGMENT_EVENT_BATCH_SIZE events are waiting or SEGMENT_EVENT_FLUSH_INTERVAL
+seconds after the first of them was buffered, and hands each batch to one Segment client per write
+key. When the buffer is full, events are dropped and counted, rather than blocking requests.
+Buffered events are flushed when the process exits, including Celery worker processes.
+"""
+import atexit
+import datetime
+import logging
+import os
+import threading
+import time
+
+from celery.signals import worker_process_shutdown
+from dateutil.tz import tzutc
+from django.conf import settings
+from six.moves import queue
+
+from analytics import Client as SegmentClient
+
+logger = logging.getLogger(__name__)
+
+
+class SegmentEventBuffer(object):
+    """
+    Bounded buffer of Segment events, flushed by a background thread.
+
+    Events are buffered with the write key of their site, rather than the site itself, so that
+    no models are shared with the background thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._thread = None
+        self._clients = {}
+        self.stats = {}
+
+    def _start(self):
+        """ Creates the queue and starts the flushing thread, once per process. """
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+
+            # The buffer of a forked process starts empty, as the thread flushing its parent's buffer was not forked.
+            self._pid = os.getpid()
+            self._queue = queue.Queue(settings.SEGMENT_EVENT_BUFFER_SIZE)
+            self._clients = {}
+            self.stats = {'buffered': 0, 'dropped': 0, 'flushed': 0}
+            self._thread = threading.Thread(target=self._run, name='segment-event-buffer')
+            self._thread.daemon = True
+            self._thread.start()
+
+    def track(self, segment_key, user_id, event, properties, context):
+        """
+        Buffers an event.
+
+        Returns:
+            (success, msg): Tuple indicating whether the event was buffered, like SegmentClient.track.
+        """
+        if self._pid != os.getpid():
+            self._start()
+
+        # The time of the event is recorded now, rather than when it is flushed.
+        message = (segment_key, user_id, event, properties, context, datetime.datetime.now(tzutc()))
+        try:
+            self._queue.put(message, block=False)
+        except queue.Full:
+            self.stats['dropped'] += 1
+            if self.stats['dropped'] % settings.SEGMENT_EVENT_BATCH_SIZE == 1:
+                logger.warning(
+                    'Segment event buffer is full. [%d] events were dropped so far.', self.stats['dropped']
+                )
+            return False, 'Event [{event}] was dropped, as the Segment event buffer is full.'.format(event=event)
+
+        self.stats['buffered'] += 1
+        return True, 'Event [{event}] was buffered.'.format(event=event)
+
+    def _get_batch(self, block=True):
+        """ Returns the next batch of events, waiting for the first one if block is set. """
+        batch = []
+        try:
+            batch.append(self._queue.get(block=block))
+        except queue.Empty:
+            return batch
+
+        deadline = time.time() + settings.SEGMENT_EVENT_FLUSH_INTERVAL
+        while len(batch) < settings.SEGMENT_EVENT_BATCH_SIZE:
+            timeout = deadline - time.time()
+            try:
+                batch.append(self._queue.get(block=block and timeout > 0, timeout=max(timeout, 0) or None))
+            except queue.Empty:
+                break
+        return batch
+
+    def _send(self, batch):
+        """ Hands the events of the batch to the Segment client of their write key. """
+        batches_by_key = {}
+        for message in batch:
+            batches_by_key.setdefault(message[0], []).append(message[1:])
+
+        for segment_key, messages in batches_by_key.items():
+            client = self._clients.get(segment_key)
+            if client is None:
+                client = self._clients[segment_key] = SegmentClient(
+                    segment_key, debug=settings.DEBUG, send=settings.SEND_SEGMENT_EVENTS
+                )
+            for user_id, event, properties, context, timestamp in messages:
+                try:
+                    client.track(user_id, event, properties, context=context, timestamp=timestamp)
+                except Exception:  # pylint: disable=broad-except
+                    logger.exception('Failed to track Segment event [%s].', event)
+
+        self.stats['flushed'] += len(batch)
+        for __ in batch:
+            self._queue.task_done()
+
+    def _run(self):
+        while True:
+            self._send(self._get_batch())
+
+    def flush(self):
+        """
+        Sends every buffered event, and waits for the Segment clients to deliver them.
+
+        The consumer threads of the clients must be running, so this must not be called when the
+        process exits. See close.
+        """
+        if self._pid != os.getpid():
+            return
+
+        self._queue.join()
+        for client in list(self._clients.values()):
+            client.flush()
+
+    def close(self):
+        """
+        Sends every buffered event, and delivers them from the current thread. Called when the process exits.
+
+        Each Segment client registers an exit handler stopping its consumer thread when it is created, after
+        the exit handler of the buffer, so the consumers are stopped first and Client.flush would wait forever
+        for them. Instead, once the buffer is drained, the consumer of each client is stopped, if it was not
+        already, and the events left in the client's queue are uploaded by the current thread.
+        """
+        if self._pid != os.getpid():
+            return
+
+        self._queue.join()
+        for client in list(self._clients.values()):
+            client.join()
+            while not client.queue.empty():
+                client.consumer.upload()
+
+
+segment_event_buffer = SegmentEventBuffer()
+
+
+@worker_process_shutdown.connect
+def flush_segment_event_buffer(**kwargs):  # pylint: disable=unused-argument
+    """ Delivers the buffered events of the process, which is exiting. """
+    segment_event_buffer.close()
+
+
+atexit.register(flush_segment_event_buffer)
@@ -0,0 +1,143 @@
+import subprocess
+import sys
+import time
+
+import mock
+from django.test import override_settings
+
+from analytics import Client
+from ecommerce.extensions.analytics.event_buffer import SegmentEventBuffer
+from ecommerce.tests.testcases import TestCase
+
+CONTEXT = {'ip': '127.0.0.1'}
+
+# Buffers events, which Segment is slow to accept, then exits. Prints the number of events of each delivered batch.
+EXITING_PROCESS_SCRIPT = """
+import sys
+import time
+
+import django
+django.setup()
+
+import analytics.consumer
+from django.conf import settings
+
+from ecommerce.extensions.analytics.event_buffer import segment_event_buffer
+
+settings.SEND_SEGMENT_EVENTS = True
+
+
+def post(write_key, host, batch):
+    time.sleep(0.2)
+    sys.stdout.write('{}\\n'.format(len(batch)))
+
+
+analytics.consumer.post = post
+
+for index in range(500):
+    segment_event_buffer.track('key', 'user', 'Event {}'.format(index), {}, {})
+"""
+
+
+@override_settings(SEGMENT_EVENT_BUFFER_SIZE=3, SEGMENT_EVENT_BATCH_SIZE=2, SEGMENT_EVENT_FLUSH_INTERVAL=0.1)
+class SegmentEventBufferTests(TestCase):
+    def setUp(self):
+        super(SegmentEventBufferTests, self).setUp()
+        self.buffer = SegmentEventBuffer()
+
+    def stop_flushing(self):
+        """ Prevents the background thread of the buffer from taking events from it. """
+        patcher = mock.patch.object(SegmentEventBuffer, '_run')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_track(self):
+        """ Buffered events should be sent with the Segment client of their key, in batches. """
+        with mock.patch.object(Client, 'track') as mock_track, mock.patch.object(Client, 'flush') as mock_flush:
+            self.assertEqual(self.buffer.track('key-1', 'user-1', 'Event 1', {'a': 1}, CONTEXT), (True, mock.ANY))
+            self.buffer.track('key-2', 'user-2', 'Event 2', {}, CONTEXT)
+            self.buffer.track('key-1', 'user-1', 'Event 3', {}, CONTEXT)
+            self.buffer.flush()
+
+        # Events are sent in the order they were buffered, for each key.
+        self.assertEqual(
+            sorted(call[0] for call in mock_track.call_args_list),
+            [('user-1', 'Event 1', {'a': 1}), ('user-1', 'Event 3', {}), ('user-2', 'Event 2', {})]
+        )
+        self.assertEqual(mock_track.call_args[1]['context'], CONTEXT)
+        self.assertIsNotNone(mock_track.call_args[1]['timestamp'].tzinfo)
+        self.assertEqual(sorted(self.buffer._clients), ['key-1', 'key-2'])  # pylint: disable=protected-access
+        self.assertEqual(mock_flush.call_count, 2)
+        self.assertEqual(self.buffer.stats, {'buffered': 3, 'dropped': 0, 'flushed': 3})
+
+    def test_get_batch(self):
+        """ Batches should hold at most SEGMENT_EVENT_BATCH_SIZE events. """
+        self.stop_flushing()
+        for event in ('Event 1', 'Event 2', 'Event 3'):
+            self.buffer.track('key', 'user', event, {}, CONTEXT)
+
+        # pylint: disable=protected-access
+        self.assertEqual([message[2] for message in self.buffer._get_batch()], ['Event 1', 'Event 2'])
+        self.assertEqual([message[2] for message in self.buffer._get_batch()], ['Event 3'])
+        self.assertEqual(self.buffer._get_batch(block=False), [])
+
+    def test_track_full(self):
+        """ Events should be dropped and counted, rather than block, if the buffer is full. """
+        self.stop_flushing()
+        for __ in range(3):
+            self.assertTrue(self.buffer.track('key', 'user', 'Event', {}, CONTEXT)[0])
+
+        with mock.patch('ecommerce.extensions.analytics.event_buffer.logger') as mock_logger:
+            success, msg = self.buffer.track('key', 'user', 'Event', {}, CONTEXT)
+
+        self.assertFalse(success)
+        self.assertEqual(msg, 'Event [Event] was dropped, as the Segment event buffer is full.')
+        self.assertTrue(mock_logger.warning.called)
+        self.assertEqual(self.buffer.stats, {'buffered': 3, 'dropped': 1, 'flushed': 0})
+
+    def test_track_forked(self):
+        """ A process forked from one with a buffer should start its own buffer and thread. """
+        self.stop_flushing()
+        self.buffer.track('key', 'user', 'Event', {}, CONTEXT)
+        thread = self.buffer._thread  # pylint: disable=protected-access
+
+        with mock.patch('ecommerce.extensions.analytics.event_buffer.os.getpid', return_value=-1):
+            self.buffer.track('key', 'user', 'Event', {}, CONTEXT)
+
+        self.assertIsNot(self.buffer._thread, thread)  # pylint: disable=protected-access
+        self.assertEqual(self.buffer.stats['buffered'], 1)
+
+    @override_settings(SEND_SEGMENT_EVENTS=True)
+    def test_close(self):
+        """ Events should be delivered when the process exits, after the consumers of the clients were stopped. """
+        delivered = []
+
+        def post(write_key, host, batch):  # pylint: disable=unused-argument
+            delivered.extend(batch)
+
+        with mock.patch('analytics.consumer.post', side_effect=post):
+            for event in ('Event 1', 'Event 2', 'Event 3'):
+                self.buffer.track('key', 'user', event, {}, CONTEXT)
+            self.buffer.flush()
+            del delivered[:]
+
+            self.buffer.track('key', 'user', 'Event 4', {}, CONTEXT)
+            # The exit handlers of the clients run first.
+            for client in self.buffer._clients.values():  # pylint: disable=protected-access
+                client.join()
+            self.buffer.close()
+
+        self.assertEqual([message['event'] for message in delivered], ['Event 4'])
+
+    def test_exit_with_pending_events(self):
+        """ A process exiting with buffered events should deliver them, and exit. """
+        # The process inherits the DJANGO_SETTINGS_MODULE of the tests.
+        process = subprocess.Popen([sys.executable, '-c', EXITING_PROCESS_SCRIPT], stdout=subprocess.PIPE)
+        deadline = time.time() + 60
+        while process.poll() is None and time.time() < deadline:
+            time.sleep(0.1)
+        if process.poll() is None:
+            process.kill()
+            self.fail('The process did not exit.')
+
+        self.assertEqual(sum(int(line) for line in process.communicate()[0].split()), 500)
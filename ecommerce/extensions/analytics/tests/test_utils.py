@@ -3,6 +3,7 @@ import json
 import ddt
 import mock
 from django.contrib.auth.models import AnonymousUser
+from django.test import override_settings
 from django.test.client import RequestFactory
 from oscar.test import factories
 from waffle.testutils import override_switch
@@ -113,6 +114,24 @@ class UtilsTest(DiscoveryTestMixin, BasketMixin, TransactionTestCase):
             track_segment_event(self.site, user, event, properties)
             mock_track.assert_called_once_with(user_tracking_id, event, properties, context=context)
 
+    @override_settings(SEGMENT_EVENT_BUFFER_ENABLED=True)
+    def test_track_segment_event_buffered(self):
+        """ The function should buffer the event with the Segment key of the site, if the buffer is enabled. """
+        self.site_configuration.segment_key = 'fake-key'
+        self.site_configuration.save()
+        user, event, properties = self._get_generic_segment_event_parameters()
+        user_tracking_id, ga_client_id, lms_ip = parse_tracking_context(user)
+        context = {
+            'ip': lms_ip,
+            'Google Analytics': {
+                'clientId': ga_client_id
+            }
+        }
+        with mock.patch('ecommerce.extensions.analytics.utils.segment_event_buffer') as mock_buffer:
+            mock_buffer.track.return_value = (True, 'buffered')
+            self.assertEqual(track_segment_event(self.site, user, event, properties), (True, 'buffered'))
+            mock_buffer.track.assert_called_once_with('fake-key', user_tracking_id, event, properties, context)
+
     def test_translate_basket_line_for_segment(self):
         """ The method should return a dict formatted for Segment. """
         basket = create_basket(empty=True)
@@ -3,9 +3,11 @@ import logging
 from functools import wraps
 
 import waffle
+from django.conf import settings
 from django.db import transaction
 
 from ecommerce.courses.utils import mode_for_product
+from ecommerce.extensions.analytics.event_buffer import segment_event_buffer
 
 logger = logging.getLogger(__name__)
 
@@ -151,13 +153,19 @@ def track_segment_event(site, user, event, properties):
             'clientId': ga_client_id
         }
     }
+    if settings.SEGMENT_EVENT_BUFFER_ENABLED:
+        segment_key = site_configuration.segment_key
+
+        def track():
+            return segment_event_buffer.track(segment_key, user_tracking_id, event, properties, context)
+    else:
+        def track():
+            return site.siteconfiguration.segment_client.track(user_tracking_id, event, properties, context=context)
+
     if waffle.switch_is_active('basket_transaction_on_commit'):
-        return transaction.on_commit(
-            lambda: site.siteconfiguration.segment_client.track(user_tracking_id, event, properties, context=context)
-            # pylint: disable=cell-var-from-loop
-        )
+        return transaction.on_commit(track)
     else:
-        return site.siteconfiguration.segment_client.track(user_tracking_id, event, properties, context=context)
+        return track()
 
 
 def translate_basket_line_for_segment(line):
@@ -119,9 +119,12 @@ class ProductPaymentInfoMixin(serializers.ModelSerializer):
         return None
 
     def _get_info(self, product):
-        return Selector().strategy(
-            request=self.context.get('request')
-        ).fetch_for_product(product)
+        # All the products serialized together, e.g. the lines of a page of orders, are priced by a single
+        # strategy, which fetches the price and availability of each product once.
+        root = self.root
+        if not hasattr(root, 'strategy'):
+            root.strategy = Selector().strategy(request=self.context.get('request'))
+        return root.strategy.fetch_for_product(product)
 
 
 class BillingAddressSerializer(serializers.ModelSerializer):
@@ -17,12 +17,12 @@ from oscar.core.loading import get_model
 from oscar.test import factories
 from oscar.test.factories import BasketFactory
 from rest_framework.throttling import UserRateThrottle
-from waffle.testutils import override_flag, override_switch
+from waffle.testutils import override_switch
 
 from ecommerce.courses.models import Course
 from ecommerce.extensions.api import exceptions as api_exceptions
 from ecommerce.extensions.api.v2.tests.views import JSON_CONTENT_TYPE, OrderDetailViewTestMixin
-from ecommerce.extensions.api.v2.views.baskets import BasketCalculateView, BasketCreateView
+from ecommerce.extensions.api.v2.views.baskets import BasketCalculateBatchView, BasketCalculateView, BasketCreateView
 from ecommerce.extensions.payment import exceptions as payment_exceptions
 from ecommerce.extensions.payment.processors.cybersource import Cybersource
 from ecommerce.extensions.test.factories import (
@@ -40,6 +40,7 @@ Basket = get_model('basket', 'Basket')
 Benefit = get_model('offer', 'Benefit')
 ConditionalOffer = get_model('offer', 'ConditionalOffer')
 Condition = get_model('offer', 'Condition')
+Line = get_model('basket', 'Line')
 Order = get_model('order', 'Order')
 ShippingEventType = get_model('order', 'ShippingEventType')
 Refund = get_model('refund', 'Refund')
@@ -451,10 +452,11 @@ class BasketCalculateViewTests(ProgramTestMixin, TestCase):
         self.assertEqual(response.status_code, 200)
 
     @httpretty.activate
-    @mock.patch('ecommerce.programs.conditions.ProgramCourseRunSeatsCondition._get_lms_resource_for_user')
-    def test_basket_calculate_by_staff_user_other_username(self, mock_get_lms_resource_for_user):
+    @mock.patch('ecommerce.programs.conditions.get_user_ownership')
+    def test_basket_calculate_by_staff_user_other_username(self, mock_get_user_ownership):
         """Verify a staff user passing a valid username gets a response about the other user"""
         products, url = self.setup_other_user_basket_calculate()
+        mock_get_user_ownership.return_value = ([], [])
 
         expected = {
             'total_incl_tax_excl_discounts': sum(product.stockrecords.first().price_excl_tax
@@ -465,59 +467,29 @@ class BasketCalculateViewTests(ProgramTestMixin, TestCase):
 
         response = self.client.get(url)
 
-        self.assertTrue(mock_get_lms_resource_for_user.called, msg='LMS calls should be made for non-anonymous case.')
+        self.assertTrue(mock_get_user_ownership.called, msg='LMS calls should be made for non-anonymous case.')
 
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.data, expected)
 
     @httpretty.activate
     @mock.patch('ecommerce.extensions.api.v2.views.baskets.logger.exception')
-    @mock.patch('ecommerce.programs.conditions.ProgramCourseRunSeatsCondition._get_lms_resource_for_user')
-    @override_flag('disable_calculate_temporary_basket_atomic_transaction', active=True)
-    def test_basket_calculate_by_staff_user_other_username_non_atomic(
-            self, mock_get_lms_resource_for_user, mock_logger
-    ):
-        """
-        Verify a staff user passing a valid username gets a response about the
-        other user when using the non-atomic version of basket calculate.
-        """
-        products, url = self.setup_other_user_basket_calculate()
-
-        expected = {
-            'total_incl_tax_excl_discounts': sum(product.stockrecords.first().price_excl_tax
-                                                 for product in products),
-            'total_incl_tax': Decimal('0.00'),
-            'currency': 'USD'
-        }
-
-        response = self.client.get(url)
-
-        self.assertTrue(mock_get_lms_resource_for_user.called, msg='LMS calls should be made for non-anonymous case.')
-        self.assertFalse(mock_logger.called, msg='No message should be logged when there is no exception.')
-
-        self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.data, expected)
-
-    @httpretty.activate
-    @mock.patch('ecommerce.extensions.api.v2.views.baskets.logger.exception')
-    @mock.patch('ecommerce.programs.conditions.ProgramCourseRunSeatsCondition._get_lms_resource_for_user')
-    @override_flag('disable_calculate_temporary_basket_atomic_transaction', active=True)
-    def test_basket_calculate_by_staff_user_other_username_non_atomic_exception(
-            self, mock_get_lms_resource_for_user, mock_logger
+    @mock.patch('ecommerce.programs.conditions.get_user_ownership')
+    def test_basket_calculate_by_staff_user_other_username_exception(
+            self, mock_get_user_ownership, mock_logger
     ):
         """
         Verify logging occurs when an exception happens when a staff user
-        passing a valid username gets a response about the other user when
-        using the non-atomic version of basket calculate.
+        passing a valid username gets a response about the other user.
         """
         _, url = self.setup_other_user_basket_calculate()
 
-        mock_get_lms_resource_for_user.side_effect = Exception('Forced exception to test logging.')
+        mock_get_user_ownership.side_effect = Exception('Forced exception to test logging.')
 
         with self.assertRaises(Exception):
             self.client.get(url)
 
-        self.assertTrue(mock_get_lms_resource_for_user.called, msg='LMS calls should be made for non-anonymous case.')
+        self.assertTrue(mock_get_user_ownership.called, msg='LMS calls should be made for non-anonymous case.')
         self.assertTrue(mock_logger.called, msg='A message should have been logged for the exception.')
 
     def setup_other_user_basket_calculate(self):
@@ -547,8 +519,8 @@ class BasketCalculateViewTests(ProgramTestMixin, TestCase):
         return products, url
 
     @httpretty.activate
-    @mock.patch('ecommerce.programs.conditions.ProgramCourseRunSeatsCondition._get_lms_resource_for_user')
-    def test_basket_calculate_anonymous_skip_lms(self, mock_get_lms_resource_for_user):
+    @mock.patch('ecommerce.programs.conditions.get_user_ownership')
+    def test_basket_calculate_anonymous_skip_lms(self, mock_get_user_ownership):
         """Verify a call for an anonymous user skips calls to LMS for entitlements and enrollments"""
         products, url = self._setup_anonymous_basket_calculate()
 
@@ -561,7 +533,7 @@ class BasketCalculateViewTests(ProgramTestMixin, TestCase):
 
         response = self.client.get(url)
 
-        self.assertFalse(mock_get_lms_resource_for_user.called, msg='LMS calls should be skipped for anonymous case.')
+        self.assertFalse(mock_get_user_ownership.called, msg='LMS calls should be skipped for anonymous case.')
 
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.data, expected)
@@ -581,7 +553,6 @@ class BasketCalculateViewTests(ProgramTestMixin, TestCase):
             mock_track.assert_not_called()
 
     @mock.patch('ecommerce.extensions.api.v2.views.baskets.BasketCalculateView._calculate_temporary_basket')
-    @override_flag('disable_calculate_temporary_basket_atomic_transaction', active=True)
     @override_switch('force_anonymous_user_response_for_basket_calculate', active=True)
     def test_basket_calculate_anonymous_caching(self, mock_calculate_basket):
         """Verify a request made with the is_anonymous parameter is cached"""
@@ -642,25 +613,25 @@ class BasketCalculateViewTests(ProgramTestMixin, TestCase):
         self.assertFalse(mock_calculate_basket.called, msg='The cache should be hit.')
         self.assertEqual(response.data, expected)
 
-    @mock.patch('ecommerce.extensions.api.v2.views.baskets.BasketCalculateView._calculate_temporary_basket_atomic')
-    def test_basket_calculate_no_query_parameters(self, mock_calculate_basket_atomic):
+    @mock.patch('ecommerce.extensions.api.v2.views.baskets.BasketCalculateView._calculate_temporary_basket')
+    def test_basket_calculate_no_query_parameters(self, mock_calculate_basket):
         """Verify a request made without query parameters uses the request user"""
         expected = {'Test Succeeded': True}
-        mock_calculate_basket_atomic.return_value = expected
+        mock_calculate_basket.return_value = expected
 
         url_with_one_sku_no_anon = self._generate_sku_url(self.products[0:1], add_query_params=False)
 
         # Call BasketCalculate to test that we do not hit the cache
         response = self.client.get(url_with_one_sku_no_anon)
         self.assertEqual(response.status_code, 200)
-        self.assertTrue(mock_calculate_basket_atomic.called, msg='The cache should be missed.')
+        self.assertTrue(mock_calculate_basket.called, msg='The cache should be missed.')
         self.assertEqual(response.data, expected)
-        mock_calculate_basket_atomic.reset_mock()
+        mock_calculate_basket.reset_mock()
 
         # Call BasketCalculate again to test that we do not hit the cache
         response = self.client.get(url_with_one_sku_no_anon)
         self.assertEqual(response.status_code, 200)
-        self.assertTrue(mock_calculate_basket_atomic.called, msg='The cache should be missed.')
+        self.assertTrue(mock_calculate_basket.called, msg='The cache should be missed.')
         self.assertEqual(response.data, expected)
 
     @httpretty.activate
@@ -695,41 +666,40 @@ class BasketCalculateViewTests(ProgramTestMixin, TestCase):
         self.assertFalse(mock_calculate_basket.called)
 
     @httpretty.activate
-    @mock.patch('ecommerce.extensions.api.v2.views.baskets.BasketCalculateView._calculate_temporary_basket_atomic')
-    def test_basket_calculate_with_anonymous_caching_disabled(self, mock_calculate_basket_atomic):
+    @mock.patch('ecommerce.extensions.api.v2.views.baskets.BasketCalculateView._calculate_temporary_basket')
+    def test_basket_calculate_with_anonymous_caching_disabled(self, mock_calculate_basket):
         """Verify a request made by a staff user is not cached"""
         expected = {'Test Succeeded': True}
-        mock_calculate_basket_atomic.return_value = {'Test Succeeded': True}
+        mock_calculate_basket.return_value = {'Test Succeeded': True}
 
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, 200)
-        self.assertTrue(mock_calculate_basket_atomic.called)
+        self.assertTrue(mock_calculate_basket.called)
         self.assertEqual(response.data, expected)
 
-        mock_calculate_basket_atomic.reset_mock()
+        mock_calculate_basket.reset_mock()
 
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, 200)
-        self.assertTrue(mock_calculate_basket_atomic.called, msg='The cache should be missed.')
+        self.assertTrue(mock_calculate_basket.called, msg='The cache should be missed.')
         self.assertEqual(response.data, expected)
 
-    @httpretty.activate
-    @mock.patch('ecommerce.extensions.api.v2.views.baskets.BasketCalculateView._calculate_temporary_basket_atomic')
-    @override_flag('disable_calculate_temporary_basket_atomic_transaction', active=False)
-    def test_basket_calculate_with_atomic_transaction(self, mock_calculate_basket_atomic):
-        """Verify a request that should calculate with the atomic transaction code does so."""
-        expected = {'Test Succeeded': True}
-        mock_calculate_basket_atomic.return_value = {'Test Succeeded': True}
+    def test_basket_calculate_does_not_save_basket(self):
+        """Verify the temporary basket, and its lines and vouchers, are not written to the database."""
+        voucher, _ = prepare_voucher(_range=self.range, benefit_type=Benefit.PERCENTAGE, benefit_value=20)
+        basket_count = Basket.objects.count()
+        line_count = Line.objects.count()
 
-        response = self.client.get(self.url)
+        response = self.client.get(self.url + '&code={code}'.format(code=voucher.code))
         self.assertEqual(response.status_code, 200)
-        self.assertTrue(mock_calculate_basket_atomic.called)
-        self.assertEqual(response.data, expected)
+        self.assertLess(response.data['total_incl_tax'], self.product_total)
+        self.assertEqual(Basket.objects.count(), basket_count)
+        self.assertEqual(Line.objects.count(), line_count)
 
     @httpretty.activate
-    @mock.patch('ecommerce.programs.conditions.ProgramCourseRunSeatsCondition._get_lms_resource_for_user')
+    @mock.patch('ecommerce.programs.conditions.get_user_ownership')
     @mock.patch('ecommerce.extensions.api.v2.views.baskets.logger.exception')
-    def test_basket_calculate_by_staff_user_invalid_username(self, mock_get_lms_resource_for_user, mock_logger):
+    def test_basket_calculate_by_staff_user_invalid_username(self, mock_get_user_ownership, mock_logger):
         """Verify that a staff user passing an invalid username gets a response the anonymous
             basket and an error is logged about a non existent user """
         self.site_configuration.enable_partial_program = True
@@ -756,7 +726,7 @@ class BasketCalculateViewTests(ProgramTestMixin, TestCase):
             response = self.client.get(url)
 
             self.assertFalse(
-                mock_get_lms_resource_for_user.called, msg='LMS calls should be skipped for anonymous case.'
+                mock_get_user_ownership.called, msg='LMS calls should be skipped for anonymous case.'
             )
 
             self.assertEqual(response.status_code, 200)
@@ -782,7 +752,7 @@ class BasketCalculateViewTests(ProgramTestMixin, TestCase):
         response = self.client.get(self.url + '&username={username}'.format(username=differentuser.username))
         self.assertEqual(response.status_code, 403)
 
-    @mock.patch('ecommerce.extensions.basket.models.Basket.add_product', mock.Mock(side_effect=Exception))
+    @mock.patch('ecommerce.extensions.basket.models.InMemoryBasket.add_product', mock.Mock(side_effect=Exception))
     @mock.patch('ecommerce.extensions.api.v2.views.baskets.logger.exception')
     def test_exception_log(self, mock_logger):
         """A log entry is filed when an exception happens."""
@@ -899,3 +869,95 @@ class BasketCalculateViewTests(ProgramTestMixin, TestCase):
         self.client.logout()
         self.client.login(username=user.username, password=self.password)
         return user
+
+
+class BasketCalculateBatchViewTests(TestCase):
+    def setUp(self):
+        super(BasketCalculateBatchViewTests, self).setUp()
+        self.products = ProductFactory.create_batch(
+            3, stockrecords__partner=self.partner, stockrecords__price_excl_tax=10, categories=[]
+        )
+        self.skus = [product.stockrecords.first().partner_sku for product in self.products]
+        self.prices = [product.stockrecords.first().price_excl_tax for product in self.products]
+        self.path = reverse('api:v2:baskets:calculate_batch')
+        self.user = self.create_user(is_staff=True)
+        self.client.login(username=self.user.username, password=self.password)
+
+    def get_url(self, sku_lists, **params):
+        params['skus'] = [','.join(skus) for skus in sku_lists]
+        return '{path}?{qs}'.format(path=self.path, qs=urllib.urlencode(params, True))
+
+    def get_expected(self, skus, prices, total_incl_tax=None):
+        total = sum(prices)
+        return {
+            'skus': sorted(skus),
+            'total_incl_tax_excl_discounts': total,
+            'total_incl_tax': total if total_incl_tax is None else total_incl_tax,
+            'currency': 'GBP'
+        }
+
+    def test_no_skus(self):
+        """ Verify bad response when not providing sku(s) """
+        self.assertEqual(self.client.get(self.path).status_code, 400)
+        self.assertEqual(self.client.get(self.get_url([self.skus[:1], []])).status_code, 400)
+
+    @override_settings(BASKET_CALCULATE_BATCH_MAX_BASKETS=2)
+    def test_too_many_baskets(self):
+        """ Verify bad response when requesting more baskets than allowed """
+        response = self.client.get(self.get_url([[sku] for sku in self.skus], username=self.user.username))
+        self.assertEqual(response.status_code, 400)
+
+    def test_no_authentication(self):
+        """ Verify that un-authenticated users are rejected """
+        self.client.logout()
+        self.assertEqual(self.client.get(self.get_url([self.skus])).status_code, 401)
+
+    def test_calculate(self):
+        """ Verify that every basket is calculated, and that unknown SKUs are reported per basket """
+        sku_lists = [self.skus[:1], self.skus[1:], ['foo']]
+        response = self.client.get(self.get_url(sku_lists, username=self.user.username))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [
+            self.get_expected(self.skus[:1], self.prices[:1]),
+            self.get_expected(self.skus[1:], self.prices[1:]),
+            {'skus': ['foo'], 'detail': 'Products with SKU(s) [foo] do not exist.'},
+        ])
+        self.assertFalse(Basket.objects.exists())
+
+    def test_calculate_site_offer(self):
+        """ Verify that site offers are applied to every basket """
+        _range = factories.RangeFactory(includes_all_products=True)
+        factories.ConditionalOfferFactory(
+            offer_type=ConditionalOffer.SITE,
+            benefit=factories.BenefitFactory(type=Benefit.PERCENTAGE, range=_range, value=10),
+            condition=factories.ConditionFactory(type=Condition.COUNT, range=_range, value=1),
+        )
+
+        response = self.client.get(self.get_url([self.skus[:1], self.skus], username=self.user.username))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [
+            self.get_expected(self.skus[:1], self.prices[:1], Decimal('9.00')),
+            self.get_expected(self.skus, self.prices, Decimal('27.00')),
+        ])
+
+    def test_anonymous_caching(self):
+        """ Verify that anonymous basket totals are cached, and shared with the calculate endpoint """
+        calculate_url = '{path}?{qs}'.format(
+            path=reverse('api:v2:baskets:calculate'),
+            qs=urllib.urlencode({'sku': self.skus[:1], 'is_anonymous': True}, True)
+        )
+        self.assertEqual(self.client.get(calculate_url).status_code, 200)
+
+        with mock.patch.object(
+            BasketCalculateBatchView, '_calculate_basket_totals', return_value={'total_incl_tax': 1}
+        ) as mock_calculate:
+            url = self.get_url([self.skus[:1], self.skus[1:]], is_anonymous=True)
+            response = self.client.get(url)
+            self.assertEqual(mock_calculate.call_count, 1)
+            self.assertEqual(response.data[0], self.get_expected(self.skus[:1], self.prices[:1]))
+            self.assertEqual(response.data[1], {'skus': sorted(self.skus[1:]), 'total_incl_tax': 1})
+
+            self.client.get(url)
+            self.assertEqual(mock_calculate.call_count, 1)
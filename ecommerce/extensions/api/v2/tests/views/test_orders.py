@@ -4,10 +4,14 @@ import ddt
 import httpretty
 import mock
 from django.contrib.auth.models import Permission
+from django.db import connection
 from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from oscar.core.loading import get_model
+from oscar.test import factories
 
+from ecommerce.courses.tests.factories import CourseFactory
 from ecommerce.extensions.api.serializers import OrderSerializer
 from ecommerce.extensions.api.tests.test_authentication import AccessTokenMixin
 from ecommerce.extensions.api.v2.tests.views import OrderDetailViewTestMixin
@@ -21,6 +25,10 @@ from ecommerce.tests.testcases import TestCase
 Order = get_model('order', 'Order')
 ShippingEventType = get_model('order', 'ShippingEventType')
 
+# Queries made to list orders: the site, theme and user of the request, the count of orders, the orders,
+# and each relation serialized with them, which OrderViewSet prefetches.
+ORDER_LIST_QUERY_BUDGET = 15
+
 
 @ddt.ddt
 class OrderListViewTests(AccessTokenMixin, ThrottlingMixin, TestCase):
@@ -145,6 +153,34 @@ class OrderListViewTests(AccessTokenMixin, ThrottlingMixin, TestCase):
         response = self.client.get(self.path, {'username': self.user.username})
         self.assertEqual(response.status_code, 403)
 
+    def create_seat_order(self, source_type):
+        """ Creates an order of two course seats, paid with a payment source of the given type, for the user. """
+        basket = factories.BasketFactory(owner=self.user, site=self.site)
+        for seat_type in ('verified', 'professional'):
+            basket.add_product(CourseFactory().create_or_update_seat(seat_type, True, 50, self.partner), 1)
+        order = create_order(basket=basket, user=self.user)
+        factories.SourceFactory(order=order, source_type=source_type)
+        return order
+
+    def get_order_list_queries(self):
+        """ Returns the number of queries made to list the orders of the user. """
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.path, HTTP_AUTHORIZATION=self.token)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_query_budget(self):
+        """ The number of queries made to list orders should not grow with the number of orders and lines. """
+        source_type = factories.SourceTypeFactory()
+        self.create_seat_order(source_type)
+        queries = self.get_order_list_queries()
+
+        for __ in range(4):
+            self.create_seat_order(source_type)
+
+        self.assertEqual(self.get_order_list_queries(), queries)
+        self.assertLessEqual(queries, ORDER_LIST_QUERY_BUDGET)
+
     def assert_list_with_username_filter(self, user, order):
         """ Helper method for making assertions. """
 
@@ -34,6 +34,11 @@ Range = get_model('offer', 'Range')
 StockRecord = get_model('partner', 'StockRecord')
 Voucher = get_model('voucher', 'Voucher')
 
+# Queries made to collect the offers of a page of Discovery results: the voucher's offer, benefit and range,
+# which get_offers and get_offers_from_query each load, the products with their courses, their attributes,
+# their stock records, and the stock records of the page.
+OFFERS_QUERY_BUDGET = 10
+
 
 @ddt.ddt
 class VoucherViewSetTests(DiscoveryMockMixin, DiscoveryTestMixin, LmsApiMockMixin, TestCase):
@@ -201,6 +206,18 @@ class VoucherViewSetTests(DiscoveryMockMixin, DiscoveryTestMixin, LmsApiMockMixi
             self.assertTrue(offer['multiple_credit_providers'])
             self.assertIsNone(offer['credit_provider_price'])
 
+    @httpretty.activate
+    @ddt.data(1, 100)
+    def test_offers_query_budget(self, quantity):
+        """ Verify the offers of a page of results are collected with a constant number of queries. """
+        self.mock_access_token_response()
+        seats = [self.create_course_and_seat(partner=self.partner)[1] for __ in range(quantity)]
+        __, request, voucher = self.prepare_get_offers_response(quantity=quantity, seats=seats)
+
+        with self.assertNumQueries(OFFERS_QUERY_BUDGET):
+            offers = VoucherViewSet().get_offers(request=request, voucher=voucher)['results']
+        self.assertEqual(len(offers), quantity)
+
     def test_omitting_expired_courses(self):
         """Verify professional courses who's enrollment end datetime have passed are omitted."""
         no_date_seat = CourseFactory().create_or_update_seat('professional', False, 100, partner=self.partner)
@@ -36,6 +36,7 @@ BASKET_URLS = [
         name='retrieve_order'
     ),
     url(r'^calculate/$', basket_views.BasketCalculateView.as_view(), name='calculate'),
+    url(r'^calculate/batch/$', basket_views.BasketCalculateBatchView.as_view(), name='calculate_batch'),
 ]
 
 PAYMENT_URLS = [
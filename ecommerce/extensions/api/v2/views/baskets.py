@@ -33,11 +33,13 @@ from ecommerce.extensions.payment.helpers import get_default_processor_class, ge
 
 Applicator = get_class('offer.applicator', 'Applicator')
 Basket = get_model('basket', 'Basket')
+InMemoryBasket = get_model('basket', 'InMemoryBasket')
 logger = logging.getLogger(__name__)
 Order = get_model('order', 'Order')
 OrderNumberGenerator = get_class('order.utils', 'OrderNumberGenerator')
 Product = get_model('catalogue', 'Product')
 Selector = get_class('partner.strategy', 'Selector')
+StockRecord = get_model('partner', 'StockRecord')
 User = get_user_model()
 Voucher = get_model('voucher', 'Voucher')
 
@@ -343,132 +345,55 @@ class BasketCalculateView(generics.GenericAPIView):
     permission_classes = (IsAuthenticated,)
     MARKETING_USER = 'marketing_site_worker'
 
-    def _calculate_temporary_basket_atomic(self, user, request, products, voucher, skus, code):
-        response = None
-        try:
-            # We wrap this in an atomic operation so we never commit this to the db.
-            # This is to avoid merging this temporary basket with a real user basket.
-            with transaction.atomic():
-                basket = Basket(owner=user, site=request.site)
-                basket.strategy = Selector().strategy(user=user)
-
-                for product in products:
-                    basket.add_product(product, 1)
-
-                if voucher:
-                    basket.vouchers.add(voucher)
+    def _calculate_basket_totals(self, basket, request, products, voucher, applicator=None):
+        """ Adds the products and voucher to the basket, applies offers, and returns the basket's totals. """
+        for product in products:
+            basket.add_product(product, 1)
 
-                # Calculate any discounts on the basket.
-                Applicator().apply(basket, user=user, request=request)
+        if voucher:
+            basket.add_voucher(voucher)
 
-                discounts = []
-                if basket.offer_discounts:
-                    discounts = basket.offer_discounts
-                if basket.voucher_discounts:
-                    discounts.extend(basket.voucher_discounts)
+        # Calculate any discounts on the basket.
+        (applicator or Applicator()).apply(basket, user=basket.owner, request=request)
 
-                response = {
-                    'total_incl_tax_excl_discounts': basket.total_incl_tax_excl_discounts,
-                    'total_incl_tax': basket.total_incl_tax,
-                    'currency': basket.currency
-                }
-                raise api_exceptions.TemporaryBasketException
-        except api_exceptions.TemporaryBasketException:
-            pass
-        except:  # pylint: disable=bare-except
-            logger.exception(
-                'Failed to calculate basket discount for SKUs [%s] and voucher [%s].',
-                skus, code
-            )
-            raise
-        return response
+        return {
+            'total_incl_tax_excl_discounts': basket.total_incl_tax_excl_discounts,
+            'total_incl_tax': basket.total_incl_tax,
+            'currency': basket.currency
+        }
 
-    def _calculate_temporary_basket(self, user, request, products, voucher, skus, code):
-        # TODO: LEARNER-5197: Delete the "pragma: no cover" pragmas from this function
-        # once the disable_calculate_temporary_basket_atomic_transaction waffle flag has
-        # been removed.
-        response = None
-        basket = None
+    def _create_temporary_basket(self, user, request):
+        # The basket is only kept in memory, so it is never merged with a real user basket.
+        basket = InMemoryBasket(owner=user, site=request.site)
+        basket.strategy = Selector().strategy(user=user)
+        return basket
 
+    def _calculate_temporary_basket(self, user, request, products, voucher, skus, code, applicator=None):
         try:
-            basket = Basket(owner=user, site=request.site)
-            basket.strategy = Selector().strategy(user=user)
-
-            for product in products:
-                basket.add_product(product, 1)
-
-            if voucher:  # pragma: no cover
-                basket.vouchers.add(voucher)
-
-            # Calculate any discounts on the basket.
-            Applicator().apply(basket, user=user, request=request)
-
-            discounts = []
-            if basket.offer_discounts:  # pragma: no cover
-                discounts = basket.offer_discounts
-            if basket.voucher_discounts:  # pragma: no cover
-                discounts.extend(basket.voucher_discounts)
-
-            response = {
-                'total_incl_tax_excl_discounts': basket.total_incl_tax_excl_discounts,
-                'total_incl_tax': basket.total_incl_tax,
-                'currency': basket.currency
-            }
+            basket = self._create_temporary_basket(user, request)
+            return self._calculate_basket_totals(basket, request, products, voucher, applicator=applicator)
         except:  # pylint: disable=bare-except
             logger.exception(
                 'Failed to calculate basket discount for SKUs [%s] and voucher [%s].',
                 skus, code
             )
             raise
-        finally:
-            if basket:
-                basket.delete()
-
-        return response
-
-    @transaction.non_atomic_requests
-    def get(self, request):  # pylint: disable=too-many-statements
-        """ Calculate basket totals given a list of sku's
-
-        Create a temporary basket add the sku's and apply an optional voucher code.
-        Then calculate the total price less discounts. If a voucher code is not
-        provided apply a voucher in the Enterprise entitlements available
-        to the user.
-
-        Query Params:
-            sku (string): A list of sku(s) to calculate
-            code (string): Optional voucher code to apply to the basket.
-            username (string): Optional username of a user for which to calculate the basket.
-
-        Returns:
-            JSON: {
-                    'total_incl_tax_excl_discounts': basket.total_incl_tax_excl_discounts,
-                    'total_incl_tax': basket.total_incl_tax,
-                    'currency': basket.currency
-                }
-        """
-        RequestCache.set(TEMPORARY_BASKET_CACHE_KEY, True)  # TODO: LEARNER 5463
 
-        partner = get_partner_for_site(request)
-        skus = request.GET.getlist('sku')
-        if not skus:
-            return HttpResponseBadRequest(_('No SKUs provided.'))
-        skus.sort()
-
-        code = request.GET.get('code', None)
+    def _get_voucher(self, code):
         try:
-            voucher = Voucher.objects.get(code=code) if code else None
+            return Voucher.objects.get(code=code) if code else None
         except Voucher.DoesNotExist:
-            voucher = None
-
-        products = Product.objects.filter(stockrecords__partner=partner, stockrecords__partner_sku__in=skus)
-        if not products:
-            return HttpResponseBadRequest(_('Products with SKU(s) [{skus}] do not exist.').format(skus=', '.join(skus)))
+            return None
 
-        # If there is only one product apply an Enterprise entitlement voucher
-        if not voucher and len(products) == 1:
-            voucher = get_entitlement_voucher(request, products[0])
+    def _get_basket_owner(self, request):
+        """
+        Determines the user for whom baskets should be calculated, from the username and
+        is_anonymous query parameters.
 
+        Returns:
+            tuple: The user, or None if anonymous baskets should be calculated, and an
+                error response if the query parameters are invalid.
+        """
         basket_owner = request.user
 
         if waffle.switch_is_active("force_anonymous_user_response_for_basket_calculate"):
@@ -483,7 +408,7 @@ class BasketCalculateView(generics.GenericAPIView):
 
         # validate query parameters
         if requested_username and is_anonymous:
-            return HttpResponseBadRequest(_('Provide username or is_anonymous query param, but not both'))
+            return None, HttpResponseBadRequest(_('Provide username or is_anonymous query param, but not both'))
         elif not requested_username and not is_anonymous:
             logger.warning("Request to Basket Calculate must supply either username or is_anonymous query"
                            " param. Requesting user=%s. Future versions of this API will treat this "
@@ -503,7 +428,7 @@ class BasketCalculateView(generics.GenericAPIView):
                     # never purchased before.
                     use_default_basket = True
             else:
-                return HttpResponseForbidden('Unauthorized user credentials')
+                return None, HttpResponseForbidden('Unauthorized user credentials')
 
         if basket_owner.username == self.MARKETING_USER and not use_default_basket:
             # For legacy requests that predate is_anonymous parameter, we will calculate
@@ -515,29 +440,193 @@ class BasketCalculateView(generics.GenericAPIView):
         if use_default_basket:
             basket_owner = None
 
+        return basket_owner, None
+
+    def _get_anonymous_cache_key(self, request, skus):
+        # For an anonymous user we can directly get the cached price, because
+        # there can't be any enrollments or entitlements.
+        return get_cache_key(
+            site_comain=request.site,
+            resource_name='calculate',
+            skus=skus
+        )
+
+    @transaction.non_atomic_requests
+    def get(self, request):
+        """ Calculate basket totals given a list of sku's
+
+        Create a temporary basket add the sku's and apply an optional voucher code.
+        Then calculate the total price less discounts. If a voucher code is not
+        provided apply a voucher in the Enterprise entitlements available
+        to the user.
+
+        Query Params:
+            sku (string): A list of sku(s) to calculate
+            code (string): Optional voucher code to apply to the basket.
+            username (string): Optional username of a user for which to calculate the basket.
+
+        Returns:
+            JSON: {
+                    'total_incl_tax_excl_discounts': basket.total_incl_tax_excl_discounts,
+                    'total_incl_tax': basket.total_incl_tax,
+                    'currency': basket.currency
+                }
+        """
+        RequestCache.set(TEMPORARY_BASKET_CACHE_KEY, True, pinned=True)  # TODO: LEARNER 5463
+
+        partner = get_partner_for_site(request)
+        skus = request.GET.getlist('sku')
+        if not skus:
+            return HttpResponseBadRequest(_('No SKUs provided.'))
+        skus.sort()
+
+        code = request.GET.get('code', None)
+        voucher = self._get_voucher(code)
+
+        products = Product.objects.filter(stockrecords__partner=partner, stockrecords__partner_sku__in=skus)
+        if not products:
+            return HttpResponseBadRequest(_('Products with SKU(s) [{skus}] do not exist.').format(skus=', '.join(skus)))
+
+        # If there is only one product apply an Enterprise entitlement voucher
+        if not voucher and len(products) == 1:
+            voucher = get_entitlement_voucher(request, products[0])
+
+        basket_owner, error_response = self._get_basket_owner(request)
+        if error_response:
+            return error_response
+        use_default_basket = basket_owner is None
+
         cache_key = None
         if use_default_basket:
-            # For an anonymous user we can directly get the cached price, because
-            # there can't be any enrollments or entitlements.
-            cache_key = get_cache_key(
-                site_comain=request.site,
-                resource_name='calculate',
-                skus=skus
-            )
+            cache_key = self._get_anonymous_cache_key(request, skus)
             cached_response = TieredCache.get_cached_response(cache_key)
             if cached_response.is_hit:
                 return Response(cached_response.value)
 
-        # There are too many open questions around dropping the atomic transaction for a user's basket,
-        # including how user basket merges was coded.  For now, only allow disabling the atomic
-        # transaction if we are also forcing the anonymous basket response for all users.
-        if waffle.flag_is_active(request, "disable_calculate_temporary_basket_atomic_transaction")\
-                and waffle.switch_is_active("force_anonymous_user_response_for_basket_calculate"):
-            response = self._calculate_temporary_basket(basket_owner, request, products, voucher, skus, code)
-        else:
-            response = self._calculate_temporary_basket_atomic(basket_owner, request, products, voucher, skus, code)
+        response = self._calculate_temporary_basket(basket_owner, request, products, voucher, skus, code)
 
         if response and use_default_basket:
             TieredCache.set_all_tiers(cache_key, response, settings.ANONYMOUS_BASKET_CALCULATE_CACHE_TIMEOUT)
 
         return Response(response)
+
+
+class BasketCalculateBatchView(BasketCalculateView):
+    """ Calculates the totals of many baskets in one request. """
+
+    def _get_products_by_sku(self, partner, skus):
+        stock_records = StockRecord.objects.filter(partner=partner, partner_sku__in=skus).select_related('product')
+        return {stock_record.partner_sku: stock_record.product for stock_record in stock_records}
+
+    def _calculate_temporary_baskets(self, user, request, baskets, voucher, code):
+        """
+        Calculates the totals of many temporary baskets.
+
+        The baskets share the site offers, which are loaded once.
+
+        Arguments:
+            baskets (dict): Lists of products, keyed by the tuple of SKUs they were requested with.
+
+        Returns:
+            dict: Basket totals, keyed by tuple of SKUs.
+        """
+        if not baskets:
+            return {}
+
+        responses = {}
+        applicator = Applicator(site_offers=list(Applicator().get_site_offers()))
+        for skus, products in baskets.items():
+            basket_voucher = voucher
+            # If there is only one product apply an Enterprise entitlement voucher
+            if not basket_voucher and len(products) == 1:
+                basket_voucher = get_entitlement_voucher(request, products[0])
+
+            responses[skus] = self._calculate_temporary_basket(
+                user, request, products, basket_voucher, skus, code, applicator=applicator
+            )
+        return responses
+
+    @transaction.non_atomic_requests
+    def get(self, request):
+        """ Calculate the totals of many baskets, given a list of sku's for each basket
+
+        Each basket is calculated as by the calculate endpoint, with the same optional
+        voucher code, for the same user. Products and site offers are loaded once for all
+        baskets, and anonymous basket totals are cached per basket.
+
+        Query Params:
+            skus (string): Comma-separated sku(s) of a basket to calculate. Repeat for each basket.
+            code (string): Optional voucher code to apply to every basket.
+            username (string): Optional username of a user for which to calculate the baskets.
+
+        Returns:
+            JSON: [
+                    {
+                        'skus': skus,
+                        'total_incl_tax_excl_discounts': basket.total_incl_tax_excl_discounts,
+                        'total_incl_tax': basket.total_incl_tax,
+                        'currency': basket.currency
+                    },
+                    {
+                        'skus': skus,
+                        'detail': 'Products with SKU(s) [...] do not exist.'
+                    },
+                    ...
+                ]
+        """
+        RequestCache.set(TEMPORARY_BASKET_CACHE_KEY, True, pinned=True)  # TODO: LEARNER 5463
+
+        sku_lists = [sorted(sku for sku in value.split(',') if sku) for value in request.GET.getlist('skus')]
+        if not sku_lists or not all(sku_lists):
+            return HttpResponseBadRequest(_('No SKUs provided.'))
+        if len(sku_lists) > settings.BASKET_CALCULATE_BATCH_MAX_BASKETS:
+            return HttpResponseBadRequest(
+                _('No more than {count} baskets can be calculated at once.').format(
+                    count=settings.BASKET_CALCULATE_BATCH_MAX_BASKETS
+                )
+            )
+
+        basket_owner, error_response = self._get_basket_owner(request)
+        if error_response:
+            return error_response
+        use_default_basket = basket_owner is None
+
+        responses = {}
+        cache_keys = {}
+        if use_default_basket:
+            cache_keys = {tuple(skus): self._get_anonymous_cache_key(request, skus) for skus in sku_lists}
+            cached_responses = TieredCache.get_many(cache_keys.values())
+            for skus, cache_key in cache_keys.items():
+                if cached_responses[cache_key].is_hit:
+                    responses[skus] = cached_responses[cache_key].value
+
+        uncached_sku_lists = set(tuple(skus) for skus in sku_lists) - set(responses)
+        if uncached_sku_lists:
+            partner = get_partner_for_site(request)
+            products_by_sku = self._get_products_by_sku(
+                partner, set(sku for skus in uncached_sku_lists for sku in skus)
+            )
+
+            baskets = {}
+            for skus in uncached_sku_lists:
+                products = [products_by_sku[sku] for sku in skus if sku in products_by_sku]
+                if products:
+                    baskets[skus] = products
+                else:
+                    responses[skus] = {
+                        'detail': _('Products with SKU(s) [{skus}] do not exist.').format(skus=', '.join(skus))
+                    }
+
+            code = request.GET.get('code', None)
+            calculated_responses = self._calculate_temporary_baskets(
+                basket_owner, request, baskets, self._get_voucher(code), code
+            )
+            responses.update(calculated_responses)
+
+            if use_default_basket:
+                TieredCache.set_many_all_tiers(
+                    {cache_keys[skus]: response for skus, response in calculated_responses.items()},
+                    settings.ANONYMOUS_BASKET_CALCULATE_CACHE_TIMEOUT
+                )
+
+        return Response([dict(responses[tuple(skus)], skus=skus) for skus in sku_lists])
@@ -1,6 +1,7 @@
 """HTTP endpoints for interacting with orders."""
 import logging
 
+from django.db.models import Prefetch
 from oscar.core.loading import get_class, get_model
 from rest_framework import filters, status, viewsets
 from rest_framework.decorators import detail_route
@@ -12,16 +13,37 @@ from ecommerce.extensions.api import serializers
 from ecommerce.extensions.api.filters import OrderFilter
 from ecommerce.extensions.api.permissions import IsStaffOrOwner
 from ecommerce.extensions.api.throttles import ServiceUserThrottle
+from ecommerce.extensions.checkout.utils import prefetch_order_for_post_checkout
 
 logger = logging.getLogger(__name__)
 
+Line = get_model('order', 'Line')
 Order = get_model('order', 'Order')
+ProductAttributeValue = get_model('catalogue', 'ProductAttributeValue')
 
 
 class OrderViewSet(viewsets.ReadOnlyModelViewSet):
+    # Everything OrderSerializer reads is loaded with the orders, so that the number of queries
+    # does not grow with the number of orders or lines. Vouchers are only loaded for orders that have some.
+    lines_prefetch = Prefetch(
+        'lines',
+        queryset=Line.objects.select_related('product__product_class', 'product__parent__product_class')
+    )
+    product_attribute_value_prefetch = Prefetch(
+        'lines__product__attribute_values',
+        queryset=ProductAttributeValue.objects.select_related('attribute')
+    )
     lookup_field = 'number'
     permission_classes = (IsAuthenticated, IsStaffOrOwner, DjangoModelPermissions,)
-    queryset = Order.objects.all()
+    queryset = Order.objects.select_related('basket', 'billing_address', 'user').prefetch_related(
+        lines_prefetch,
+        product_attribute_value_prefetch,
+        'lines__attributes',
+        'lines__product__stockrecords',
+        'sources__source_type',
+        'discounts',
+        'basket__vouchers__offers__benefit',
+    )
     serializer_class = serializers.OrderSerializer
     throttle_classes = (ServiceUserThrottle,)
     filter_backends = (filters.DjangoFilterBackend,)
@@ -52,7 +74,7 @@ class OrderViewSet(viewsets.ReadOnlyModelViewSet):
 
         logger.info('Attempting fulfillment of order [%s]...', order.number)
         post_checkout = get_class('checkout.signals', 'post_checkout')
-        post_checkout.send(sender=post_checkout, order=order, request=request)
+        post_checkout.send(sender=post_checkout, order=prefetch_order_for_post_checkout(order), request=request)
 
         if order.is_fulfillable:
             logger.warning('Fulfillment of order [%s] failed!', order.number)
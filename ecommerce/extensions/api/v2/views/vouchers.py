@@ -4,6 +4,7 @@ from urlparse import urlparse
 
 import django_filters
 from dateutil import parser
+from django.db.models import Count, Prefetch
 from django.shortcuts import get_object_or_404
 from django.utils.timezone import now
 from opaque_keys.edx.keys import CourseKey
@@ -17,7 +18,7 @@ from slumber.exceptions import SlumberBaseException
 from ecommerce.core.constants import DEFAULT_CATALOG_PAGE_SIZE
 from ecommerce.coupons.utils import fetch_course_catalog, get_catalog_course_runs
 from ecommerce.courses.models import Course
-from ecommerce.courses.utils import get_course_info_from_catalog
+from ecommerce.courses.utils import get_course_info_from_catalog, initialize_product_attributes
 from ecommerce.extensions.api import serializers
 from ecommerce.extensions.api.permissions import IsOffersOrIsAuthenticatedAndStaff
 from ecommerce.extensions.api.v2.views import NonDestroyableModelViewSet
@@ -25,6 +26,7 @@ from ecommerce.extensions.api.v2.views import NonDestroyableModelViewSet
 logger = logging.getLogger(__name__)
 Order = get_model('order', 'Order')
 Product = get_model('catalogue', 'Product')
+ProductAttributeValue = get_model('catalogue', 'ProductAttributeValue')
 StockRecord = get_model('partner', 'StockRecord')
 Voucher = get_model('voucher', 'Voucher')
 
@@ -43,6 +45,10 @@ class VoucherFilter(django_filters.FilterSet):
 
 class VoucherViewSet(NonDestroyableModelViewSet):
     """ View set for vouchers. """
+    product_attribute_value_prefetch = Prefetch(
+        'attribute_values',
+        queryset=ProductAttributeValue.objects.select_related('attribute')
+    )
     serializer_class = serializers.VoucherSerializer
     permission_classes = (IsOffersOrIsAuthenticatedAndStaff,)
     filter_backends = (filters.DjangoFilterBackend,)
@@ -99,6 +105,8 @@ class VoucherViewSet(NonDestroyableModelViewSet):
         from course IDs in course catalog response results. Professional courses
         which have a set enrollment end date and which has passed are omitted.
 
+        Products are loaded with their courses, product classes, attributes and stock records.
+
         Args:
             results(dict): Course catalog response results.
             course_seat_types(str): Comma-separated list of accepted seat types.
@@ -120,13 +128,24 @@ class VoucherViewSet(NonDestroyableModelViewSet):
                 course_id__in=nonexpired_course_ids if seat_type == 'professional' else all_course_ids,
                 attributes__name='certificate_type',
                 attribute_values__value_text=seat_type
+            ).select_related(
+                'course', 'product_class', 'parent__product_class'
+            ).prefetch_related(
+                self.product_attribute_value_prefetch, 'stockrecords'
             ))
+
+        for product in products:
+            initialize_product_attributes(product)
+
         stock_records = StockRecord.objects.filter(product__in=products)
         return products, stock_records
 
     def get_offers_from_query(self, request, voucher, catalog_query):
         """ Helper method for collecting offers from catalog query.
 
+        The products, stock records, courses, credit providers and prior purchases of the whole page
+        are loaded with a constant number of queries.
+
         Args:
             request (WSGIRequest): Request data.
             voucher (Voucher): Oscar Voucher for which the offers are returned.
@@ -151,6 +170,25 @@ class VoucherViewSet(NonDestroyableModelViewSet):
         next_page = response['next']
         products, stock_records = self.retrieve_course_objects(response['results'], course_seat_types)
         contains_verified_course = (course_seat_types == 'verified')
+
+        course_catalog_data_by_key = {}
+        for result in response['results']:
+            course_catalog_data_by_key.setdefault(result['key'], result)
+
+        stock_records_by_product_id = {}
+        for stock_record in stock_records:
+            stock_records_by_product_id.setdefault(stock_record.product_id, stock_record)
+
+        if course_seat_types == 'credit':
+            purchased_product_ids = set(Order.objects.filter(
+                user=request.user, lines__product__in=products
+            ).values_list('lines__product_id', flat=True))
+            credit_seat_counts = dict(Product.objects.filter(
+                parent_id__in=set(product.parent_id for product in products),
+                attributes__name='credit_provider'
+            ).order_by().values_list('parent_id').annotate(count=Count('id')))
+            credit_eligibility = {}
+
         for product in products:
             # Omit unavailable seats from the offer results so that one seat does not cause an
             # error message for every seat in the query result.
@@ -159,36 +197,28 @@ class VoucherViewSet(NonDestroyableModelViewSet):
                 continue
 
             course_id = product.course_id
-            course_catalog_data = next(
-                (result for result in response['results'] if result['key'] == course_id),
-                None
-            )
+            course_catalog_data = course_catalog_data_by_key.get(course_id)
+            stock_record = stock_records_by_product_id.get(product.id)
+
             if course_seat_types == 'credit':
                 # Omit credit seats for which the user is not eligible or which the user already bought.
-                if request.user.is_eligible_for_credit(product.course_id):
-                    if Order.objects.filter(user=request.user, lines__product=product).exists():
-                        continue
-                else:
+                if course_id not in credit_eligibility:
+                    credit_eligibility[course_id] = request.user.is_eligible_for_credit(course_id)
+                if not credit_eligibility[course_id] or product.id in purchased_product_ids:
                     continue
-                credit_seats = Product.objects.filter(parent=product.parent, attributes__name='credit_provider')
 
-                if credit_seats.count() > 1:
+                if credit_seat_counts.get(product.parent_id, 0) > 1:
                     multiple_credit_providers = True
                     credit_provider_price = None
                 else:
                     multiple_credit_providers = False
-                    credit_provider_price = StockRecord.objects.get(product=product).price_excl_tax
+                    credit_provider_price = stock_record.price_excl_tax if stock_record else None
 
-            try:
-                stock_record = stock_records.get(product__id=product.id)
-            except StockRecord.DoesNotExist:
-                stock_record = None
+            if not stock_record:
                 logger.error('Stock Record for product %s not found.', product.id)
 
-            try:
-                course = Course.objects.get(id=course_id)
-            except Course.DoesNotExist:  # pragma: no cover
-                course = None
+            course = product.course
+            if not course:  # pragma: no cover
                 logger.error('Course %s not found.', course_id)
 
             if course_catalog_data and course and stock_record:
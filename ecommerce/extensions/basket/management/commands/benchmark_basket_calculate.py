@@ -0,0 +1,131 @@
+"""
+Management command that compares the cost of calculating a temporary basket in memory, as done by the
+basket calculate endpoint, with the cost of calculating a basket saved in a rolled back transaction.
+"""
+from __future__ import unicode_literals
+
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.sites.models import Site
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from oscar.core.loading import get_class, get_model
+
+from ecommerce.cache_utils.utils import RequestCache
+from ecommerce.extensions.basket.constants import TEMPORARY_BASKET_CACHE_KEY
+
+Applicator = get_class('offer.applicator', 'Applicator')
+Basket = get_model('basket', 'Basket')
+InMemoryBasket = get_model('basket', 'InMemoryBasket')
+Product = get_model('catalogue', 'Product')
+Selector = get_class('partner.strategy', 'Selector')
+User = get_user_model()
+Voucher = get_model('voucher', 'Voucher')
+
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE')
+
+
+class Command(BaseCommand):
+    help = 'Compare the queries and latency of in-memory and saved temporary basket calculation.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--site-domain',
+                            action='store',
+                            dest='site_domain',
+                            required=True,
+                            type=str,
+                            help='Domain of the site whose offers should be applied.')
+        parser.add_argument('--sku',
+                            action='append',
+                            dest='skus',
+                            required=True,
+                            type=str,
+                            help='SKU of a product to add to the basket. Repeat for several products.')
+        parser.add_argument('--code',
+                            action='store',
+                            dest='code',
+                            default=None,
+                            type=str,
+                            help='Voucher code to apply to the basket.')
+        parser.add_argument('--username',
+                            action='store',
+                            dest='username',
+                            default=None,
+                            type=str,
+                            help='Username of the basket owner. Anonymous baskets are calculated if not set.')
+        parser.add_argument('-n', '--iterations',
+                            action='store',
+                            dest='iterations',
+                            default=50,
+                            type=int,
+                            help='Number of times each basket should be calculated.')
+
+    def handle(self, *args, **options):
+        try:
+            site = Site.objects.get(domain=options['site_domain'])
+            user = User.objects.get(username=options['username']) if options['username'] else None
+            voucher = Voucher.objects.get(code=options['code']) if options['code'] else None
+        except (Site.DoesNotExist, User.DoesNotExist, Voucher.DoesNotExist) as e:
+            raise CommandError(e)
+
+        products = list(Product.objects.filter(
+            stockrecords__partner=site.siteconfiguration.partner, stockrecords__partner_sku__in=options['skus']
+        ))
+        if not products:
+            raise CommandError('Products with SKU(s) [{}] do not exist.'.format(', '.join(options['skus'])))
+
+        # Temporary baskets are not tracked, see BasketCalculateView.
+        RequestCache.set(TEMPORARY_BASKET_CACHE_KEY, True, pinned=True)
+
+        for name, calculate in (('saved', self._calculate_saved_basket),
+                                ('in-memory', self._calculate_in_memory_basket)):
+            # The first calculation warms the caches shared by both paths.
+            calculate(site, user, products, voucher)
+
+            queries = writes = 0
+            start = time.time()
+            for __ in range(options['iterations']):
+                with CaptureQueriesContext(connection) as context:
+                    calculate(site, user, products, voucher)
+                queries += len(context.captured_queries)
+                writes += len([
+                    query for query in context.captured_queries
+                    if query['sql'].lstrip().upper().startswith(WRITE_STATEMENTS)
+                ])
+            elapsed = time.time() - start
+
+            self.stdout.write(
+                '{name}: {latency:.2f} ms, {queries:.1f} queries and {writes:.1f} writes per calculation.'.format(
+                    name=name,
+                    latency=elapsed * 1000 / options['iterations'],
+                    queries=float(queries) / options['iterations'],
+                    writes=float(writes) / options['iterations'],
+                )
+            )
+
+    def _apply_offers(self, basket, products, voucher):
+        for product in products:
+            basket.add_product(product, 1)
+        if voucher:
+            if isinstance(basket, InMemoryBasket):
+                basket.add_voucher(voucher)
+            else:
+                basket.vouchers.add(voucher)
+        Applicator().apply(basket, user=basket.owner)
+        return basket.total_incl_tax
+
+    def _calculate_saved_basket(self, site, user, products, voucher):
+        """ Calculates the basket the way the calculate endpoint did before baskets were kept in memory. """
+        with transaction.atomic():
+            basket = Basket(owner=user, site=site)
+            basket.strategy = Selector().strategy(user=user)
+            total = self._apply_offers(basket, products, voucher)
+            transaction.set_rollback(True)
+        return total
+
+    def _calculate_in_memory_basket(self, site, user, products, voucher):
+        basket = InMemoryBasket(owner=user, site=site)
+        basket.strategy = Selector().strategy(user=user)
+        return self._apply_offers(basket, products, voucher)
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('basket', '0010_create_repeat_purchase_switch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InMemoryBasket',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+            },
+            bases=('basket.basket',),
+        ),
+    ]
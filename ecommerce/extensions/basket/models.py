@@ -1,6 +1,7 @@
 from django.db import models
 from django.utils.translation import ugettext_lazy as _
 from oscar.apps.basket.abstract_models import AbstractBasket
+from oscar.apps.offer.results import OfferApplications
 from oscar.core.loading import get_class
 
 from ecommerce.cache_utils.utils import RequestCache
@@ -98,6 +99,95 @@ class Basket(AbstractBasket):
             num_lines=self.num_lines)
 
 
+class InMemoryBasket(Basket):
+    """
+    A basket whose lines and vouchers are only kept in memory.
+
+    Offers can be applied to it like to any other basket, so it is used to price products, e.g. by
+    the basket calculate endpoint, without writing to the database. It cannot be saved.
+    """
+
+    class Meta(object):
+        proxy = True
+
+    def __init__(self, *args, **kwargs):
+        super(InMemoryBasket, self).__init__(*args, **kwargs)
+        self._lines = []
+        self._vouchers = []
+
+    def save(self, *args, **kwargs):  # pylint: disable=unused-argument
+        raise TypeError('In-memory baskets cannot be saved.')
+
+    def all_lines(self):
+        return self._lines
+
+    def reset_offer_applications(self):
+        # AbstractBasket discards its lines, to reload them from the database.
+        self.offer_applications = OfferApplications()
+        for line in self._lines:
+            line.clear_discount()
+
+    @property
+    def num_lines(self):
+        return len(self._lines)
+
+    @property
+    def is_empty(self):
+        return not self._lines
+
+    def add_product(self, product, quantity=1, options=None):
+        """
+        Add the indicated product to the basket, in memory.
+
+        Behaves like AbstractBasket.add_product, except that options are not supported, and
+        no analytics events are fired.
+        """
+        if options:
+            raise ValueError('In-memory baskets do not support product options.')
+
+        stock_info = self.strategy.fetch_for_product(product)
+        if self.currency and stock_info.price.currency != self.currency:
+            raise ValueError(
+                'Basket lines must all have the same currency. Proposed line has currency {}, '
+                'while basket has currency {}'.format(stock_info.price.currency, self.currency)
+            )
+
+        if stock_info.stockrecord is None:
+            raise ValueError(
+                "Basket lines must all have stock records. Strategy hasn't found any stock record "
+                "for product {}".format(product)
+            )
+
+        line_reference = self._create_line_reference(product, stock_info.stockrecord, [])
+        for line in self._lines:
+            if line.line_reference == line_reference:
+                line.quantity = max(0, line.quantity + quantity)
+                return line, False
+
+        line_model = self._meta.get_field('lines').related_model
+        line = line_model(
+            basket=self,
+            line_reference=line_reference,
+            product=product,
+            stockrecord=stock_info.stockrecord,
+            quantity=quantity,
+            price_excl_tax=stock_info.price.excl_tax,
+            price_currency=stock_info.price.currency,
+            price_incl_tax=stock_info.price.incl_tax if stock_info.price.is_tax_known else None,
+        )
+        # Reuse the price and availability fetched above, rather than fetching them again for the line.
+        line._info = stock_info  # pylint: disable=protected-access
+        self._lines.append(line)
+        return line, True
+
+    def add_voucher(self, voucher):
+        if voucher not in self._vouchers:
+            self._vouchers.append(voucher)
+
+    def get_vouchers(self):
+        return list(self._vouchers)
+
+
 class BasketAttributeType(models.Model):
     """
     Used to keep attribute types for BasketAttribute
@@ -7,6 +7,7 @@ from django.core.management import CommandError, call_command
 from oscar.core.loading import get_model
 from oscar.test import factories
 
+from ecommerce.courses.tests.factories import CourseFactory
 from ecommerce.extensions.test.factories import create_order
 from ecommerce.invoice.models import Invoice
 from ecommerce.tests.testcases import TestCase
@@ -134,3 +135,30 @@ class AddSiteToBasketsBasketsCommandTests(TestCase):
         """ Verify an error is raised if no site ID is specified. """
         with self.assertRaisesMessage(CommandError, 'A valid Site ID must be specified!'):
             call_command(self.command, commit=False)
+
+
+class BenchmarkBasketCalculateCommandTests(TestCase):
+    command = 'benchmark_basket_calculate'
+
+    def test_benchmark(self):
+        """ Verify the command reports on both calculation paths, without leaving baskets behind. """
+        seat = CourseFactory().create_or_update_seat('verified', True, 100, self.partner)
+        out = StringIO()
+        call_command(
+            self.command,
+            '--site-domain={}'.format(self.site.domain),
+            '--sku={}'.format(seat.stockrecords.first().partner_sku),
+            '--iterations=2',
+            stdout=out
+        )
+
+        output = out.getvalue()
+        self.assertIn('saved: ', output)
+        self.assertIn('in-memory: ', output)
+        self.assertIn('0.0 writes per calculation', output)
+        self.assertFalse(Basket.objects.exists())
+
+    def test_invalid_sku(self):
+        """ Verify the command fails if no products match the SKUs. """
+        with self.assertRaises(CommandError):
+            call_command(self.command, '--site-domain={}'.format(self.site.domain), '--sku=invalid')
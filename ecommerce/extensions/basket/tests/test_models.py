@@ -12,12 +12,16 @@ from ecommerce.extensions.api.v2.tests.views.mixins import CatalogMixin
 from ecommerce.extensions.basket.constants import TEMPORARY_BASKET_CACHE_KEY
 from ecommerce.extensions.basket.models import Basket
 from ecommerce.extensions.basket.tests.mixins import BasketMixin
-from ecommerce.extensions.test.factories import create_basket
+from ecommerce.extensions.test.factories import create_basket, prepare_voucher
 from ecommerce.tests.factories import SiteConfigurationFactory
 from ecommerce.tests.testcases import TestCase
 
+Applicator = get_class('offer.applicator', 'Applicator')
 Basket = get_model('basket', 'Basket')
+InMemoryBasket = get_model('basket', 'InMemoryBasket')
+Line = get_model('basket', 'Line')
 OrderNumberGenerator = get_class('order.utils', 'OrderNumberGenerator')
+Selector = get_class('partner.strategy', 'Selector')
 
 
 class BasketTests(CatalogMixin, BasketMixin, TestCase):
@@ -199,3 +203,51 @@ class BasketTests(CatalogMixin, BasketMixin, TestCase):
         seat = course.create_or_update_seat('verified', True, 100, self.partner)
         basket.add_product(seat)
         return basket
+
+
+class InMemoryBasketTests(TestCase):
+    def setUp(self):
+        super(InMemoryBasketTests, self).setUp()
+        self.user = self.create_user()
+        self.seat = CourseFactory().create_or_update_seat('verified', True, 100, self.partner)
+        self.basket = InMemoryBasket(owner=self.user, site=self.site)
+        self.basket.strategy = Selector().strategy(user=self.user)
+
+    def test_add_product(self):
+        """ Verify products are added to the basket without writing to the database. """
+        # The only query fetches the product's stock record.
+        with self.assertNumQueries(1):
+            line, created = self.basket.add_product(self.seat)
+        self.assertTrue(created)
+
+        __, created = self.basket.add_product(self.seat)
+        self.assertFalse(created)
+        self.assertEqual(line.quantity, 2)
+        self.assertEqual(self.basket.num_lines, 1)
+        self.assertEqual(self.basket.total_excl_tax, 200)
+        self.assertFalse(Line.objects.exists())
+
+    def test_add_product_with_options(self):
+        """ Verify product options are not supported. """
+        with self.assertRaises(ValueError):
+            self.basket.add_product(self.seat, options=[{'option': None, 'value': 'test'}])
+
+    def test_save(self):
+        """ Verify the basket cannot be saved. """
+        with self.assertRaises(TypeError):
+            self.basket.save()
+
+    def test_apply_offers(self):
+        """ Verify voucher offers are applied to the basket, without writing to the database. """
+        voucher, __ = prepare_voucher(_range=factories.RangeFactory(includes_all_products=True), benefit_value=20)
+        self.basket.add_product(self.seat)
+        self.basket.add_voucher(voucher)
+
+        Applicator().apply(self.basket, user=self.user)
+        self.assertEqual(self.basket.total_excl_tax, 80)
+        self.assertEqual(self.basket.get_vouchers(), [voucher])
+
+        # Offers can be applied again, e.g. after the vouchers changed.
+        Applicator().apply(self.basket, user=self.user)
+        self.assertEqual(self.basket.total_excl_tax, 80)
+        self.assertFalse(Basket.objects.exists())
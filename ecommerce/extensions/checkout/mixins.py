@@ -15,7 +15,9 @@ from ecommerce.extensions.analytics.utils import audit_log, track_segment_event
 from ecommerce.extensions.api import data as data_api
 from ecommerce.extensions.basket.utils import ORGANIZATION_ATTRIBUTE_TYPE
 from ecommerce.extensions.checkout.exceptions import BasketNotFreeError
+from ecommerce.extensions.checkout.utils import prefetch_order_for_post_checkout
 from ecommerce.extensions.customer.utils import Dispatcher
+from ecommerce.extensions.fulfillment.constants import ASYNC_LINE_FULFILLMENT_SWITCH
 from ecommerce.extensions.order.constants import PaymentEventTypeName
 from ecommerce.invoice.models import Invoice
 
@@ -159,7 +161,13 @@ class EdxOrderPlacementMixin(OrderPlacementMixin):
             # See http://celery.readthedocs.org/en/latest/userguide/tasks.html#database-transactions.
             fulfill_order.delay(order.number, site_code=order.site.siteconfiguration.partner.short_code)
         else:
-            post_checkout.send(sender=self, order=order, request=request)
+            # Lines are fulfilled by tasks sent once the order is committed, if asynchronous fulfillment is enabled.
+            post_checkout.send(
+                sender=self,
+                order=prefetch_order_for_post_checkout(order),
+                request=request,
+                fulfill_asynchronously=waffle.switch_is_active(ASYNC_LINE_FULFILLMENT_SWITCH)
+            )
 
         return order
 
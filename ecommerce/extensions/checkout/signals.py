@@ -2,16 +2,18 @@ import logging
 
 import waffle
 from django.dispatch import receiver
-from oscar.core.loading import get_class, get_model
+from oscar.core.loading import get_class
 
 from ecommerce.courses.utils import mode_for_product
 from ecommerce.extensions.analytics.utils import silence_exceptions, track_segment_event
-from ecommerce.extensions.checkout.utils import get_credit_provider_details, get_receipt_page_url
+from ecommerce.extensions.checkout.utils import (
+    get_basket_attribute_value,
+    get_credit_provider_details,
+    get_receipt_page_url
+)
 from ecommerce.notifications.notifications import send_notification
 from ecommerce.programs.utils import get_program
 
-BasketAttribute = get_model('basket', 'BasketAttribute')
-BasketAttributeType = get_model('basket', 'BasketAttributeType')
 BUNDLE = 'bundle_identifier'
 logger = logging.getLogger(__name__)
 post_checkout = get_class('checkout.signals', 'post_checkout')
@@ -31,6 +33,7 @@ def track_completed_order(sender, order=None, **kwargs):  # pylint: disable=unus
     if order.total_excl_tax <= 0:
         return
 
+    lines = order.lines.all()
     properties = {
         'orderId': order.number,
         'total': str(order.total_excl_tax),
@@ -48,11 +51,11 @@ def track_completed_order(sender, order=None, **kwargs):  # pylint: disable=unus
                 'price': str(line.line_price_excl_tax),
                 'quantity': line.quantity,
                 'category': line.product.get_product_class().name,
-            } for line in order.lines.all()
+            } for line in lines
         ],
     }
 
-    for line in order.lines.all():
+    for line in lines:
         if line.product.is_enrollment_code_product:
             # Send analytics events to track bulk enrollment code purchases.
             track_segment_event(order.site, order.user, 'Bulk Enrollment Codes Order Completed', properties)
@@ -61,33 +64,32 @@ def track_completed_order(sender, order=None, **kwargs):  # pylint: disable=unus
         if line.product.is_coupon_product:
             return
 
-    voucher = order.basket_discounts.filter(voucher_id__isnull=False).first()
-    coupon = voucher.voucher_code if voucher else None
-
-    try:
-        bundle_id = BasketAttribute.objects.get(basket=order.basket, attribute_type__name=BUNDLE).value_text
-    except BasketAttribute.DoesNotExist:
-        bundle_id = None
-
-    properties['coupon'] = coupon
-
-    try:
-        bundle_id = BasketAttribute.objects.get(basket=order.basket, attribute_type__name=BUNDLE).value_text
-        program = get_program(bundle_id, order.basket.site.siteconfiguration)
-        if len(order.lines.all()) < len(program.get('courses')):
+    voucher = next(
+        (
+            discount for discount in order.discounts.all()
+            if discount.category == discount.BASKET and discount.voucher_id
+        ),
+        None
+    )
+    properties['coupon'] = voucher.voucher_code if voucher else None
+
+    bundle_id = get_basket_attribute_value(order.basket, BUNDLE)
+    if bundle_id is not None:
+        program = get_program(bundle_id, order.site.siteconfiguration)
+        if len(lines) < len(program.get('courses')):
             variant = 'partial'
         else:
             variant = 'full'
         bundle_product = {
             'id': bundle_id,
             'price': '0',
-            'quantity': str(len(order.lines.all())),
+            'quantity': str(len(lines)),
             'category': 'bundle',
             'variant': variant,
             'name': program.get('title')
         }
         properties['products'].append(bundle_product)
-    except BasketAttribute.DoesNotExist:
+    else:
         logger.info('There is no program or bundle associated with order number %s', order.number)
 
     track_segment_event(order.site, order.user, 'Order Completed', properties)
@@ -99,8 +101,9 @@ def send_course_purchase_email(sender, order=None, **kwargs):  # pylint: disable
     """Send course purchase notification email when a course is purchased."""
     if waffle.switch_is_active('ENABLE_NOTIFICATIONS'):
         # We do not currently support email sending for orders with more than one item.
-        if len(order.lines.all()) == ORDER_LINE_COUNT:
-            product = order.lines.first().product
+        lines = order.lines.all()
+        if len(lines) == ORDER_LINE_COUNT:
+            product = lines[0].product
             credit_provider_id = getattr(product.attr, 'credit_provider', None)
             if not credit_provider_id:
                 logger.error(
@@ -8,6 +8,7 @@ from oscar.core.loading import get_class, get_model
 from oscar.test.factories import BasketFactory, ProductFactory, UserFactory
 from testfixtures import LogCapture
 from waffle.models import Sample
+from waffle.testutils import override_switch
 
 from ecommerce.core.constants import ENROLLMENT_CODE_PRODUCT_CLASS_NAME, ENROLLMENT_CODE_SWITCH
 from ecommerce.core.models import BusinessClient, SegmentClient
@@ -17,6 +18,7 @@ from ecommerce.extensions.analytics.utils import parse_tracking_context, transla
 from ecommerce.extensions.basket.utils import basket_add_organization_attribute
 from ecommerce.extensions.checkout.exceptions import BasketNotFreeError
 from ecommerce.extensions.checkout.mixins import EdxOrderPlacementMixin
+from ecommerce.extensions.fulfillment.constants import ASYNC_LINE_FULFILLMENT_SWITCH
 from ecommerce.extensions.fulfillment.status import ORDER
 from ecommerce.extensions.payment.tests.mixins import PaymentEventsMixin
 from ecommerce.extensions.payment.tests.processors import DummyProcessor
@@ -267,6 +269,16 @@ class EdxOrderPlacementMixinTests(BusinessIntelligenceMixin, PaymentEventsMixin,
             self.assertTrue(mock_delay.called)
             mock_delay.assert_called_once_with(self.order.number, site_code=self.partner.short_code)
 
+    @override_switch(ASYNC_LINE_FULFILLMENT_SWITCH, active=True)
+    def test_handle_successful_order_async_line_fulfillment(self, __):
+        """
+        Verify that a Waffle Switch can be used to fulfill the lines of orders asynchronously.
+        """
+        with mock.patch('ecommerce.extensions.fulfillment.signals.enqueue_order_fulfillment') as mock_enqueue:
+            EdxOrderPlacementMixin().handle_successful_order(self.order)
+            self.assertEqual(mock_enqueue.call_count, 1)
+            self.assertEqual(mock_enqueue.call_args[0][0], self.order)
+
     def test_place_free_order(self, __):
         """ Verify an order is placed and the basket is submitted. """
         basket = create_basket(empty=True)
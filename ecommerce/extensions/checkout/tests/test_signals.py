@@ -3,6 +3,8 @@ import json
 import httpretty
 import mock
 from django.core import mail
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from oscar.core.loading import get_class, get_model
 from oscar.test import factories
 from testfixtures import LogCapture
@@ -13,9 +15,10 @@ from ecommerce.coupons.tests.mixins import CouponMixin
 from ecommerce.courses.tests.factories import CourseFactory
 from ecommerce.courses.utils import mode_for_product
 from ecommerce.extensions.checkout.signals import send_course_purchase_email, track_completed_order
-from ecommerce.extensions.checkout.utils import get_receipt_page_url
+from ecommerce.extensions.checkout.utils import get_receipt_page_url, prefetch_order_for_post_checkout
 from ecommerce.extensions.test.factories import create_order, prepare_voucher
 from ecommerce.programs.tests.mixins import ProgramTestMixin
+from ecommerce.sailthru.signals import process_checkout_complete
 from ecommerce.tests.factories import ProductFactory
 from ecommerce.tests.testcases import TestCase
 
@@ -23,6 +26,7 @@ Applicator = get_class('offer.applicator', 'Applicator')
 BasketAttribute = get_model('basket', 'BasketAttribute')
 BasketAttributeType = get_model('basket', 'BasketAttributeType')
 Benefit = get_model('offer', 'Benefit')
+Order = get_model('order', 'Order')
 Condition = get_model('offer', 'Condition')
 ConditionalOffer = get_model('offer', 'ConditionalOffer')
 Product = get_model('catalogue', 'Product')
@@ -299,3 +303,42 @@ class SignalTests(ProgramTestMixin, CouponMixin, TestCase):
             order = factories.create_order(basket=basket, user=self.user)
             track_completed_order(None, order)
             assert mock_track.called
+
+    def count_post_checkout_queries(self, order, prefetch):
+        """ Returns the number of queries made by the tracking and Sailthru receivers of post_checkout. """
+        with mock.patch('ecommerce.extensions.checkout.signals.track_segment_event') as mock_track:
+            with CaptureQueriesContext(connection) as context:
+                if prefetch:
+                    order = prefetch_order_for_post_checkout(order)
+                track_completed_order(None, order)
+                process_checkout_complete(None, order=order)
+                send_course_purchase_email(None, order=order)
+
+        mock_track.assert_called_once_with(order.site, order.user, 'Order Completed', mock.ANY)
+        return len(context.captured_queries)
+
+    def test_post_checkout_queries(self):
+        """ Receivers of post_checkout should not query the lines of a prefetched order one by one. """
+        toggle_switch('sailthru_enable', True)
+        self.site_configuration.enable_sailthru = True
+        self.site_configuration.save()
+
+        basket = factories.BasketFactory(owner=self.user, site=self.site)
+        for __ in range(10):
+            course = CourseFactory()
+            basket.add_product(course.create_or_update_seat('verified', True, 50, self.partner), 1)
+        BasketAttribute.objects.create(
+            basket=basket, attribute_type=BasketAttributeType.objects.get(name=BUNDLE), value_text='test_bundle'
+        )
+        order = create_order(basket=basket, user=self.user)
+
+        with mock.patch('ecommerce.extensions.checkout.signals.get_program',
+                        mock.Mock(return_value=self.mock_get_program_data(True))):
+            queries = self.count_post_checkout_queries(Order.objects.get(id=order.id), prefetch=False)
+            prefetched_queries = self.count_post_checkout_queries(Order.objects.get(id=order.id), prefetch=True)
+
+        # Without prefetching, the products, courses and attributes of each line are queried, 65 queries in all.
+        # Prefetching takes 7 queries, whatever the number of lines, and the receivers query the site,
+        # its configuration and the user, which are already loaded when an order is placed.
+        self.assertGreater(queries, 6 * 10)
+        self.assertEqual(prefetched_queries, 10)
@@ -3,12 +3,18 @@ import urllib
 
 from babel.numbers import format_currency as default_format_currency
 from django.conf import settings
+from django.db.models import Prefetch, prefetch_related_objects
 from django.urls import reverse
 from django.utils.translation import get_language, to_locale
 from edx_rest_api_client.client import EdxRestApiClient
+from oscar.core.loading import get_model
 from requests.exceptions import ConnectionError, Timeout
 from slumber.exceptions import SlumberHttpBaseException
 
+from ecommerce.core.http_pool import create_pooled_session
+from ecommerce.courses.utils import initialize_product_attributes
+
+Line = get_model('order', 'Line')
 logger = logging.getLogger(__name__)
 
 
@@ -25,7 +31,8 @@ def get_credit_provider_details(access_token, credit_provider_id, site_configura
     try:
         return EdxRestApiClient(
             site_configuration.build_lms_url('api/credit/v1/'),
-            oauth_access_token=access_token
+            oauth_access_token=access_token,
+            session=create_pooled_session()
         ).providers(credit_provider_id).get()
     except (ConnectionError, SlumberHttpBaseException, Timeout):
         logger.exception('Failed to retrieve credit provider details for provider [%s].', credit_provider_id)
@@ -77,3 +84,55 @@ def add_currency(amount):
         str: Formatted price with currency.
     """
     return format_currency(settings.OSCAR_DEFAULT_CURRENCY, amount, u'#,##0.00')
+
+
+def prefetch_order_for_post_checkout(order):
+    """ Loads the related objects used by the receivers of the post_checkout signal, in a constant number of queries.
+
+    The lines of the order are loaded with their products, product classes, courses and product attributes,
+    along with the attributes and discounts of the basket. Receivers access them as usual, e.g. with
+    order.lines.all() and product.attr, without querying the database again.
+
+    Args:
+        order (Order): Order whose related objects should be loaded.
+
+    Returns:
+        Order: The same order.
+    """
+    lines = Line.objects.select_related(
+        'product__course', 'product__product_class', 'product__parent__product_class'
+    )
+    prefetch_related_objects(
+        [order],
+        Prefetch('lines', queryset=lines),
+        'lines__product__attribute_values__attribute',
+        'basket__basketattribute_set__attribute_type',
+        'discounts',
+    )
+
+    for line in order.lines.all():
+        if line.product:
+            initialize_product_attributes(line.product)
+
+    return order
+
+
+def get_basket_attribute_value(basket, attribute_type_name):
+    """ Returns the text value of the basket's attribute of the given type, or None if the basket has none.
+
+    Attributes prefetched by prefetch_order_for_post_checkout are used, rather than queried.
+
+    Args:
+        basket (Basket): Basket, or None.
+        attribute_type_name (str): Name of the BasketAttributeType.
+
+    Returns:
+        str
+    """
+    if not basket:
+        return None
+
+    for attribute in basket.basketattribute_set.all():
+        if attribute.attribute_type.name == attribute_type_name:
+            return attribute.value_text
+    return None
@@ -9,8 +9,10 @@ import logging
 from importlib import import_module
 
 from django.conf import settings
+from django.db.models import Manager
 from django.utils.timezone import now
 
+from ecommerce.courses.utils import initialize_product_attributes
 from ecommerce.extensions.fulfillment import exceptions
 from ecommerce.extensions.fulfillment.status import LINE, ORDER
 from ecommerce.extensions.refund.status import REFUND_LINE
@@ -42,8 +44,9 @@ def fulfill_order(order, lines):
         logger.error(error_msg)
         raise exceptions.IncorrectOrderStatusError(error_msg)
 
-    # Construct a dict of lines by their product type.
-    line_items = list(lines.all())
+    # Construct a dict of lines by their product type. Lines loaded already, e.g. prefetched with the order,
+    # are fulfilled in place, so that their status is up to date once the order is fulfilled.
+    line_items = list(lines.all() if isinstance(lines, Manager) else lines)
 
     try:
         # Iterate over the Fulfillment Modules defined in our configuration and determine if they support
@@ -118,29 +121,47 @@ def revoke_fulfillment_for_refund(refund):
     """
     Revokes fulfillment for all lines in a refund.
 
+    The lines are grouped by the fulfillment modules supporting them, and each module revokes its lines
+    together. Lines which were already revoked, e.g. by a previous attempt, are not revoked again.
+
     Returns
         Boolean: True, if revocation of all lines succeeded; otherwise, False.
     """
-    succeeded = True
+    refund_lines = [
+        refund_line for refund_line in refund.lines.select_related(
+            'order_line__order__site', 'order_line__order__user',
+            'order_line__product__product_class', 'order_line__product__parent__product_class'
+        ).prefetch_related(
+            'order_line__product__attribute_values__attribute'
+        ) if refund_line.status != REFUND_LINE.COMPLETE
+    ]
+    RefundLine = refund.lines.model
 
     # Refunds corresponding to a total credit of $0 require no revocation. This also
     # prevents deadlocking with the LMS which occurs when Otto attempts to revoke an
     # automatically-approved refund.
     if refund.total_credit_excl_tax == 0:
-        for refund_line in refund.lines.all():
-            refund_line.set_status(REFUND_LINE.COMPLETE)
-    else:
-        # TODO (CCB): As our list of product types and fulfillment modules grows, this may become slow,
-        # and should be updated. Runtime is O(n^2).
-        for refund_line in refund.lines.all():
-            order_line = refund_line.order_line
-            modules = get_fulfillment_modules_for_line(order_line)
-
-            for module in modules:
-                if module().revoke_line(order_line):
-                    refund_line.set_status(REFUND_LINE.COMPLETE)
-                else:
-                    succeeded = False
-                    refund_line.set_status(REFUND_LINE.REVOCATION_ERROR)
-
-    return succeeded
+        RefundLine.set_status_in_bulk(refund_lines, REFUND_LINE.COMPLETE)
+        return True
+
+    for refund_line in refund_lines:
+        initialize_product_attributes(refund_line.order_line.product)
+
+    revoked = {}
+    for module_class in get_fulfillment_modules():
+        module = module_class()
+        supported_lines = [
+            refund_line for refund_line in refund_lines if module.supports_line(refund_line.order_line)
+        ]
+        if supported_lines:
+            results = module.revoke_lines(refund.order, [refund_line.order_line for refund_line in supported_lines])
+            for refund_line, result in zip(supported_lines, results):
+                revoked[refund_line.id] = revoked.get(refund_line.id, True) and result
+
+    RefundLine.set_status_in_bulk(
+        [refund_line for refund_line in refund_lines if revoked.get(refund_line.id) is True], REFUND_LINE.COMPLETE
+    )
+    failed_lines = [refund_line for refund_line in refund_lines if revoked.get(refund_line.id) is False]
+    RefundLine.set_status_in_bulk(failed_lines, REFUND_LINE.REVOCATION_ERROR)
+
+    return not failed_lines
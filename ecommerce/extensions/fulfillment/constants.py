@@ -0,0 +1,2 @@
+# Waffle switch used to fulfill orders asynchronously, with a Celery task per order line.
+ASYNC_LINE_FULFILLMENT_SWITCH = 'async_line_fulfillment'
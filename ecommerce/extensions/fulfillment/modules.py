@@ -7,20 +7,21 @@ import abc
 import datetime
 import json
 import logging
+from multiprocessing.pool import ThreadPool
 
-import requests
 from django.conf import settings
 from django.urls import reverse
-from edx_rest_api_client.client import EdxRestApiClient
 from oscar.core.loading import get_model
-from requests.exceptions import ConnectionError, Timeout  # pylint: disable=ungrouped-imports
+from requests.exceptions import ConnectionError, Timeout
 from rest_framework import status
+from slumber.exceptions import HttpNotFoundError
 
 from ecommerce.core.constants import (
     DONATIONS_FROM_CHECKOUT_TESTS_PRODUCT_TYPE_NAME,
     ENROLLMENT_CODE_PRODUCT_CLASS_NAME
 )
-from ecommerce.core.url_utils import get_lms_enrollment_api_url, get_lms_entitlement_api_url
+from ecommerce.core.http_pool import create_pooled_session
+from ecommerce.core.url_utils import get_lms_enrollment_api_url
 from ecommerce.courses.models import Course
 from ecommerce.courses.utils import mode_for_product
 from ecommerce.enterprise.utils import get_or_create_enterprise_customer_user
@@ -31,6 +32,7 @@ from ecommerce.extensions.fulfillment.status import LINE
 from ecommerce.extensions.voucher.models import OrderLineVouchers
 from ecommerce.extensions.voucher.utils import create_vouchers
 from ecommerce.notifications.notifications import send_notification
+from ecommerce.programs.ownership import invalidate_user_ownership
 
 Benefit = get_model('offer', 'Benefit')
 Option = get_model('catalogue', 'Option')
@@ -107,6 +109,20 @@ class BaseFulfillmentModule(object):  # pragma: no cover
         """
         raise NotImplementedError("Revoke method not implemented!")
 
+    def revoke_lines(self, order, lines):  # pylint: disable=unused-argument
+        """ Revokes the specified lines of an order.
+
+        Revokes each line in turn. Modules revoking lines against a remote service may revoke them concurrently.
+
+        Args:
+            order (Order): The Order associated with the lines to be revoked.
+            lines (List of Lines): Order Lines to be revoked.
+
+        Returns:
+            List containing, for each line, True if the product is revoked; otherwise, False.
+        """
+        return [self.revoke_line(line) for line in lines]
+
 
 class DonationsFromCheckoutTestFulfillmentModule(BaseFulfillmentModule):
     """
@@ -166,9 +182,14 @@ class EnrollmentFulfillmentModule(BaseFulfillmentModule):
     Allows the enrollment of a student via purchase of a 'seat'.
     """
 
-    def _post_to_enrollment_api(self, data, user):
-        enrollment_api_url = get_lms_enrollment_api_url()
-        timeout = settings.ENROLLMENT_FULFILLMENT_TIMEOUT
+    def _get_enrollment_api_url(self, order):
+        """ Returns the URL of the Enrollment API of the order's site. """
+        if order.site:
+            return order.site.siteconfiguration.build_lms_url('/api/enrollment/v1/enrollment')
+        return get_lms_enrollment_api_url()
+
+    def _get_enrollment_api_headers(self, user):
+        """ Returns the headers of requests made to the Enrollment API on behalf of the given user. """
         headers = {
             'Content-Type': 'application/json',
             'X-Edx-Api-Key': settings.EDX_API_KEY
@@ -182,7 +203,64 @@ class EnrollmentFulfillmentModule(BaseFulfillmentModule):
         if ip:
             headers['X-Forwarded-For'] = ip
 
-        return requests.post(enrollment_api_url, data=json.dumps(data), headers=headers, timeout=timeout)
+        return headers
+
+    def _post_to_enrollment_api(self, data, url, headers, session=None):
+        """ Posts to the Enrollment API, through the given requests Session or a new pooled session. """
+        timeout = settings.ENROLLMENT_FULFILLMENT_TIMEOUT
+        session = session or create_pooled_session()
+        return session.post(url, data=json.dumps(data), headers=headers, timeout=timeout)
+
+    def _post_enrollments(self, order, enrollments_data):
+        """ Posts the given enrollments of the order's user to the Enrollment API.
+
+        Enrollments are posted concurrently, over the process-wide keep-alive connection pool, by up
+        to SiteConfiguration.enrollment_fulfillment_pool_size threads. The threads only make the
+        requests: the URL and headers are built, and the responses are handled, in the calling thread,
+        which also has the current request, if any.
+
+        Args:
+            order (Order): The Order being fulfilled.
+            enrollments_data (List of dict): POST data for the Enrollment API, one per enrollment.
+
+        Returns:
+            List containing, for each enrollment, the response of the Enrollment API or the
+            ConnectionError or Timeout raised while posting it. Other errors are raised.
+        """
+        pool_size = order.site.siteconfiguration.enrollment_fulfillment_pool_size if order.site else 1
+        pool_size = max(min(pool_size, len(enrollments_data)), 1)
+
+        url = self._get_enrollment_api_url(order)
+        headers = self._get_enrollment_api_headers(order.user)
+        session = create_pooled_session()
+
+        def post(data):
+            try:
+                return self._post_to_enrollment_api(data, url, headers, session=session)
+            except (ConnectionError, Timeout) as exc:
+                return exc
+
+        if pool_size == 1:
+            return [post(data) for data in enrollments_data]
+
+        pool = ThreadPool(pool_size)
+        try:
+            return pool.map(post, enrollments_data)
+        finally:
+            pool.close()
+            pool.join()
+
+    def _set_request_error_status(self, order, line, error):
+        if isinstance(error, ConnectionError):
+            logger.error(
+                "Unable to fulfill line [%d] of order [%s] due to a network problem", line.id, order.number
+            )
+            line.set_status(LINE.FULFILLMENT_NETWORK_ERROR)
+        else:
+            logger.error(
+                "Unable to fulfill line [%d] of order [%s] due to a request time out", line.id, order.number
+            )
+            line.set_status(LINE.FULFILLMENT_TIMEOUT_ERROR)
 
     def _add_enterprise_data_to_enrollment_api_post(self, data, order):
         """ Augment enrollment api POST data with enterprise specific data.
@@ -265,6 +343,7 @@ class EnrollmentFulfillmentModule(BaseFulfillmentModule):
 
             return order, lines
 
+        enrollments = []
         for line in lines:
             try:
                 mode = mode_for_product(line.product)
@@ -304,67 +383,101 @@ class EnrollmentFulfillmentModule(BaseFulfillmentModule):
                 )
             try:
                 self._add_enterprise_data_to_enrollment_api_post(data, order)
+            except (ConnectionError, Timeout) as exc:
+                self._set_request_error_status(order, line, exc)
+                continue
 
-                # Post to the Enrollment API. The LMS will take care of posting a new EnterpriseCourseEnrollment to
-                # the Enterprise service if the user+course has a corresponding EnterpriseCustomerUser.
-                response = self._post_to_enrollment_api(data, user=order.user)
+            enrollments.append((line, mode, course_key, provider, data))
 
-                if response.status_code == status.HTTP_200_OK:
-                    line.set_status(LINE.COMPLETE)
+        # Post to the Enrollment API. The LMS will take care of posting a new EnterpriseCourseEnrollment to
+        # the Enterprise service if the user+course has a corresponding EnterpriseCustomerUser.
+        responses = self._post_enrollments(order, [data for __, __, __, __, data in enrollments])
 
-                    audit_log(
-                        'line_fulfilled',
-                        order_line_id=line.id,
-                        order_number=order.number,
-                        product_class=line.product.get_product_class().name,
-                        course_id=course_key,
-                        mode=mode,
-                        user_id=order.user.id,
-                        credit_provider=provider,
-                    )
-                else:
-                    try:
-                        data = response.json()
-                        reason = data.get('message')
-                    except Exception:  # pylint: disable=broad-except
-                        reason = '(No detail provided.)'
-
-                    logger.error(
-                        "Fulfillment of line [%d] on order [%s] failed with status code [%d]: %s",
-                        line.id, order.number, response.status_code, reason
-                    )
-                    line.set_status(LINE.FULFILLMENT_SERVER_ERROR)
-            except ConnectionError:
-                logger.error(
-                    "Unable to fulfill line [%d] of order [%s] due to a network problem", line.id, order.number
+        for (line, mode, course_key, provider, __), response in zip(enrollments, responses):
+            if isinstance(response, (ConnectionError, Timeout)):
+                self._set_request_error_status(order, line, response)
+            elif response.status_code == status.HTTP_200_OK:
+                line.set_status(LINE.COMPLETE)
+                invalidate_user_ownership(order.site, order.user)
+
+                audit_log(
+                    'line_fulfilled',
+                    order_line_id=line.id,
+                    order_number=order.number,
+                    product_class=line.product.get_product_class().name,
+                    course_id=course_key,
+                    mode=mode,
+                    user_id=order.user.id,
+                    credit_provider=provider,
                 )
-                line.set_status(LINE.FULFILLMENT_NETWORK_ERROR)
-            except Timeout:
+            else:
+                try:
+                    data = response.json()
+                    reason = data.get('message')
+                except Exception:  # pylint: disable=broad-except
+                    reason = '(No detail provided.)'
+
                 logger.error(
-                    "Unable to fulfill line [%d] of order [%s] due to a request time out", line.id, order.number
+                    "Fulfillment of line [%d] on order [%s] failed with status code [%d]: %s",
+                    line.id, order.number, response.status_code, reason
                 )
-                line.set_status(LINE.FULFILLMENT_TIMEOUT_ERROR)
+                line.set_status(LINE.FULFILLMENT_SERVER_ERROR)
         logger.info("Finished fulfilling 'Seat' product types for order [%s]", order.number)
         return order, lines
 
     def revoke_line(self, line):
+        return self.revoke_lines(line.order, [line])[0]
+
+    def revoke_lines(self, order, lines):
+        """ Revokes the specified lines of an order, by un-enrolling the order's user from their courses.
+
+        The un-enrollments are posted to the Enrollment API concurrently, like the enrollments of an order.
+
+        Args:
+            order (Order): The Order associated with the lines to be revoked.
+            lines (List of Lines): Order Lines to be revoked.
+
+        Returns:
+            List containing, for each line, True if the product is revoked; otherwise, False.
+        """
+        revocations = []
+        for line in lines:
+            try:
+                logger.info('Attempting to revoke fulfillment of Line [%d]...', line.id)
+
+                mode = mode_for_product(line.product)
+                course_key = line.product.attr.course_key
+                data = {
+                    'user': order.user.username,
+                    'is_active': False,
+                    'mode': mode,
+                    'course_details': {
+                        'course_id': course_key,
+                    },
+                }
+                revocations.append((line, course_key, data))
+            except Exception:  # pylint: disable=broad-except
+                logger.exception('Failed to revoke fulfillment of Line [%d].', line.id)
+
         try:
-            logger.info('Attempting to revoke fulfillment of Line [%d]...', line.id)
+            responses = self._post_enrollments(order, [data for __, __, data in revocations])
+        except Exception as exc:  # pylint: disable=broad-except
+            responses = [exc] * len(revocations)
 
-            mode = mode_for_product(line.product)
-            course_key = line.product.attr.course_key
-            data = {
-                'user': line.order.user.username,
-                'is_active': False,
-                'mode': mode,
-                'course_details': {
-                    'course_id': course_key,
-                },
-            }
+        revoked_line_ids = set(
+            line.id for (line, course_key, __), response in zip(revocations, responses)
+            if self._handle_revocation_response(line, course_key, response)
+        )
+        return [line.id in revoked_line_ids for line in lines]
 
-            response = self._post_to_enrollment_api(data, user=line.order.user)
+    def _handle_revocation_response(self, line, course_key, response):
+        """ Returns True if the response of the Enrollment API, or the error raised posting to it, revoked the line. """
+        try:
+            if isinstance(response, Exception):
+                raise response
 
             if response.status_code == status.HTTP_200_OK:
+                invalidate_user_ownership(line.order.site, line.order.user)
                 audit_log(
                     'line_revoked',
                     order_line_id=line.id,
@@ -493,6 +606,11 @@ class EnrollmentCodeFulfillmentModule(BaseFulfillmentModule):
         logger.info(msg)
 
         for line in lines:
+            if OrderLineVouchers.objects.filter(line=line).exists():
+                # The vouchers of the line were created by a previous attempt to fulfill it.
+                line.set_status(LINE.COMPLETE)
+                continue
+
             name = 'Enrollment Code Range for {}'.format(line.product.attr.course_key)
             seat = Product.objects.filter(
                 attributes__name='course_key',
@@ -525,8 +643,7 @@ class EnrollmentCodeFulfillmentModule(BaseFulfillmentModule):
             )
 
             line_vouchers = OrderLineVouchers.objects.create(line=line)
-            for voucher in vouchers:
-                line_vouchers.vouchers.add(voucher)
+            line_vouchers.vouchers.add(*vouchers)
 
             line.set_status(LINE.COMPLETE)
 
@@ -626,16 +743,16 @@ class CourseEntitlementFulfillmentModule(BaseFulfillmentModule):
 
             try:
                 entitlement_option = Option.objects.get(code='course_entitlement')
-
-                entitlement_api_client = EdxRestApiClient(
-                    get_lms_entitlement_api_url(),
-                    jwt=order.site.siteconfiguration.access_token
-                )
+                if line.attributes.filter(option=entitlement_option).exists():
+                    # The entitlement was granted by a previous attempt to fulfill the line.
+                    line.set_status(LINE.COMPLETE)
+                    continue
 
                 # POST to the Entitlement API.
-                response = entitlement_api_client.entitlements.post(data)
+                response = order.site.siteconfiguration.entitlement_api_client.entitlements.post(data)
                 line.attributes.create(option=entitlement_option, value=response['uuid'])
                 line.set_status(LINE.COMPLETE)
+                invalidate_user_ownership(order.site, order.user)
 
                 audit_log(
                     'line_fulfilled',
@@ -668,13 +785,14 @@ class CourseEntitlementFulfillmentModule(BaseFulfillmentModule):
             entitlement_option = Option.objects.get(code='course_entitlement')
             course_entitlement_uuid = line.attributes.get(option=entitlement_option).value
 
-            entitlement_api_client = EdxRestApiClient(
-                get_lms_entitlement_api_url(),
-                jwt=line.order.site.siteconfiguration.access_token
-            )
+            entitlement_api_client = line.order.site.siteconfiguration.entitlement_api_client
 
-            # DELETE to the Entitlement API.
-            entitlement_api_client.entitlements(course_entitlement_uuid).delete()
+            # DELETE to the Entitlement API. An entitlement which no longer exists was revoked by a previous attempt.
+            try:
+                entitlement_api_client.entitlements(course_entitlement_uuid).delete()
+            except HttpNotFoundError:
+                logger.info('Entitlement [%s] of Line [%d] was already revoked.', course_entitlement_uuid, line.id)
+            invalidate_user_ownership(line.order.site, line.order.user)
 
             audit_log(
                 'line_revoked',
@@ -1,6 +1,8 @@
 from django.dispatch import receiver
 from oscar.core.loading import get_class, get_model
 
+from ecommerce.extensions.fulfillment.tasks import enqueue_order_fulfillment
+
 ShippingEventType = get_model('order', 'ShippingEventType')
 EventHandler = get_class('order.processing', 'EventHandler')
 post_checkout = get_class('checkout.signals', 'post_checkout')
@@ -8,9 +10,12 @@ SHIPPING_EVENT_NAME = 'Shipped'
 
 
 @receiver(post_checkout, dispatch_uid='fulfillment.post_checkout_callback')
-def post_checkout_callback(sender, order=None, **kwargs):  # pylint: disable=unused-argument
+def post_checkout_callback(sender, order=None, fulfill_asynchronously=False, **kwargs):  # pylint: disable=unused-argument
     order_lines = order.lines.all()
     line_quantities = [line.quantity for line in order_lines]
 
     shipping_event, __ = ShippingEventType.objects.get_or_create(name=SHIPPING_EVENT_NAME)
-    EventHandler().handle_shipping_event(order, shipping_event, order_lines, line_quantities)
+    if fulfill_asynchronously:
+        enqueue_order_fulfillment(order, order_lines, shipping_event)
+    else:
+        EventHandler().handle_shipping_event(order, shipping_event, order_lines, line_quantities)
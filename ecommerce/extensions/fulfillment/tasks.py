@@ -0,0 +1,149 @@
+"""
+Celery tasks fulfilling orders outside of the checkout request.
+
+When the async_line_fulfillment switch is active, checkout enqueues a fulfill_order_line task
+for each line of a new order, once the order is committed, rather than fulfilling the order
+before responding. Each task fulfills its line with the line's fulfillment module, retrying
+network and server errors with exponential backoff, then updates the status of the order.
+
+Every task is identified by an idempotency key derived from its line. Tasks for a line that is
+already being fulfilled by another task, or that is already complete, do nothing.
+"""
+import logging
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from oscar.core.loading import get_class, get_model
+
+from ecommerce.celery_app import app
+from ecommerce.extensions.fulfillment.api import get_fulfillment_modules_for_line
+from ecommerce.extensions.fulfillment.status import LINE, ORDER
+
+EventHandler = get_class('order.processing', 'EventHandler')
+Line = get_model('order', 'Line')
+ShippingEventType = get_model('order', 'ShippingEventType')
+logger = logging.getLogger(__name__)
+
+# Line statuses left by errors which may not recur, after which fulfillment is retried.
+RETRYABLE_LINE_STATUSES = (
+    LINE.FULFILLMENT_NETWORK_ERROR,
+    LINE.FULFILLMENT_SERVER_ERROR,
+    LINE.FULFILLMENT_TIMEOUT_ERROR,
+)
+
+# Seconds after which the lock of a task that did not release it, e.g. because its worker died, expires.
+LINE_LOCK_TIMEOUT = 5 * 60
+
+
+def get_idempotency_key(line):
+    """ Returns the key identifying the fulfillment of the given order line. """
+    return 'fulfill_order_line.{order_number}.{line_id}'.format(order_number=line.order.number, line_id=line.id)
+
+
+def enqueue_order_fulfillment(order, lines, shipping_event_type):
+    """ Enqueues a fulfill_order_line task for each incomplete line of the order.
+
+    Tasks are sent once the current transaction is committed, so that workers can load the order.
+
+    Args:
+        order (Order): The Order to be fulfilled.
+        lines (List of Lines): The Lines of the order to be fulfilled.
+        shipping_event_type (ShippingEventType): Type of the shipping events created for fulfilled lines.
+
+    Returns:
+        The Order.
+    """
+    line_ids = []
+    for line in lines:
+        if line.status == LINE.COMPLETE:
+            continue
+
+        line_ids.append(line.id)
+        transaction.on_commit(
+            partial(fulfill_order_line.delay, line.id, get_idempotency_key(line), shipping_event_type.id)
+        )
+
+    logger.info('Enqueued fulfillment of lines %s of order [%s].', line_ids, order.number)
+    return order
+
+
+@app.task(bind=True, ignore_result=True, max_retries=settings.FULFILLMENT_TASK_MAX_RETRIES)
+def fulfill_order_line(self, line_id, idempotency_key, shipping_event_type_id):
+    """ Fulfills an order line, and updates the status of its order.
+
+    Fulfillment is retried up to FULFILLMENT_TASK_MAX_RETRIES times if it fails with a network or
+    server error, waiting FULFILLMENT_TASK_RETRY_BACKOFF seconds before the first retry and twice
+    as long before each subsequent retry.
+    Unexpected errors are not retried: the line is left as is, and the order marked with a
+    fulfillment error, as fulfill_order does.
+
+    Args:
+        line_id (int): ID of the Line to be fulfilled.
+        idempotency_key (str): Key identifying the fulfillment of the line, see get_idempotency_key.
+        shipping_event_type_id (int): ID of the ShippingEventType of the shipping event created if the line
+            is fulfilled.
+    """
+    lock_key = 'lock.{}'.format(idempotency_key)
+    if not cache.add(lock_key, self.request.id, LINE_LOCK_TIMEOUT):
+        logger.info('Skipping fulfillment task [%s], which is already running.', idempotency_key)
+        return
+
+    try:
+        line = Line.objects.select_related('order', 'product').get(id=line_id)
+        order = line.order
+        if line.status == LINE.COMPLETE:
+            logger.info('Skipping fulfillment task [%s], as line [%d] is already fulfilled.', idempotency_key, line.id)
+            return
+
+        modules = get_fulfillment_modules_for_line(line)
+        if modules:
+            try:
+                modules[0]().fulfill_product(order, [line])
+            except Exception:  # pylint: disable=broad-except
+                logger.exception(
+                    'An unexpected error occurred while fulfilling line [%d] of order [%s].', line.id, order.number
+                )
+                if order.status == ORDER.OPEN:
+                    order.set_status(ORDER.FULFILLMENT_ERROR)
+                return
+        else:
+            logger.error(
+                'Product Type [%s] does not have an associated Fulfillment Module. It cannot be fulfilled.',
+                line.product.get_product_class().name
+            )
+            line.set_status(LINE.FULFILLMENT_CONFIGURATION_ERROR)
+    finally:
+        cache.delete(lock_key)
+
+    if line.status in RETRYABLE_LINE_STATUSES and self.request.retries < self.max_retries:
+        countdown = settings.FULFILLMENT_TASK_RETRY_BACKOFF * 2 ** self.request.retries
+        logger.warning(
+            'Fulfillment of line [%d] of order [%s] failed with status [%s]. Retrying in [%d] seconds.',
+            line.id, order.number, line.status, countdown
+        )
+        # Raises Retry, unless the task is running eagerly, in which case the retry has already run.
+        self.retry(countdown=countdown)
+        return
+
+    _update_order(order, line, ShippingEventType.objects.get(id=shipping_event_type_id))
+
+
+def _update_order(order, line, shipping_event_type):
+    """ Records the shipping of the line if it was fulfilled, then sets the status of the order.
+
+    The order is complete once all of its lines are. It is marked with a fulfillment error once the
+    fulfillment of each of its lines has either succeeded or failed without further retries.
+    """
+    if line.status == LINE.COMPLETE:
+        EventHandler().create_shipping_event(order, shipping_event_type, [line], [line.quantity])
+
+    line_statuses = set(order.lines.values_list('status', flat=True))
+    if line_statuses == {LINE.COMPLETE}:
+        order.set_status(ORDER.COMPLETE)
+    elif LINE.OPEN not in line_statuses and order.status == ORDER.OPEN:
+        logger.error('There was an error while fulfilling order [%s]', order.number)
+        order.set_status(ORDER.FULFILLMENT_ERROR)
+
+    logger.info('Finished fulfilling line [%d] of order [%s] with status [%s].', line.id, order.number, line.status)
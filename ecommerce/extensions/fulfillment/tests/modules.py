@@ -36,6 +36,15 @@ class FakeFulfillmentModule(MockFulfillmentModule):
         return True
 
 
+class NetworkErrorFulfillmentModule(FakeFulfillmentModule):
+    """Fake Fulfillment Module that fails to fulfill lines, as if it could not reach the service fulfilling them."""
+
+    def fulfill_product(self, order, lines):
+        """Fulfill product. Mark all lines with a network error."""
+        for line in lines:
+            line.set_status(LINE.FULFILLMENT_NETWORK_ERROR)
+
+
 class FulfillmentNothingModule(MockFulfillmentModule):
     """Fake Fulfillment Module that refuses to fulfill anything."""
 
@@ -15,7 +15,7 @@ from ecommerce.extensions.fulfillment.status import LINE, ORDER
 from ecommerce.extensions.fulfillment.tests.mixins import FulfillmentTestMixin
 from ecommerce.extensions.fulfillment.tests.modules import FakeFulfillmentModule
 from ecommerce.extensions.refund.status import REFUND, REFUND_LINE
-from ecommerce.extensions.refund.tests.factories import RefundFactory
+from ecommerce.extensions.refund.tests.factories import RefundFactory, RefundLineFactory
 from ecommerce.tests.testcases import TestCase
 
 
@@ -110,6 +110,35 @@ class FulfillmentApiTests(FulfillmentTestMixin, TestCase):
         self.assertEqual(refund.status, REFUND.PAYMENT_REFUNDED)
         self.assertEqual(set([line.status for line in refund.lines.all()]), {REFUND_LINE.COMPLETE})
 
+    @override_settings(FULFILLMENT_MODULES=['ecommerce.extensions.fulfillment.tests.modules.FakeFulfillmentModule'])
+    def test_revoke_fulfillment_for_refund_by_module(self):
+        """
+        Verify each module revokes all the lines of a refund it supports at once, except lines already revoked.
+        """
+        refund = RefundFactory(status=REFUND.PAYMENT_REFUNDED)
+        revoked_line = refund.lines.first()
+        failing_line = RefundLineFactory(refund=refund)
+        complete_line = RefundLineFactory(refund=refund, status=REFUND_LINE.COMPLETE)
+
+        def revoke_lines(order, lines):  # pylint: disable=unused-argument
+            return [line != failing_line.order_line for line in lines]
+
+        with patch.object(FakeFulfillmentModule, 'revoke_lines', side_effect=revoke_lines) as mock_revoke_lines:
+            self.assertFalse(revoke_fulfillment_for_refund(refund))
+
+        self.assertEqual(mock_revoke_lines.call_count, 1)
+        order, lines = mock_revoke_lines.call_args[0]
+        self.assertEqual(order, refund.order)
+        self.assertEqual(set(lines), {revoked_line.order_line, failing_line.order_line})
+        self.assertEqual(
+            {line.id: line.status for line in refund.lines.all()},
+            {
+                revoked_line.id: REFUND_LINE.COMPLETE,
+                failing_line.id: REFUND_LINE.REVOCATION_ERROR,
+                complete_line.id: REFUND_LINE.COMPLETE,
+            }
+        )
+
     @override_settings(FULFILLMENT_MODULES=[])
     def test_suppress_revocation_for_zero_dollar_refund(self):
         """
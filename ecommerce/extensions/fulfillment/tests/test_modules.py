@@ -2,6 +2,7 @@
 import datetime
 import json
 import uuid
+from multiprocessing.pool import ThreadPool
 
 import ddt
 import httpretty
@@ -135,7 +136,9 @@ class EnrollmentFulfillmentModuleTests(ProgramTestMixin, DiscoveryTestMixin, Ful
         httpretty.register_uri(httpretty.POST, get_lms_enrollment_api_url(), status=200, body='{}', content_type=JSON)
         # Attempt to enroll.
         with LogCapture(LOGGER_NAME) as l:
-            EnrollmentFulfillmentModule().fulfill_product(self.order, list(self.order.lines.all()))
+            with mock.patch('ecommerce.extensions.fulfillment.modules.invalidate_user_ownership') as mock_invalidate:
+                EnrollmentFulfillmentModule().fulfill_product(self.order, list(self.order.lines.all()))
+                mock_invalidate.assert_called_with(self.order.site, self.order.user)
 
             line = self.order.lines.get()
             l.check(
@@ -211,13 +214,13 @@ class EnrollmentFulfillmentModuleTests(ProgramTestMixin, DiscoveryTestMixin, Ful
         EnrollmentFulfillmentModule().fulfill_product(self.order, list(self.order.lines.all()))
         self.assertEqual(LINE.FULFILLMENT_CONFIGURATION_ERROR, self.order.lines.all()[0].status)
 
-    @mock.patch('requests.post', mock.Mock(side_effect=ConnectionError))
+    @mock.patch('requests.Session.post', mock.Mock(side_effect=ConnectionError))
     def test_enrollment_module_network_error(self):
         """Test that lines receive a network error status if a fulfillment request experiences a network error."""
         EnrollmentFulfillmentModule().fulfill_product(self.order, list(self.order.lines.all()))
         self.assertEqual(LINE.FULFILLMENT_NETWORK_ERROR, self.order.lines.all()[0].status)
 
-    @mock.patch('requests.post', mock.Mock(side_effect=Timeout))
+    @mock.patch('requests.Session.post', mock.Mock(side_effect=Timeout))
     def test_enrollment_module_request_timeout(self):
         """Test that lines receive a timeout error status if a fulfillment request times out."""
         EnrollmentFulfillmentModule().fulfill_product(self.order, list(self.order.lines.all()))
@@ -233,6 +236,69 @@ class EnrollmentFulfillmentModuleTests(ProgramTestMixin, DiscoveryTestMixin, Ful
         EnrollmentFulfillmentModule().fulfill_product(self.order, list(self.order.lines.all()))
         self.assertEqual(LINE.FULFILLMENT_SERVER_ERROR, self.order.lines.all()[0].status)
 
+    @ddt.data(1, 2, 4)
+    def test_enrollment_module_fulfill_multiple_lines(self, pool_size):
+        """ Every line of an order should be fulfilled, with up to the site's pool size of concurrent requests. """
+        self.site.siteconfiguration.enrollment_fulfillment_pool_size = pool_size
+        failing_course = CourseFactory(id='edX/DemoX/Failing_Course', name='Failing Course', site=self.site)
+        basket = factories.BasketFactory(owner=self.user, site=self.site)
+        for course in (CourseFactory(id='edX/DemoX/Other_Course', site=self.site), self.course, failing_course):
+            basket.add_product(course.create_or_update_seat('verified', True, 100, self.partner), 1)
+        order = create_order(number=2, basket=basket, user=self.user)
+
+        def post_to_enrollment_api(data, url, headers, session):  # pylint: disable=unused-argument
+            if data['course_details']['course_id'] == failing_course.id:
+                return mock.Mock(status_code=500, json=mock.Mock(return_value={'message': 'Oops!'}))
+            return mock.Mock(status_code=200)
+
+        with mock.patch('ecommerce.extensions.fulfillment.modules.ThreadPool', wraps=ThreadPool) as mock_pool:
+            with mock.patch.object(EnrollmentFulfillmentModule, '_post_to_enrollment_api',
+                                   side_effect=post_to_enrollment_api) as mock_post:
+                EnrollmentFulfillmentModule().fulfill_product(order, list(order.lines.all()))
+
+        if pool_size == 1:
+            self.assertFalse(mock_pool.called)
+        else:
+            mock_pool.assert_called_once_with(min(pool_size, 3))
+        # Every request should be made over the same session.
+        self.assertEqual(len(set(call[1]['session'] for call in mock_post.call_args_list)), 1)
+        self.assertEqual(mock_post.call_count, 3)
+        for line in order.lines.all():
+            expected = LINE.FULFILLMENT_SERVER_ERROR if line.product.course == failing_course else LINE.COMPLETE
+            self.assertEqual(line.status, expected)
+
+    @httpretty.activate
+    def test_enrollment_module_fulfill_multiple_lines_concurrently(self):
+        """ Lines fulfilled concurrently should be posted to the Enrollment API of the order's site. """
+        self.site.siteconfiguration.enrollment_fulfillment_pool_size = 4
+        basket = factories.BasketFactory(owner=self.user, site=self.site)
+        for course_id in ('edX/DemoX/Other_Course', 'edX/DemoX/Third_Course'):
+            basket.add_product(
+                CourseFactory(id=course_id, site=self.site).create_or_update_seat('verified', True, 100, self.partner),
+                1
+            )
+        basket.add_product(self.course.create_or_update_seat('verified', True, 100, self.partner), 1)
+        order = create_order(number=2, basket=basket, user=self.user)
+        httpretty.register_uri(
+            httpretty.POST,
+            self.site.siteconfiguration.build_lms_url('/api/enrollment/v1/enrollment'),
+            status=200,
+            body='{}',
+            content_type=JSON
+        )
+
+        EnrollmentFulfillmentModule().fulfill_product(order, list(order.lines.all()))
+
+        self.assertEqual(
+            set(json.loads(request.body)['course_details']['course_id']
+                for request in httpretty.httpretty.latest_requests),
+            set(line.product.course_id for line in order.lines.all())
+        )
+        for request in httpretty.httpretty.latest_requests:
+            self.assertEqual(request.headers.get('X-Edx-Api-Key'), 'foo')
+        for line in order.lines.all():
+            self.assertEqual(line.status, LINE.COMPLETE)
+
     @httpretty.activate
     def test_revoke_product(self):
         """ The method should call the Enrollment API to un-enroll the student, and return True. """
@@ -334,6 +400,66 @@ class EnrollmentFulfillmentModuleTests(ProgramTestMixin, DiscoveryTestMixin, Ful
                 (logger_name, 'ERROR', 'Failed to revoke fulfillment of Line [{}].'.format(line.id))
             )
 
+    @ddt.data(1, 2, 4)
+    def test_revoke_multiple_lines(self, pool_size):
+        """ Every line should be revoked, with up to the site's pool size of concurrent requests. """
+        self.site.siteconfiguration.enrollment_fulfillment_pool_size = pool_size
+        failing_course = CourseFactory(id='edX/DemoX/Failing_Course', name='Failing Course', site=self.site)
+        basket = factories.BasketFactory(owner=self.user, site=self.site)
+        for course in (CourseFactory(id='edX/DemoX/Other_Course', site=self.site), self.course, failing_course):
+            basket.add_product(course.create_or_update_seat('verified', True, 100, self.partner), 1)
+        order = create_order(number=2, basket=basket, user=self.user)
+        lines = list(order.lines.all())
+
+        def post_to_enrollment_api(data, url, headers, session):  # pylint: disable=unused-argument
+            self.assertFalse(data['is_active'])
+            if data['course_details']['course_id'] == failing_course.id:
+                return mock.Mock(status_code=500, json=mock.Mock(return_value={'message': 'Oops!'}))
+            return mock.Mock(status_code=200)
+
+        with mock.patch('ecommerce.extensions.fulfillment.modules.ThreadPool', wraps=ThreadPool) as mock_pool:
+            with mock.patch.object(EnrollmentFulfillmentModule, '_post_to_enrollment_api',
+                                   side_effect=post_to_enrollment_api) as mock_post:
+                revoked = EnrollmentFulfillmentModule().revoke_lines(order, lines)
+
+        if pool_size == 1:
+            self.assertFalse(mock_pool.called)
+        else:
+            mock_pool.assert_called_once_with(min(pool_size, 3))
+        self.assertEqual(mock_post.call_count, 3)
+        self.assertEqual(revoked, [line.product.course != failing_course for line in lines])
+
+    @httpretty.activate
+    def test_revoke_multiple_lines_concurrently(self):
+        """ Lines revoked concurrently should be posted to the Enrollment API of the order's site. """
+        self.site.siteconfiguration.enrollment_fulfillment_pool_size = 4
+        basket = factories.BasketFactory(owner=self.user, site=self.site)
+        for course_id in ('edX/DemoX/Other_Course', 'edX/DemoX/Third_Course'):
+            basket.add_product(
+                CourseFactory(id=course_id, site=self.site).create_or_update_seat('verified', True, 100, self.partner),
+                1
+            )
+        basket.add_product(self.course.create_or_update_seat('verified', True, 100, self.partner), 1)
+        order = create_order(number=2, basket=basket, user=self.user)
+        lines = list(order.lines.all())
+        httpretty.register_uri(
+            httpretty.POST,
+            self.site.siteconfiguration.build_lms_url('/api/enrollment/v1/enrollment'),
+            status=200,
+            body='{}',
+            content_type=JSON
+        )
+
+        revoked = EnrollmentFulfillmentModule().revoke_lines(order, lines)
+
+        self.assertEqual(revoked, [True] * len(lines))
+        posted = [json.loads(request.body) for request in httpretty.httpretty.latest_requests]
+        self.assertEqual(
+            set(data['course_details']['course_id'] for data in posted),
+            set(line.product.course_id for line in lines)
+        )
+        self.assertFalse(any(data['is_active'] for data in posted))
+
     @httpretty.activate
     def test_credit_enrollment_module_fulfill(self):
         """Happy path test to ensure we can properly fulfill enrollments."""
@@ -410,7 +536,10 @@ class EnrollmentFulfillmentModuleTests(ProgramTestMixin, DiscoveryTestMixin, Ful
         # not available for ecommerce tests.
         try:
             # pylint: disable=protected-access
-            EnrollmentFulfillmentModule()._post_to_enrollment_api(data=data, user=self.user)
+            module = EnrollmentFulfillmentModule()
+            module._post_to_enrollment_api(
+                data, module._get_enrollment_api_url(self.order), module._get_enrollment_api_headers(self.user)
+            )
         except ConnectionError as exp:
             # Check that the enrollment request object has the analytics header
             # 'x-edx-ga-client-id' and 'x-forwarded-for'.
@@ -558,6 +687,15 @@ class EnrollmentCodeFulfillmentModuleTests(DiscoveryTestMixin, TestCase):
         self.assertEqual(OrderLineVouchers.objects.first().vouchers.count(), self.QUANTITY)
         self.assertIsNotNone(OrderLineVouchers.objects.first().vouchers.first().benefit.range.catalog)
 
+    def test_fulfill_product_again(self):
+        """Test that fulfilling an Enrollment code product again does not create more vouchers."""
+        lines = self.order.lines.all()
+        EnrollmentCodeFulfillmentModule().fulfill_product(self.order, lines)
+        __, completed_lines = EnrollmentCodeFulfillmentModule().fulfill_product(self.order, lines)
+        self.assertEqual(completed_lines[0].status, LINE.COMPLETE)
+        self.assertEqual(OrderLineVouchers.objects.count(), 1)
+        self.assertEqual(OrderLineVouchers.objects.first().vouchers.count(), self.QUANTITY)
+
     def test_revoke_line(self):
         line = self.order.lines.first()
         with self.assertRaises(NotImplementedError):
@@ -613,7 +751,9 @@ class EntitlementFulfillmentModuleTests(FulfillmentTestMixin, TestCase):
 
         # Attempt to fulfill entitlement.
         with LogCapture(LOGGER_NAME) as l:
-            CourseEntitlementFulfillmentModule().fulfill_product(self.order, list(self.order.lines.all()))
+            with mock.patch('ecommerce.extensions.fulfillment.modules.invalidate_user_ownership') as mock_invalidate:
+                CourseEntitlementFulfillmentModule().fulfill_product(self.order, list(self.order.lines.all()))
+                mock_invalidate.assert_called_with(self.order.site, self.order.user)
 
             line = self.order.lines.get()
             l.check(
@@ -671,6 +811,36 @@ class EntitlementFulfillmentModuleTests(FulfillmentTestMixin, TestCase):
                 )
             )
 
+    @httpretty.activate
+    def test_entitlement_module_fulfill_again(self):
+        """ Fulfilling a line whose entitlement was already granted should not grant another one. """
+        self.mock_access_token_response()
+        httpretty.register_uri(httpretty.POST, get_lms_entitlement_api_url() +
+                               'entitlements/', status=200, body=json.dumps(self.return_data),
+                               content_type='application/json')
+        CourseEntitlementFulfillmentModule().fulfill_product(self.order, list(self.order.lines.all()))
+        request_count = len(httpretty.httpretty.latest_requests)
+
+        __, lines = CourseEntitlementFulfillmentModule().fulfill_product(self.order, list(self.order.lines.all()))
+
+        self.assertEqual(len(httpretty.httpretty.latest_requests), request_count)
+        self.assertEqual(lines[0].status, LINE.COMPLETE)
+
+    @httpretty.activate
+    def test_entitlement_module_revoke_again(self):
+        """ Revoking a Course Entitlement which was already revoked should succeed. """
+        self.mock_access_token_response()
+        httpretty.register_uri(httpretty.POST, get_lms_entitlement_api_url() +
+                               'entitlements/', status=200, body=json.dumps(self.return_data),
+                               content_type='application/json')
+        httpretty.register_uri(httpretty.DELETE, get_lms_entitlement_api_url() +
+                               'entitlements/111-222-333/', status=404, body={}, content_type='application/json')
+
+        line = self.order.lines.first()
+        CourseEntitlementFulfillmentModule().fulfill_product(self.order, list(self.order.lines.all()))
+
+        self.assertTrue(CourseEntitlementFulfillmentModule().revoke_line(line))
+
     @httpretty.activate
     def test_entitlement_module_revoke_error(self):
         """ Test to handle an error when revoking a Course Entitlement. """
@@ -0,0 +1,149 @@
+import httpretty
+import mock
+from django.core.cache import cache
+from django.test import override_settings
+from oscar.core.loading import get_class, get_model
+from oscar.test import factories
+
+from ecommerce.courses.tests.factories import CourseFactory
+from ecommerce.extensions.catalogue.tests.mixins import DiscoveryTestMixin
+from ecommerce.extensions.fulfillment.signals import SHIPPING_EVENT_NAME
+from ecommerce.extensions.fulfillment.status import LINE, ORDER
+from ecommerce.extensions.fulfillment.tasks import fulfill_order_line, get_idempotency_key
+from ecommerce.extensions.fulfillment.tests.mixins import FulfillmentTestMixin
+from ecommerce.extensions.fulfillment.tests.modules import FakeFulfillmentModule
+from ecommerce.extensions.test.factories import create_order
+from ecommerce.tests.testcases import TransactionTestCase
+
+post_checkout = get_class('checkout.signals', 'post_checkout')
+ShippingEventType = get_model('order', 'ShippingEventType')
+
+ENROLLMENT_FULFILLMENT_MODULES = ['ecommerce.extensions.fulfillment.modules.EnrollmentFulfillmentModule']
+FAKE_FULFILLMENT_MODULES = ['ecommerce.extensions.fulfillment.tests.modules.FakeFulfillmentModule']
+NETWORK_ERROR_FULFILLMENT_MODULES = ['ecommerce.extensions.fulfillment.tests.modules.NetworkErrorFulfillmentModule']
+
+
+@override_settings(FULFILLMENT_TASK_RETRY_BACKOFF=30)
+class FulfillOrderLineTests(DiscoveryTestMixin, FulfillmentTestMixin, TransactionTestCase):
+    """ Tests of asynchronous order line fulfillment. Tasks run eagerly, once the order is committed. """
+
+    def setUp(self):
+        super(FulfillOrderLineTests, self).setUp()
+        cache.clear()
+        self.order = self.generate_open_order()
+        self.line = self.order.lines.get()
+        self.shipping_event_type, __ = ShippingEventType.objects.get_or_create(name=SHIPPING_EVENT_NAME)
+
+    def fulfill_line(self):
+        fulfill_order_line.delay(self.line.id, get_idempotency_key(self.line), self.shipping_event_type.id)
+        self.order.refresh_from_db()
+        self.line.refresh_from_db()
+
+    @override_settings(FULFILLMENT_MODULES=FAKE_FULFILLMENT_MODULES)
+    def test_post_checkout_fulfill_asynchronously(self):
+        """ The lines of the order should be fulfilled by tasks, which complete the order. """
+        post_checkout.send(sender=self.__class__, order=self.order, fulfill_asynchronously=True)
+
+        self.order.refresh_from_db()
+        self.assert_order_fulfilled(self.order)
+        self.assertTrue(self.line.has_shipping_event_occurred(self.shipping_event_type))
+
+    @override_settings(FULFILLMENT_MODULES=NETWORK_ERROR_FULFILLMENT_MODULES)
+    def test_retries_exhausted(self):
+        """ Fulfillment should be retried with exponential backoff, then the order marked with an error. """
+        with mock.patch.object(fulfill_order_line, 'max_retries', 3):
+            with mock.patch.object(fulfill_order_line, 'retry', wraps=fulfill_order_line.retry) as mock_retry:
+                self.fulfill_line()
+
+        self.assertEqual([call[1]['countdown'] for call in mock_retry.call_args_list], [30, 60, 120])
+        self.assertEqual(self.line.status, LINE.FULFILLMENT_NETWORK_ERROR)
+        self.assertEqual(self.order.status, ORDER.FULFILLMENT_ERROR)
+        self.assertFalse(self.line.has_shipping_event_occurred(self.shipping_event_type))
+
+    @override_settings(FULFILLMENT_MODULES=FAKE_FULFILLMENT_MODULES)
+    def test_retry_succeeds(self):
+        """ The order should be completed by a successful retry. """
+        def fulfill_product(order, lines):  # pylint: disable=unused-argument
+            status = LINE.FULFILLMENT_SERVER_ERROR if mock_fulfill_product.call_count == 1 else LINE.COMPLETE
+            for line in lines:
+                line.set_status(status)
+
+        with mock.patch.object(FakeFulfillmentModule, 'fulfill_product',
+                               side_effect=fulfill_product) as mock_fulfill_product:
+            self.fulfill_line()
+
+        self.assertEqual(mock_fulfill_product.call_count, 2)
+        self.assert_order_fulfilled(self.order)
+        self.assertTrue(self.line.has_shipping_event_occurred(self.shipping_event_type))
+
+    @override_settings(FULFILLMENT_MODULES=FAKE_FULFILLMENT_MODULES)
+    def test_line_already_fulfilled(self):
+        """ Tasks for lines which are already complete should do nothing. """
+        self.fulfill_line()
+
+        with mock.patch.object(FakeFulfillmentModule, 'fulfill_product') as mock_fulfill_product:
+            self.fulfill_line()
+
+        self.assertFalse(mock_fulfill_product.called)
+        self.assert_order_fulfilled(self.order)
+
+    @override_settings(FULFILLMENT_MODULES=FAKE_FULFILLMENT_MODULES)
+    def test_line_being_fulfilled(self):
+        """ Tasks for lines which are being fulfilled by another task should do nothing. """
+        cache.add('lock.{}'.format(get_idempotency_key(self.line)), 'other-task')
+
+        with mock.patch.object(FakeFulfillmentModule, 'fulfill_product') as mock_fulfill_product:
+            self.fulfill_line()
+
+        self.assertFalse(mock_fulfill_product.called)
+        self.assertEqual(self.line.status, LINE.OPEN)
+        self.assertEqual(self.order.status, ORDER.OPEN)
+
+    @override_settings(FULFILLMENT_MODULES=[])
+    def test_no_fulfillment_module(self):
+        """ Lines which no module can fulfill should be marked with a configuration error, without retries. """
+        with mock.patch.object(fulfill_order_line, 'retry') as mock_retry:
+            self.fulfill_line()
+
+        self.assertFalse(mock_retry.called)
+        self.assertEqual(self.line.status, LINE.FULFILLMENT_CONFIGURATION_ERROR)
+        self.assertEqual(self.order.status, ORDER.FULFILLMENT_ERROR)
+
+    def create_seat_order(self):
+        """ Returns an open order of a seat of a course of the test site. """
+        course = CourseFactory(site=self.site)
+        basket = factories.BasketFactory(owner=self.create_user(), site=self.site)
+        basket.add_product(course.create_or_update_seat('verified', True, 100, self.partner), 1)
+        return create_order(basket=basket, user=basket.owner, status=ORDER.OPEN)
+
+    @httpretty.activate
+    @override_settings(FULFILLMENT_MODULES=ENROLLMENT_FULFILLMENT_MODULES)
+    def test_fulfill_seat_without_request(self):
+        """ Seats should be fulfilled by workers, which have no current request, through the order's site. """
+        httpretty.register_uri(
+            httpretty.POST,
+            self.site.siteconfiguration.build_lms_url('/api/enrollment/v1/enrollment'),
+            status=200,
+            body='{}',
+            content_type='application/json'
+        )
+        self.order = self.create_seat_order()
+        self.line = self.order.lines.get()
+
+        with mock.patch('ecommerce.core.url_utils.get_current_request', return_value=None):
+            self.fulfill_line()
+
+        self.assert_order_fulfilled(self.order)
+        self.assertTrue(self.line.has_shipping_event_occurred(self.shipping_event_type))
+
+    @override_settings(FULFILLMENT_MODULES=FAKE_FULFILLMENT_MODULES)
+    def test_unexpected_error(self):
+        """ Unexpected errors should mark the order with a fulfillment error, without retries. """
+        with mock.patch.object(fulfill_order_line, 'retry') as mock_retry:
+            with mock.patch.object(FakeFulfillmentModule, 'fulfill_product', side_effect=ValueError):
+                self.fulfill_line()
+
+        self.assertFalse(mock_retry.called)
+        self.assertEqual(self.line.status, LINE.OPEN)
+        self.assertEqual(self.order.status, ORDER.FULFILLMENT_ERROR)
+        self.assertIsNone(cache.get('lock.{}'.format(get_idempotency_key(self.line))))
@@ -0,0 +1,95 @@
+from itertools import chain
+
+from oscar.apps.offer.applicator import Applicator as OscarApplicator
+from oscar.core.loading import get_model
+
+from ecommerce.extensions.offer.offer_index import OfferIndex
+from ecommerce.extensions.offer.range_membership import prefetch_range_membership
+
+InMemoryBasket = get_model('basket', 'InMemoryBasket')
+
+
+class Applicator(OscarApplicator):
+    def __init__(self, site_offers=None):
+        """
+        Arguments:
+            site_offers (list): Site offers to choose from, instead of loading them for every basket.
+                Used to apply offers to many baskets with a single query.
+        """
+        self.site_offers = site_offers
+
+    def get_offers(self, basket, user=None, request=None):
+        """
+        Return all offers to apply to the basket.
+
+        Unlike Oscar's implementation, site offers which cannot apply to the basket are left out.
+        """
+        site_offers = self.get_site_offers(basket)
+        basket_offers = self.get_basket_offers(basket, user)
+        user_offers = self.get_user_offers(user)
+        session_offers = self.get_session_offers(request)
+
+        offers = chain(session_offers, basket_offers, user_offers, site_offers)
+        return sorted(offers, key=lambda offer: offer.priority, reverse=True)
+
+    def get_site_offers(self, basket=None):  # pylint: disable=arguments-differ
+        """
+        Return site offers that are available to all users.
+
+        If a basket is given, only the offers which may apply to it according to the offer index are returned.
+        """
+        if self.site_offers is None:
+            offers = super(Applicator, self).get_site_offers()
+            if basket is None:
+                return offers
+            return offers.filter(id__in=OfferIndex.get_current().get_candidate_offer_ids(basket))
+
+        if basket is None:
+            return self.site_offers
+        candidate_offer_ids = OfferIndex.get_current().get_candidate_offer_ids(basket)
+        return [offer for offer in self.site_offers if offer.id in candidate_offer_ids]
+
+    def get_basket_offers(self, basket, user):
+        """
+        Return basket-linked offers such as those associated with a voucher code.
+
+        Unlike Oscar's implementation, the vouchers of in-memory baskets are also considered.
+        """
+        if not user:
+            return []
+
+        if isinstance(basket, InMemoryBasket):
+            vouchers = basket.get_vouchers()
+        elif basket.id:
+            vouchers = basket.vouchers.all()
+        else:
+            return []
+
+        offers = []
+        for voucher in vouchers:
+            available_to_user, __ = voucher.is_available_to_user(user=user)
+            if voucher.is_active() and available_to_user:
+                voucher_offers = voucher.offers.all()
+                for offer in voucher_offers:
+                    offer.set_voucher(voucher)
+                offers.extend(voucher_offers)
+        return offers
+
+    def apply_offers(self, basket, offers):
+        """
+        Apply the given offers to the basket.
+
+        Before the offers are applied, the Discovery Service is asked in bulk which basket
+        products are in the ranges of the offers. The offers' conditions and benefits then
+        check their ranges against the cache, rather than making a request per product.
+        """
+        offers = list(offers)
+        if basket.site:
+            ranges = set()
+            for offer in offers:
+                ranges.update(_range for _range in (offer.condition.range, offer.benefit.range) if _range)
+            products = [line.product for line in basket.all_lines()]
+            if ranges and products:
+                prefetch_range_membership(basket.site, ranges, products)
+
+        super(Applicator, self).apply_offers(basket, offers)
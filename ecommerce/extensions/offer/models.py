@@ -3,7 +3,6 @@ from __future__ import unicode_literals
 import logging
 import re
 
-from django.conf import settings
 from django.db import models
 from django.utils.translation import ugettext_lazy as _
 from oscar.apps.offer.abstract_models import (
@@ -17,8 +16,12 @@ from requests.exceptions import ConnectionError, Timeout
 from slumber.exceptions import SlumberBaseException
 from threadlocals.threadlocals import get_current_request
 
-from ecommerce.cache_utils.utils import TieredCache
-from ecommerce.core.utils import get_cache_key, log_message_and_raise_validation_error
+from ecommerce.core.utils import log_message_and_raise_validation_error
+from ecommerce.extensions.offer.range_membership import (
+    get_catalog_membership,
+    get_query_membership,
+    get_query_product_id
+)
 
 OFFER_PRIORITY_ENTERPRISE = 10
 OFFER_PRIORITY_VOUCHER = 20
@@ -58,68 +61,28 @@ class Benefit(AbstractBenefit):
             line.product.attr.certificate_type.lower() in applicable_range.course_seat_types
         ]
 
-    def _identify_uncached_product_identifiers(self, lines, domain, partner_code, query):
-        """
-        Checks the cache to see if each line is in the catalog range specified by the given query
-        and tracks identifiers for which discovery service data is still needed.
-        """
-        course_run_ids = []
-        course_uuids = []
-        applicable_lines = lines
-        for line in applicable_lines:
-            if line.product.is_seat_product:
-                product_id = line.product.course.id
-            else:  # All lines passed to this method should either have a seat or an entitlement product
-                product_id = line.product.attr.UUID
-            cache_key = get_cache_key(
-                site_domain=domain,
-                partner_code=partner_code,
-                resource='catalog_query.contains',
-                course_id=product_id,
-                query=query
-            )
-            cached_response = TieredCache.get_cached_response(cache_key)
-            if cached_response.is_miss:
-                if line.product.is_seat_product:
-                    course_run_ids.append({'id': product_id, 'cache_key': cache_key, 'line': line})
-                else:
-                    course_uuids.append({'id': product_id, 'cache_key': cache_key, 'line': line})
-            elif cached_response.value is False:
-                applicable_lines.remove(line)
-        return course_run_ids, course_uuids, applicable_lines
-
     def get_applicable_lines(self, offer, basket, range=None):  # pylint: disable=redefined-builtin
         applicable_range = range if range else self.range
         if applicable_range and applicable_range.catalog_query is not None:
-            query = applicable_range.catalog_query
-            applicable_lines = self._filter_for_paid_course_products(basket.all_lines(), applicable_range)
-            site = basket.site
-            partner_code = site.siteconfiguration.partner.short_code
-            course_run_ids, course_uuids, applicable_lines = self._identify_uncached_product_identifiers(
-                applicable_lines, site.domain, partner_code, query
-            )
-            if course_run_ids or course_uuids:
-                # Hit Discovery Service to determine if remaining courses and runs are in the range.
-                try:
-                    response = site.siteconfiguration.discovery_api_client.catalog.query_contains.get(
-                        course_run_ids=','.join([metadata['id'] for metadata in course_run_ids]),
-                        course_uuids=','.join([metadata['id'] for metadata in course_uuids]),
-                        query=query,
-                        partner=partner_code
-                    )
-                except Exception as err:  # pylint: disable=bare-except
-                    logger.warning(
-                        '%s raised while attempting to contact Discovery Service for offer catalog_range data.', err
-                    )
-                    raise Exception('Failed to contact Discovery Service to retrieve offer catalog_range data.')
-
-                # Cache range-state individually for each course or run identifier and remove lines not in the range.
-                for metadata in course_run_ids + course_uuids:
-                    in_range = response[str(metadata['id'])]
-                    TieredCache.set_all_tiers(metadata['cache_key'], in_range, settings.COURSES_API_CACHE_TIMEOUT)
-                    if not in_range:
-                        applicable_lines.remove(metadata['line'])
-            return [(line.product.stockrecords.first().price_excl_tax, line) for line in applicable_lines]
+            lines = self._filter_for_paid_course_products(basket.all_lines(), applicable_range)
+            course_run_ids = [get_query_product_id(line.product) for line in lines if line.product.is_seat_product]
+            course_uuids = [get_query_product_id(line.product) for line in lines if not line.product.is_seat_product]
+            try:
+                # Cached range state for all lines is read with a single cache round trip, and the Discovery
+                # Service is only contacted for the remaining courses and runs.
+                membership = get_query_membership(
+                    basket.site, applicable_range.catalog_query, course_run_ids, course_uuids
+                )
+            except Exception as err:  # pylint: disable=broad-except
+                logger.warning(
+                    '%s raised while attempting to contact Discovery Service for offer catalog_range data.', err
+                )
+                raise Exception('Failed to contact Discovery Service to retrieve offer catalog_range data.')
+
+            return [
+                (line.product.stockrecords.first().price_excl_tax, line)
+                for line in lines if membership[get_query_product_id(line.product)]
+            ]
         else:
             return super(Benefit, self).get_applicable_lines(offer, basket, range=range)  # pylint: disable=bad-super-call
 
@@ -240,7 +203,7 @@ class ConditionalOffer(AbstractConditionalOffer):
 
         if self.benefit.range and self.benefit.range.catalog_query:
             # The condition is only satisfied if all basket lines are in the offer range
-            num_lines = basket.all_lines().count()
+            num_lines = len(basket.all_lines())
             voucher = self.get_voucher()
             if voucher and num_lines > 1 and voucher.usage != Voucher.MULTI_USE:
                 return False
@@ -322,33 +285,18 @@ class Range(AbstractRange):
 
     def catalog_contains_product(self, product):
         """
-        Retrieve the results from using the catalog contains endpoint for
-        catalog service for the catalog id contained in field "course_catalog".
+        Check if the product's course run is in the catalog contained in field "course_catalog",
+        using the catalog contains endpoint of the Discovery Service.
+
+        Results are cached per catalog and course run, and may already have been fetched in bulk
+        by the offer Applicator.
         """
         request = get_current_request()
-        partner_code = request.site.siteconfiguration.partner.short_code
-        cache_key = get_cache_key(
-            site_domain=request.site.domain,
-            partner_code=partner_code,
-            resource='catalogs.contains',
-            course_id=product.course_id,
-            catalog_id=self.course_catalog
-        )
-        cached_response = TieredCache.get_cached_response(cache_key)
-        if cached_response.is_hit:
-            return cached_response.value
-
-        discovery_api_client = request.site.siteconfiguration.discovery_api_client
         try:
-            # GET: /api/v1/catalogs/{catalog_id}/contains?course_run_id={course_run_ids}
-            response = discovery_api_client.catalogs(self.course_catalog).contains.get(
-                course_run_id=product.course_id
-            )
-
-            TieredCache.set_all_tiers(cache_key, response, settings.COURSES_API_CACHE_TIMEOUT)
-            return response
+            membership = get_catalog_membership(request.site, self.course_catalog, [product.course_id])
         except (ConnectionError, SlumberBaseException, Timeout):
             raise Exception('Unable to connect to Discovery Service for catalog contains endpoint.')
+        return membership[product.course_id]
 
     def contains_product(self, product):
         """
@@ -358,10 +306,9 @@ class Range(AbstractRange):
         if self.course_catalog and self.course_seat_types:
             # Product certificate type should belongs to range seat types.
             if product.attr.certificate_type.lower() in self.course_seat_types:  # pylint: disable=unsupported-membership-test
-                response = self.catalog_contains_product(product)
                 # Range can have a catalog query and 'regular' products in it,
                 # therefor an OR is used to check for both possibilities.
-                return ((response['courses'][product.course_id]) or
+                return (self.catalog_contains_product(product) or
                         super(Range, self).contains_product(product))  # pylint: disable=bad-super-call
         elif self.catalog:
             return (
@@ -0,0 +1,185 @@
+"""
+In-process index of site offers.
+
+Every basket evaluation considers every site offer. Most offers can be ruled out from the
+basket's products, or the enterprise customer of its owner, without evaluating their
+conditions. The index maps products, programs and enterprise customers to the offers
+that may apply to them, so the Applicator only evaluates offers that can match the basket.
+
+Each process keeps its own copy of the index. Saving or deleting an offer, condition, range
+or range product changes a version stamp stored in the Django cache, after which every
+process rebuilds its index on next use. The stamp is changed again once the change is
+committed, so that processes which rebuilt their index before then do not keep it.
+"""
+import threading
+from collections import defaultdict
+from uuid import uuid4
+
+import waffle
+from django.core.cache import cache
+from django.db import transaction
+from oscar.core.loading import get_model
+from requests.exceptions import ConnectionError, Timeout
+from slumber.exceptions import SlumberHttpBaseException
+
+from ecommerce.enterprise.api import fetch_enterprise_learner_data
+from ecommerce.enterprise.constants import ENTERPRISE_OFFERS_SWITCH
+from ecommerce.programs.conditions import ProgramCourseRunSeatsCondition
+
+Catalog = get_model('catalogue', 'Catalog')
+ConditionalOffer = get_model('offer', 'ConditionalOffer')
+Range = get_model('offer', 'Range')
+RangeProduct = get_model('offer', 'RangeProduct')
+
+OFFER_INDEX_VERSION_CACHE_KEY = 'offer_index.version'
+
+
+class OfferIndex(object):
+    """
+    Maps the products, programs and enterprise customers of site offers to the IDs of those offers.
+
+    Offers whose condition range cannot be expanded into products without contacting the
+    Discovery Service, e.g. ranges defined by a catalog query, are not indexed and are always
+    considered candidates.
+    """
+    _current = None
+    _lock = threading.Lock()
+
+    def __init__(self):
+        self.offer_ids_by_product = defaultdict(set)
+        self.offer_ids_by_program = defaultdict(set)
+        self.offer_ids_by_enterprise_customer = defaultdict(set)
+        self.unindexed_offer_ids = set()
+
+    @classmethod
+    def build(cls):
+        """
+        Build an index of all site offers.
+
+        The index is built with a constant number of queries, regardless of the number of offers.
+        """
+        index = cls()
+        offers = ConditionalOffer.objects.filter(offer_type=ConditionalOffer.SITE).values_list(
+            'id', 'condition__range_id', 'condition__program_uuid', 'condition__enterprise_customer_uuid'
+        )
+        offer_ids_by_range = defaultdict(set)
+        for offer_id, range_id, program_uuid, enterprise_customer_uuid in offers:
+            if program_uuid:
+                index.offer_ids_by_program[str(program_uuid)].add(offer_id)
+            elif enterprise_customer_uuid:
+                index.offer_ids_by_enterprise_customer[str(enterprise_customer_uuid)].add(offer_id)
+            elif range_id:
+                offer_ids_by_range[range_id].add(offer_id)
+            else:
+                index.unindexed_offer_ids.add(offer_id)
+
+        range_ids = set(offer_ids_by_range)
+        unindexed_range_ids = set(
+            Range.classes.through.objects.filter(range_id__in=range_ids).values_list('range_id', flat=True)
+        )
+        unindexed_range_ids.update(
+            Range.included_categories.through.objects.filter(range_id__in=range_ids).values_list('range_id', flat=True)
+        )
+
+        range_ids_by_catalog = defaultdict(set)
+        ranges = Range.objects.filter(id__in=range_ids).values_list(
+            'id', 'includes_all_products', 'catalog_query', 'course_catalog', 'catalog_id'
+        )
+        for range_id, includes_all_products, catalog_query, course_catalog, catalog_id in ranges:
+            if includes_all_products or catalog_query or course_catalog:
+                unindexed_range_ids.add(range_id)
+            elif catalog_id:
+                range_ids_by_catalog[catalog_id].add(range_id)
+
+        for range_id in unindexed_range_ids:
+            index.unindexed_offer_ids.update(offer_ids_by_range.pop(range_id, ()))
+
+        range_products = RangeProduct.objects.filter(range_id__in=offer_ids_by_range).values_list(
+            'range_id', 'product_id'
+        )
+        for range_id, product_id in range_products:
+            index.offer_ids_by_product[product_id].update(offer_ids_by_range[range_id])
+
+        catalog_products = Catalog.stock_records.through.objects.filter(
+            catalog_id__in=range_ids_by_catalog
+        ).values_list('catalog_id', 'stockrecord__product_id')
+        for catalog_id, product_id in catalog_products:
+            for range_id in range_ids_by_catalog[catalog_id]:
+                index.offer_ids_by_product[product_id].update(offer_ids_by_range.get(range_id, ()))
+
+        return index
+
+    @classmethod
+    def get_current(cls):
+        """
+        Returns the index for the current version of the site offers, building it if necessary.
+        """
+        version = cache.get(OFFER_INDEX_VERSION_CACHE_KEY)
+        if version is None:
+            cache.add(OFFER_INDEX_VERSION_CACHE_KEY, uuid4().hex, None)
+            version = cache.get(OFFER_INDEX_VERSION_CACHE_KEY)
+
+        current = cls._current
+        if current is None or current[0] != version:
+            with cls._lock:
+                current = cls._current
+                if current is None or current[0] != version:
+                    # The version is read before the offers, so changes made while
+                    # building are picked up by the next call.
+                    current = (version, cls.build())
+                    cls._current = current
+        return current[1]
+
+    @classmethod
+    def invalidate(cls):
+        """
+        Invalidates the index in every process, immediately and again once the current transaction is committed.
+        """
+        cls._set_new_version()
+        transaction.on_commit(cls._set_new_version)
+
+    @classmethod
+    def _set_new_version(cls):
+        cache.set(OFFER_INDEX_VERSION_CACHE_KEY, uuid4().hex, None)
+
+    def get_candidate_offer_ids(self, basket):
+        """
+        Returns the IDs of the site offers which may apply to the given basket.
+
+        Offers not returned cannot be satisfied by the basket.
+        """
+        lines = basket.all_lines()
+        offer_ids = set(self.unindexed_offer_ids)
+
+        for line in lines:
+            offer_ids.update(self.offer_ids_by_product.get(line.product.id, ()))
+            if line.product.parent_id:
+                offer_ids.update(self.offer_ids_by_product.get(line.product.parent_id, ()))
+
+        if basket.site:
+            # Program offers only discount seats in their program, the SKUs of which are cached.
+            for program_uuid, program_offer_ids in self.offer_ids_by_program.items():
+                condition = ProgramCourseRunSeatsCondition(program_uuid=program_uuid)
+                if any(condition.can_apply_condition(line) for line in lines):
+                    offer_ids.update(program_offer_ids)
+
+        enterprise_customer_uuid = self._get_enterprise_customer_uuid(basket)
+        if enterprise_customer_uuid:
+            offer_ids.update(self.offer_ids_by_enterprise_customer.get(enterprise_customer_uuid, ()))
+
+        return offer_ids
+
+    def _get_enterprise_customer_uuid(self, basket):
+        """
+        Returns the UUID of the EnterpriseCustomer linked to the owner of the basket, if enterprise
+        offers may apply to the basket.
+        """
+        if not (self.offer_ids_by_enterprise_customer and basket.owner and
+                waffle.switch_is_active(ENTERPRISE_OFFERS_SWITCH)):
+            return None
+
+        try:
+            return fetch_enterprise_learner_data(basket.site, basket.owner)['results'][0]['enterprise_customer']['uuid']
+        except (ConnectionError, IndexError, KeyError, SlumberHttpBaseException, Timeout):
+            # The enterprise offer conditions cannot be satisfied either, and will log the failure.
+            return None
@@ -0,0 +1,196 @@
+"""
+Bulk membership checks for ranges backed by the Discovery Service.
+
+Ranges defined by a course catalog or a catalog query only know which products they
+contain by asking the Discovery Service. These helpers answer that question for many
+products at once: products are grouped by catalog or query, and each group costs a
+single request. Results are cached per (catalog or query, course), so that later
+checks for any range sharing the catalog or query are served from the cache. As with
+TieredCache.get_or_compute, concurrent checks of the same course wait for a single
+request, and failures to reach the Discovery Service are cached briefly.
+"""
+import logging
+from collections import defaultdict
+
+from django.conf import settings
+from requests.exceptions import ConnectionError, Timeout
+from slumber.exceptions import SlumberBaseException
+
+from ecommerce.cache_utils.utils import TieredCache
+from ecommerce.core.utils import get_cache_key
+
+logger = logging.getLogger(__name__)
+
+
+def get_catalog_membership_cache_key(site, catalog_id, course_run_id):
+    return get_cache_key(
+        site_domain=site.domain,
+        partner_code=site.siteconfiguration.partner.short_code,
+        resource='catalogs.contains.course_run',
+        course_id=course_run_id,
+        catalog_id=catalog_id
+    )
+
+
+def get_query_membership_cache_key(site, query, product_id):
+    return get_cache_key(
+        site_domain=site.domain,
+        partner_code=site.siteconfiguration.partner.short_code,
+        resource='catalog_query.contains',
+        course_id=product_id,
+        query=query
+    )
+
+
+def get_query_product_id(product):
+    """
+    Returns the identifier used to check if a seat or entitlement product matches a catalog query.
+    """
+    return product.course.id if product.is_seat_product else product.attr.UUID
+
+
+def _get_or_fetch_membership(keys, fetch_membership):
+    """
+    Returns the membership of the given identifiers, fetching the uncached ones with a single request.
+
+    Arguments:
+        keys (dict): Cache keys, keyed by identifier.
+        fetch_membership (callable): Called with the list of uncached identifiers, and returns their
+            membership keyed by identifier.
+
+    Returns:
+        dict: Booleans keyed by identifier.
+    """
+    return TieredCache.get_or_compute_many(
+        keys,
+        fetch_membership,
+        settings.COURSES_API_CACHE_TIMEOUT,
+        cached_exceptions=(ConnectionError, SlumberBaseException, Timeout),
+        error_cache_timeout=settings.API_ERROR_CACHE_TIMEOUT
+    )
+
+
+def get_catalog_membership(site, catalog_id, course_run_ids):
+    """
+    Determine which of the given course runs are in a Discovery Service catalog.
+
+    Uncached course runs are checked with a single request to the catalog contains endpoint.
+
+    Arguments:
+        site (Site): Site whose Discovery Service should be queried.
+        catalog_id (int): Discovery Service catalog ID.
+        course_run_ids (iterable): Course run IDs.
+
+    Returns:
+        dict: Booleans keyed by course run ID.
+
+    Raises:
+        ConnectionError, SlumberBaseException, Timeout: If the Discovery Service cannot be reached.
+    """
+    keys = {
+        course_run_id: get_catalog_membership_cache_key(site, catalog_id, course_run_id)
+        for course_run_id in set(course_run_ids)
+    }
+
+    def fetch_membership(uncached_ids):
+        # GET: /api/v1/catalogs/{catalog_id}/contains?course_run_id={course_run_ids}
+        response = site.siteconfiguration.discovery_api_client.catalogs(catalog_id).contains.get(
+            course_run_id=','.join(sorted(uncached_ids))
+        )
+        return {course_run_id: bool(response['courses'].get(course_run_id)) for course_run_id in uncached_ids}
+
+    return _get_or_fetch_membership(keys, fetch_membership)
+
+
+def get_query_membership(site, query, course_run_ids, course_uuids):
+    """
+    Determine which of the given course runs and courses match a Discovery Service catalog query.
+
+    Uncached identifiers are checked with a single request to the query contains endpoint.
+
+    Arguments:
+        site (Site): Site whose Discovery Service should be queried.
+        query (str): Catalog query.
+        course_run_ids (iterable): Course run IDs, checked for seat products.
+        course_uuids (iterable): Course UUIDs, checked for entitlement products.
+
+    Returns:
+        dict: Booleans keyed by course run ID or course UUID.
+
+    Raises:
+        ConnectionError, SlumberBaseException, Timeout: If the Discovery Service cannot be reached.
+    """
+    course_run_ids = set(course_run_ids)
+    keys = {
+        identifier: get_query_membership_cache_key(site, query, identifier)
+        for identifier in course_run_ids | set(course_uuids)
+    }
+
+    def fetch_membership(uncached_ids):
+        uncached_run_ids = sorted(identifier for identifier in uncached_ids if identifier in course_run_ids)
+        uncached_uuids = sorted(
+            str(identifier) for identifier in uncached_ids if identifier not in course_run_ids
+        )
+        response = site.siteconfiguration.discovery_api_client.catalog.query_contains.get(
+            course_run_ids=','.join(uncached_run_ids),
+            course_uuids=','.join(uncached_uuids),
+            query=query,
+            partner=site.siteconfiguration.partner.short_code
+        )
+        return {identifier: bool(response.get(str(identifier))) for identifier in uncached_ids}
+
+    return _get_or_fetch_membership(keys, fetch_membership)
+
+
+def _get_certificate_type(product):
+    return getattr(product.attr, 'certificate_type', '').lower()
+
+
+def prefetch_range_membership(site, ranges, products):
+    """
+    Caches whether each product is in each of the given ranges.
+
+    Only ranges backed by a course catalog or a catalog query are considered. Products
+    are grouped by catalog and by query, so this costs at most one Discovery Service
+    request per distinct catalog or query. Range.contains_product and
+    Benefit.get_applicable_lines then read the results from the cache.
+
+    Failures are logged and otherwise ignored; the ranges will retry, and report the
+    failure, when they check the products themselves.
+
+    Arguments:
+        site (Site): Site whose Discovery Service should be queried.
+        ranges (iterable): Ranges to check.
+        products (iterable): Products to check.
+    """
+    products = [product for product in products if product.is_seat_product or product.is_course_entitlement_product]
+    course_run_ids_by_catalog = defaultdict(set)
+    course_run_ids_by_query = defaultdict(set)
+    course_uuids_by_query = defaultdict(set)
+
+    for _range in set(ranges):
+        if not _range.course_seat_types:
+            continue
+        seat_types = _range.course_seat_types.split(',')
+        range_products = [product for product in products if _get_certificate_type(product) in seat_types]
+
+        if _range.course_catalog:
+            course_run_ids_by_catalog[_range.course_catalog].update(
+                product.course_id for product in range_products if product.is_seat_product
+            )
+        elif _range.catalog_query:
+            for product in range_products:
+                if product.is_seat_product:
+                    course_run_ids_by_query[_range.catalog_query].add(get_query_product_id(product))
+                else:
+                    course_uuids_by_query[_range.catalog_query].add(get_query_product_id(product))
+
+    try:
+        for catalog_id, course_run_ids in course_run_ids_by_catalog.items():
+            if course_run_ids:
+                get_catalog_membership(site, catalog_id, course_run_ids)
+
+        for query in set(course_run_ids_by_query) | set(course_uuids_by_query):
+            get_query_membership(site, query, course_run_ids_by_query[query], course_uuids_by_query[query])
+    except (ConnectionError, SlumberBaseException, Timeout):
+        logger.warning('Failed to prefetch range membership from the Discovery Service.', exc_info=True)
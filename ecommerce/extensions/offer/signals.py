@@ -0,0 +1,92 @@
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save
+from django.dispatch import receiver
+from oscar.core.loading import get_model
+
+from ecommerce.extensions.offer.offer_index import OfferIndex
+
+Catalog = get_model('catalogue', 'Catalog')
+Condition = get_model('offer', 'Condition')
+ConditionalOffer = get_model('offer', 'ConditionalOffer')
+Range = get_model('offer', 'Range')
+RangeProduct = get_model('offer', 'RangeProduct')
+
+# Conditions are usually saved through proxy models, e.g. ProgramCourseRunSeatsCondition,
+# which are the senders of their signals, so senders are matched by subclass.
+OFFER_INDEX_MODELS = (Condition, Range, RangeProduct)
+
+# Offers are saved with these fields updated every time an order uses them.
+OFFER_USAGE_FIELDS = frozenset(('num_applications', 'total_discount', 'num_orders'))
+
+
+def get_offer_index_state(offer):
+    """
+    Returns the fields of an offer which are part of the offer index. Deferred fields are not
+    loaded, so as not to query them.
+    """
+    return offer.__dict__.get('offer_type'), offer.__dict__.get('condition_id')
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_offer_index(sender, **kwargs):  # pylint: disable=unused-argument
+    """
+    When the conditions and ranges determining which products offers apply to are changed,
+    the offer index must be rebuilt.
+    """
+    if issubclass(sender, OFFER_INDEX_MODELS):
+        OfferIndex.invalidate()
+
+
+@receiver(post_init, sender=ConditionalOffer)
+def record_offer_index_state(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    instance._offer_index_state = get_offer_index_state(instance)  # pylint: disable=protected-access
+
+
+@receiver(post_save, sender=ConditionalOffer)
+def invalidate_offer_index_for_offer(sender, instance, created, update_fields=None, **kwargs):  # pylint: disable=unused-argument
+    """
+    The offer index must be rebuilt when site offers are created, or when the type or condition
+    of an offer is changed from or to those of a site offer. Other changes, e.g. the usage
+    recorded for every order, do not affect it.
+    """
+    if update_fields and OFFER_USAGE_FIELDS.issuperset(update_fields):
+        return
+
+    previous_state = instance._offer_index_state  # pylint: disable=protected-access
+    state = get_offer_index_state(instance)
+    instance._offer_index_state = state  # pylint: disable=protected-access
+
+    if created:
+        changed = state[0] == ConditionalOffer.SITE
+    else:
+        changed = state != previous_state and ConditionalOffer.SITE in (state[0], previous_state[0])
+
+    if changed:
+        OfferIndex.invalidate()
+
+
+@receiver(post_delete, sender=ConditionalOffer)
+def invalidate_offer_index_for_deleted_offer(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """ The offer index must be rebuilt when site offers are deleted. """
+    if get_offer_index_state(instance)[0] in (ConditionalOffer.SITE, None):
+        OfferIndex.invalidate()
+
+
+@receiver(m2m_changed, sender=Catalog.stock_records.through)
+def invalidate_offer_index_for_catalog(*_args, **_kwargs):
+    """
+    Ranges may contain the products of a catalog, so the offer index must be rebuilt when
+    the stock records of a catalog are changed.
+    """
+    OfferIndex.invalidate()
+
+
+@receiver(m2m_changed, sender=Range.classes.through)
+@receiver(m2m_changed, sender=Range.included_categories.through)
+@receiver(m2m_changed, sender=Range.excluded_products.through)
+def invalidate_offer_index_for_range(*_args, **_kwargs):
+    """
+    The product classes, categories and excluded products of a range determine which
+    products its offers apply to, so the offer index must be rebuilt when they are changed.
+    """
+    OfferIndex.invalidate()
@@ -0,0 +1,43 @@
+import httpretty
+from oscar.core.loading import get_class
+from oscar.test import factories
+
+from ecommerce.coupons.tests.mixins import DiscoveryMockMixin
+from ecommerce.extensions.catalogue.tests.mixins import DiscoveryTestMixin
+from ecommerce.tests.testcases import TestCase
+
+Applicator = get_class('offer.applicator', 'Applicator')
+
+
+class ApplicatorTests(DiscoveryTestMixin, DiscoveryMockMixin, TestCase):
+    def setUp(self):
+        super(ApplicatorTests, self).setUp()
+        httpretty.enable()
+        self.mock_access_token_response()
+        self.basket = factories.BasketFactory(site=self.site, owner=self.create_user())
+        course_run_ids = ['course-v1:test+test+{}'.format(i) for i in range(3)]
+        for course_run_id in course_run_ids:
+            self.basket.add_product(self.create_course_and_seat(course_id=course_run_id)[1])
+
+        self.mock_catalog_contains_endpoint(
+            discovery_api_url=self.site_configuration.discovery_api_url, course_run_ids=course_run_ids
+        )
+
+    def tearDown(self):
+        super(ApplicatorTests, self).tearDown()
+        httpretty.disable()
+        httpretty.reset()
+
+    def test_apply_offers_prefetches_range_membership(self):
+        """ Verify that the basket products are checked against a catalog range with a single request. """
+        _range = factories.RangeFactory(course_catalog=1, course_seat_types='verified')
+        offer = factories.ConditionalOfferFactory(
+            condition=factories.ConditionFactory(range=_range, value=3),
+            benefit=factories.BenefitFactory(range=_range, value=10)
+        )
+
+        Applicator().apply_offers(self.basket, [offer])
+
+        self.assertEqual(len(self.basket.offer_applications), 1)
+        contains_requests = [request for request in httpretty.httpretty.latest_requests if 'contains' in request.path]
+        self.assertEqual(len(contains_requests), 1)
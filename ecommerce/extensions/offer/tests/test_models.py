@@ -3,6 +3,7 @@ from __future__ import unicode_literals
 
 import ddt
 import httpretty
+from django.core.cache import cache as django_cache
 from django.core.exceptions import ValidationError
 from mock import patch
 from oscar.core.loading import get_model
@@ -10,7 +11,7 @@ from oscar.test import factories
 from requests.exceptions import ConnectionError, Timeout
 from slumber.exceptions import SlumberBaseException
 
-from ecommerce.cache_utils.utils import TieredCache
+from ecommerce.cache_utils.utils import RequestCache, TieredCache
 from ecommerce.coupons.tests.mixins import CouponMixin, DiscoveryMockMixin
 from ecommerce.extensions.catalogue.tests.mixins import DiscoveryTestMixin
 from ecommerce.tests.testcases import TestCase
@@ -300,9 +301,9 @@ class RangeTests(CouponMixin, DiscoveryTestMixin, DiscoveryMockMixin, TestCase):
         """
         Verify that catalog_contains_product is cached
 
-        We expect 2 calls to set_all_tiers due to:
+        We expect 2 requests due to:
             - the site_configuration api setup
-            - the result being cached
+            - the catalog contains request
         """
         self.mock_access_token_response()
 
@@ -320,14 +321,12 @@ class RangeTests(CouponMixin, DiscoveryTestMixin, DiscoveryMockMixin, TestCase):
             course_run_ids=[course.id]
         )
 
-        with patch.object(TieredCache, 'set_all_tiers', wraps=TieredCache.set_all_tiers) as mocked_set_all_tiers:
-            mocked_set_all_tiers.assert_not_called()
-
-            _ = self.range.catalog_contains_product(self.product)
-            self.assertEqual(mocked_set_all_tiers.call_count, 2)
+        _ = self.range.catalog_contains_product(self.product)
+        self._assert_num_requests(2)
 
-            _ = self.range.catalog_contains_product(self.product)
-            self.assertEqual(mocked_set_all_tiers.call_count, 2)
+        RequestCache.clear()
+        _ = self.range.catalog_contains_product(self.product)
+        self._assert_num_requests(2)
 
 
 @ddt.ddt
@@ -543,6 +542,8 @@ class BenefitTests(DiscoveryTestMixin, DiscoveryMockMixin, TestCase):
         with self.assertRaises(Exception):
             self.benefit.get_applicable_lines(self.offer, basket)
 
+        # The failure is cached for API_ERROR_CACHE_TIMEOUT seconds.
+        TieredCache.clear_all_tiers()
         self.mock_catalog_query_contains_endpoint(
             course_run_ids=[], course_uuids=[entitlement_product.attr.UUID, course.id], absent_ids=[],
             query=self.benefit.range.catalog_query, discovery_api_url=self.site_configuration.discovery_api_url
@@ -553,3 +554,25 @@ class BenefitTests(DiscoveryTestMixin, DiscoveryMockMixin, TestCase):
         # Verify that the API return value is cached
         httpretty.disable()
         self.assertEqual(self.benefit.get_applicable_lines(self.offer, basket), applicable_lines)
+
+    @httpretty.activate
+    def test_get_applicable_lines_single_cache_round_trip(self):
+        """ Assert that the cached range state of all basket lines is retrieved with a single cache round trip. """
+        basket = factories.BasketFactory(site=self.site, owner=self.user)
+        seats = [self.create_course_and_seat(course_id='course-v1:test+test+{}'.format(i))[1] for i in range(3)]
+        for seat in seats:
+            basket.add_product(seat)
+        applicable_lines = [(line.product.stockrecords.first().price_excl_tax, line) for line in basket.all_lines()]
+
+        self.mock_access_token_response()
+        self.mock_catalog_query_contains_endpoint(
+            course_run_ids=[], course_uuids=[seat.course.id for seat in seats], absent_ids=[],
+            query=self.benefit.range.catalog_query, discovery_api_url=self.site_configuration.discovery_api_url
+        )
+        self.assertEqual(self.benefit.get_applicable_lines(self.offer, basket), applicable_lines)
+
+        RequestCache.clear()
+        httpretty.disable()
+        with patch.object(django_cache, 'get_many', wraps=django_cache.get_many) as mock_get_many:
+            self.assertEqual(self.benefit.get_applicable_lines(self.offer, basket), applicable_lines)
+            self.assertEqual(mock_get_many.call_count, 1)
@@ -0,0 +1,186 @@
+import mock
+from oscar.core.loading import get_class, get_model
+from oscar.test.factories import BenefitFactory, ConditionFactory, RangeFactory, create_product
+from waffle.models import Switch
+
+from ecommerce.enterprise.constants import ENTERPRISE_OFFERS_SWITCH
+from ecommerce.extensions.catalogue.tests.mixins import DiscoveryTestMixin
+from ecommerce.extensions.offer.offer_index import OfferIndex
+from ecommerce.extensions.test import factories
+from ecommerce.programs.compiled import CompiledProgram
+from ecommerce.tests.testcases import TestCase
+
+Applicator = get_class('offer.applicator', 'Applicator')
+ConditionalOffer = get_model('offer', 'ConditionalOffer')
+
+
+class OfferIndexTests(DiscoveryTestMixin, TestCase):
+    def setUp(self):
+        super(OfferIndexTests, self).setUp()
+        self.user = factories.UserFactory()
+        self.basket = factories.BasketFactory(site=self.site, owner=self.user)
+        self.product = create_product(price=10)
+        self.basket.add_product(self.product)
+
+    def create_range_offer(self, _range):
+        return factories.ConditionalOfferFactory(
+            site=self.site,
+            offer_type=ConditionalOffer.SITE,
+            condition=ConditionFactory(range=_range, value=1),
+            benefit=BenefitFactory(range=_range)
+        )
+
+    def get_candidate_offer_ids(self):
+        return OfferIndex.get_current().get_candidate_offer_ids(self.basket)
+
+    def test_range_offers(self):
+        """ Verify that offers for ranges of products are only candidates for baskets containing those products. """
+        matching_offer = self.create_range_offer(RangeFactory(products=[self.product]))
+        other_offer = self.create_range_offer(RangeFactory(products=[create_product()]))
+
+        candidate_offer_ids = self.get_candidate_offer_ids()
+        self.assertIn(matching_offer.id, candidate_offer_ids)
+        self.assertNotIn(other_offer.id, candidate_offer_ids)
+
+    def test_unindexed_offers(self):
+        """ Verify that offers for ranges which cannot be expanded into products are always candidates. """
+        catalog_query_offer = self.create_range_offer(
+            RangeFactory(catalog_query='*:*', course_seat_types='verified')
+        )
+        all_products_offer = self.create_range_offer(RangeFactory(includes_all_products=True))
+
+        candidate_offer_ids = self.get_candidate_offer_ids()
+        self.assertIn(catalog_query_offer.id, candidate_offer_ids)
+        self.assertIn(all_products_offer.id, candidate_offer_ids)
+
+    def test_invalidation(self):
+        """ Verify that the index is rebuilt when a range changes. """
+        _range = RangeFactory()
+        offer = self.create_range_offer(_range)
+        index = OfferIndex.get_current()
+        self.assertIs(OfferIndex.get_current(), index)
+        self.assertNotIn(offer.id, self.get_candidate_offer_ids())
+
+        _range.add_product(self.product)
+        self.assertIsNot(OfferIndex.get_current(), index)
+        self.assertIn(offer.id, self.get_candidate_offer_ids())
+
+    def test_invalidation_on_commit(self):
+        """ Verify that the index is invalidated again once the change is committed. """
+        _range = RangeFactory()
+        self.create_range_offer(_range)
+
+        with mock.patch('ecommerce.extensions.offer.offer_index.transaction.on_commit') as mock_on_commit:
+            _range.add_product(self.product)
+            # Another process may rebuild its index before the change is visible to it.
+            index = OfferIndex.get_current()
+
+        self.assertTrue(mock_on_commit.called)
+        for call in mock_on_commit.call_args_list:
+            call[0][0]()
+        self.assertIsNot(OfferIndex.get_current(), index)
+
+    def test_range_classes_and_categories_invalidation(self):
+        """ Verify that the index is rebuilt when the product classes or categories of a range change. """
+        _range = RangeFactory()
+        offer = self.create_range_offer(_range)
+        self.assertNotIn(offer.id, self.get_candidate_offer_ids())
+
+        _range.classes.add(self.product.get_product_class())
+        self.assertIn(offer.id, self.get_candidate_offer_ids())
+
+        _range.classes.clear()
+        self.assertNotIn(offer.id, self.get_candidate_offer_ids())
+
+        _range.included_categories.add(factories.CategoryFactory())
+        self.assertIn(offer.id, self.get_candidate_offer_ids())
+
+    def test_range_excluded_products_invalidation(self):
+        """ Verify that the index is invalidated when the excluded products of a range change. """
+        _range = RangeFactory(products=[self.product])
+        self.create_range_offer(_range)
+        index = OfferIndex.get_current()
+
+        _range.excluded_products.add(self.product)
+        self.assertIsNot(OfferIndex.get_current(), index)
+
+    def test_order_placement(self):
+        """ Verify that the index is not invalidated when the usage of offers is recorded for an order. """
+        offer = self.create_range_offer(RangeFactory(products=[self.product]))
+        index = OfferIndex.get_current()
+
+        Applicator().apply(self.basket, self.user)
+        self.assertEqual(len(self.basket.offer_applications), 1)
+        factories.create_order(basket=self.basket, user=self.user)
+
+        self.assertEqual(ConditionalOffer.objects.get(id=offer.id).num_orders, 1)
+        self.assertIs(OfferIndex.get_current(), index)
+
+    def test_offer_invalidation(self):
+        """ Verify that the index is only invalidated by changes to site offers which affect it. """
+        condition, benefit = ConditionFactory(), BenefitFactory()
+        index = OfferIndex.get_current()
+        offer = factories.ConditionalOfferFactory(
+            offer_type=ConditionalOffer.VOUCHER, condition=condition, benefit=benefit
+        )
+        offer.name = 'Voucher offer'
+        offer.save()
+        self.assertIs(OfferIndex.get_current(), index)
+
+        offer = self.create_range_offer(RangeFactory())
+        index = OfferIndex.get_current()
+        offer = ConditionalOffer.objects.get(id=offer.id)
+        offer.max_basket_applications = 1
+        offer.save()
+        self.assertIs(OfferIndex.get_current(), index)
+
+        offer.offer_type = ConditionalOffer.VOUCHER
+        offer.save()
+        self.assertIsNot(OfferIndex.get_current(), index)
+        self.assertNotIn(offer.id, self.get_candidate_offer_ids())
+
+    def test_program_offers(self):
+        """ Verify that program offers are only candidates for baskets containing seats in the program. """
+        matching_offer = factories.ProgramOfferFactory(site=self.site)
+        other_offer = factories.ProgramOfferFactory(site=self.site)
+        sku = self.basket.all_lines()[0].stockrecord.partner_sku
+
+        def get_compiled_program(program_uuid, siteconfiguration):  # pylint: disable=unused-argument
+            in_program = program_uuid == str(matching_offer.condition.program_uuid)
+            seats = [{'type': 'verified', 'sku': sku}] if in_program else []
+            return CompiledProgram({
+                'applicable_seat_types': ['verified'],
+                'courses': [{
+                    'course_runs': [{'seats': seats}],
+                    'entitlements': [],
+                }],
+            })
+
+        with mock.patch('ecommerce.programs.conditions.get_compiled_program', side_effect=get_compiled_program):
+            candidate_offer_ids = self.get_candidate_offer_ids()
+        self.assertIn(matching_offer.id, candidate_offer_ids)
+        self.assertNotIn(other_offer.id, candidate_offer_ids)
+
+    def test_enterprise_offers(self):
+        """ Verify that enterprise offers are only candidates for learners linked to the EnterpriseCustomer. """
+        Switch.objects.update_or_create(name=ENTERPRISE_OFFERS_SWITCH, defaults={'active': True})
+        matching_offer = factories.EnterpriseOfferFactory(site=self.site)
+        other_offer = factories.EnterpriseOfferFactory(site=self.site)
+        learner_data = {
+            'results': [{'enterprise_customer': {'uuid': str(matching_offer.condition.enterprise_customer_uuid)}}]
+        }
+
+        with mock.patch(
+            'ecommerce.extensions.offer.offer_index.fetch_enterprise_learner_data', return_value=learner_data
+        ):
+            candidate_offer_ids = self.get_candidate_offer_ids()
+        self.assertIn(matching_offer.id, candidate_offer_ids)
+        self.assertNotIn(other_offer.id, candidate_offer_ids)
+
+    def test_applicator_site_offers(self):
+        """ Verify that the Applicator only loads the site offers which may apply to the basket. """
+        matching_offer = self.create_range_offer(RangeFactory(products=[self.product]))
+        self.create_range_offer(RangeFactory(products=[create_product()]))
+
+        self.assertEqual(list(Applicator().get_site_offers(self.basket)), [matching_offer])
+        self.assertEqual(Applicator().get_site_offers().count(), 2)
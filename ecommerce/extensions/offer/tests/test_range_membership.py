@@ -0,0 +1,138 @@
+import json
+
+import httpretty
+from oscar.core.loading import get_model
+from oscar.test import factories
+from requests.exceptions import ConnectionError
+
+from ecommerce.cache_utils.utils import RequestCache
+from ecommerce.coupons.tests.mixins import DiscoveryMockMixin
+from ecommerce.extensions.catalogue.tests.mixins import DiscoveryTestMixin
+from ecommerce.extensions.offer.range_membership import (
+    get_catalog_membership,
+    get_query_membership,
+    prefetch_range_membership
+)
+from ecommerce.tests.testcases import TestCase
+
+Range = get_model('offer', 'Range')
+
+CATALOG_ID = 1
+QUERY = 'key:*'
+
+
+class RangeMembershipTests(DiscoveryTestMixin, DiscoveryMockMixin, TestCase):
+    def setUp(self):
+        super(RangeMembershipTests, self).setUp()
+        httpretty.enable()
+        self.mock_access_token_response()
+        self.course_run_ids = ['edX/DemoX/Run{}'.format(i) for i in range(3)]
+        self.catalog_contains_url = '{}contains/'.format(
+            self.build_discovery_catalogs_url(self.site_configuration.discovery_api_url, CATALOG_ID)
+        )
+        self.seats = [self.create_course_and_seat(course_id=course_run_id)[1] for course_run_id in self.course_run_ids]
+
+    def tearDown(self):
+        super(RangeMembershipTests, self).tearDown()
+        httpretty.disable()
+        httpretty.reset()
+
+    def mock_catalog_contains(self, courses):
+        httpretty.register_uri(
+            httpretty.GET,
+            self.catalog_contains_url,
+            body=json.dumps({'courses': courses}),
+            content_type='application/json'
+        )
+
+    def get_contains_requests(self):
+        return [request for request in httpretty.httpretty.latest_requests if 'contains' in request.path]
+
+    def test_get_catalog_membership(self):
+        """ Verify that membership of uncached course runs is fetched with a single request, and then cached. """
+        self.mock_catalog_contains({self.course_run_ids[0]: True, self.course_run_ids[1]: False})
+        expected = {self.course_run_ids[0]: True, self.course_run_ids[1]: False, self.course_run_ids[2]: False}
+
+        self.assertEqual(get_catalog_membership(self.site, CATALOG_ID, self.course_run_ids), expected)
+        requests = self.get_contains_requests()
+        self.assertEqual(len(requests), 1)
+        self.assertEqual(requests[0].querystring['course_run_id'], [','.join(sorted(self.course_run_ids))])
+
+        RequestCache.clear()
+        self.assertEqual(get_catalog_membership(self.site, CATALOG_ID, self.course_run_ids), expected)
+        self.assertEqual(len(self.get_contains_requests()), 1)
+
+    def test_get_catalog_membership_partially_cached(self):
+        """ Verify that only uncached course runs are requested from the Discovery Service. """
+        self.mock_catalog_contains({course_run_id: True for course_run_id in self.course_run_ids})
+        get_catalog_membership(self.site, CATALOG_ID, self.course_run_ids[:1])
+        get_catalog_membership(self.site, CATALOG_ID, self.course_run_ids)
+
+        requests = self.get_contains_requests()
+        self.assertEqual(len(requests), 2)
+        self.assertEqual(requests[1].querystring['course_run_id'], [','.join(sorted(self.course_run_ids[1:]))])
+
+    def test_get_catalog_membership_failure_cached(self):
+        """ Verify that failures to reach the Discovery Service are cached, rather than retried by every check. """
+        def callback(request, uri, headers):  # pylint: disable=unused-argument
+            raise ConnectionError
+
+        httpretty.register_uri(httpretty.GET, self.catalog_contains_url, body=callback)
+        for __ in range(2):
+            with self.assertRaises(ConnectionError):
+                get_catalog_membership(self.site, CATALOG_ID, self.course_run_ids)
+            RequestCache.clear()
+        self.assertEqual(len(self.get_contains_requests()), 1)
+
+    def test_get_query_membership(self):
+        """ Verify that course runs and course UUIDs are checked against a query with a single request. """
+        course_uuid = 'c3ab8a1f-5b8e-4a3e-9d1d-4c7f6b2f8f1a'
+        self.mock_catalog_query_contains_endpoint(
+            course_run_ids=self.course_run_ids[:1], course_uuids=[course_uuid], absent_ids=self.course_run_ids[1:],
+            query=QUERY, discovery_api_url=self.site_configuration.discovery_api_url
+        )
+        expected = {
+            self.course_run_ids[0]: True, self.course_run_ids[1]: False, self.course_run_ids[2]: False,
+            course_uuid: True
+        }
+
+        self.assertEqual(get_query_membership(self.site, QUERY, self.course_run_ids, [course_uuid]), expected)
+        RequestCache.clear()
+        self.assertEqual(get_query_membership(self.site, QUERY, self.course_run_ids, [course_uuid]), expected)
+        self.assertEqual(len(self.get_contains_requests()), 1)
+
+    def test_prefetch_range_membership(self):
+        """ Verify that ranges sharing a catalog are checked with one request, and the results used by the ranges. """
+        self.mock_catalog_contains({course_run_id: True for course_run_id in self.course_run_ids})
+        ranges = [
+            factories.RangeFactory(course_catalog=CATALOG_ID, course_seat_types='verified'),
+            factories.RangeFactory(course_catalog=CATALOG_ID, course_seat_types='verified,professional'),
+        ]
+        prefetch_range_membership(self.site, ranges, self.seats + [factories.ProductFactory()])
+        self.assertEqual(len(self.get_contains_requests()), 1)
+
+        for _range in ranges:
+            for seat in self.seats:
+                self.assertTrue(_range.contains_product(seat))
+        self.assertEqual(len(self.get_contains_requests()), 1)
+
+    def test_prefetch_range_membership_ignores_seat_types(self):
+        """ Verify that products whose seat type is not in the range are not checked. """
+        _range = factories.RangeFactory(course_catalog=CATALOG_ID, course_seat_types='professional')
+        prefetch_range_membership(self.site, [_range], self.seats)
+        self.assertEqual(len(self.get_contains_requests()), 0)
+
+    def test_prefetch_range_membership_failure(self):
+        """ Verify that Discovery Service failures are logged rather than raised. """
+        def callback(request, uri, headers):  # pylint: disable=unused-argument
+            raise ConnectionError
+
+        httpretty.register_uri(
+            httpretty.GET,
+            self.catalog_contains_url,
+            body=callback
+        )
+        _range = factories.RangeFactory(course_catalog=CATALOG_ID, course_seat_types='verified')
+        with self.assertRaisesRegexp(Exception, 'Unable to connect to Discovery Service'):
+            prefetch_range_membership(self.site, [_range], self.seats)
+            _range.contains_product(self.seats[0])
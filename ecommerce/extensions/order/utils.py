@@ -5,7 +5,6 @@ import logging
 
 import waffle
 from django.conf import settings
-from edx_rest_api_client.client import EdxRestApiClient
 from edx_rest_api_client.exceptions import HttpNotFoundError
 from oscar.apps.order.utils import OrderCreator as OscarOrderCreator
 from oscar.core.loading import get_model
@@ -13,7 +12,7 @@ from requests.exceptions import ConnectionError, ConnectTimeout  # pylint: disab
 from threadlocals.threadlocals import get_current_request
 
 from ecommerce.cache_utils.utils import TieredCache
-from ecommerce.core.url_utils import get_lms_entitlement_api_url
+from ecommerce.core.site_cache import get_cached_site
 from ecommerce.extensions.order.constants import DISABLE_REPEAT_ORDER_CHECK_SWITCH_NAME
 from ecommerce.extensions.refund.status import REFUND_LINE
 from ecommerce.referrals.models import Referral
@@ -39,8 +38,9 @@ class OrderNumberGenerator(object):
         Returns:
             string: Order number
         """
-        site = basket.site
-        if not site:
+        if basket.site_id:
+            site = get_cached_site(basket.site_id)
+        else:
             site = get_current_request().site
             logger.warning('Basket [%d] is not associated with a Site. Defaulting to Site [%d].', basket.id, site.id)
 
@@ -145,8 +145,6 @@ class UserAlreadyPlacedOrder(object):
             bool: True if the entitlement is expired
 
         """
-        entitlement_api_client = EdxRestApiClient(get_lms_entitlement_api_url(),
-                                                  jwt=site.siteconfiguration.access_token)
         partner_short_code = site.siteconfiguration.partner.short_code
         key = 'course_entitlement_detail_{}{}'.format(entitlement_uuid, partner_short_code)
         entitlement_cached_response = TieredCache.get_cached_response(key)
@@ -154,7 +152,7 @@ class UserAlreadyPlacedOrder(object):
             entitlement = entitlement_cached_response.value
         else:
             logger.debug('Trying to get entitlement {%s}', entitlement_uuid)
-            entitlement = entitlement_api_client.entitlements(entitlement_uuid).get()
+            entitlement = site.siteconfiguration.entitlement_api_client.entitlements(entitlement_uuid).get()
             TieredCache.set_all_tiers(key, entitlement, settings.COURSES_API_CACHE_TIMEOUT)
 
         expired = entitlement.get('expired_at')
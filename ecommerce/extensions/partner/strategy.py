@@ -1,9 +1,41 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils import timezone
 from oscar.apps.partner import availability, strategy
 from oscar.core.loading import get_model
 
 from ecommerce.core.constants import SEAT_PRODUCT_CLASS_NAME
 
+# This module is loaded along with the catalogue models, so models are referred to lazily.
+
+# Product classes are looked up by name once per process. See get_product_class.
+_product_classes = {}
+
+# Incremented whenever a product or stock record is saved, so that strategies discard the purchase info they
+# memoized for products that may have changed since.
+_catalogue_generation = [0]
+
+
+def get_product_class(name):
+    """ Returns the ProductClass with the given name, loaded once per process. """
+    product_class = _product_classes.get(name)
+    if product_class is None:
+        ProductClass = get_model('catalogue', 'ProductClass')
+        product_class = _product_classes[name] = ProductClass.objects.get(name=name)
+    return product_class
+
+
+@receiver(post_save, sender='catalogue.ProductClass')
+@receiver(post_delete, sender='catalogue.ProductClass')
+def clear_product_classes(sender, **kwargs):  # pylint: disable=unused-argument
+    _product_classes.clear()
+
+
+@receiver(post_save, sender='catalogue.Product')
+@receiver(post_save, sender='partner.StockRecord')
+def increment_catalogue_generation(sender, **kwargs):  # pylint: disable=unused-argument
+    _catalogue_generation[0] += 1
+
 
 class CourseSeatAvailabilityPolicyMixin(strategy.StockRequired):
     """
@@ -15,8 +47,7 @@ class CourseSeatAvailabilityPolicyMixin(strategy.StockRequired):
 
     @property
     def seat_class(self):
-        ProductClass = get_model('catalogue', 'ProductClass')
-        return ProductClass.objects.get(name=SEAT_PRODUCT_CLASS_NAME)
+        return get_product_class(SEAT_PRODUCT_CLASS_NAME)
 
     def availability_policy(self, product, stockrecord):
         """ A product is unavailable for non-admin users if the current date is
@@ -33,9 +64,42 @@ class CourseSeatAvailabilityPolicyMixin(strategy.StockRequired):
 
 class DefaultStrategy(strategy.UseFirstStockRecord, CourseSeatAvailabilityPolicyMixin,
                       strategy.NoTax, strategy.Structured):
-    pass
+    """
+    Strategy memoizing the purchase info of each product and stock record.
+
+    A strategy is created for each request, and shared by everything pricing products for the request,
+    so that each product is priced once. Memoized purchase info is discarded when a product or stock
+    record is saved.
+    """
+
+    def __init__(self, request=None):
+        super(DefaultStrategy, self).__init__(request)
+        self._purchase_info = {}
+        self._generation = _catalogue_generation[0]
+
+    def fetch_for_product(self, product, stockrecord=None):
+        if product.id is None:
+            return super(DefaultStrategy, self).fetch_for_product(product, stockrecord)
+
+        if self._generation != _catalogue_generation[0]:
+            self._purchase_info.clear()
+            self._generation = _catalogue_generation[0]
+
+        key = (product.id, stockrecord.id if stockrecord else None)
+        purchase_info = self._purchase_info.get(key)
+        if purchase_info is None:
+            purchase_info = self._purchase_info[key] = super(DefaultStrategy, self).fetch_for_product(
+                product, stockrecord
+            )
+        return purchase_info
 
 
 class Selector(object):
     def strategy(self, request=None, user=None, **kwargs):  # pylint: disable=unused-argument
+        # Requests have a strategy once the basket middleware has run, which is shared with everything
+        # pricing products for the request.
+        request_strategy = getattr(request, 'strategy', None)
+        if isinstance(request_strategy, DefaultStrategy):
+            return request_strategy
+
         return DefaultStrategy(request if hasattr(request, 'user') else None)
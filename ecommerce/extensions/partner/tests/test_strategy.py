@@ -2,6 +2,7 @@ import datetime
 
 import ddt
 import pytz
+from django.contrib.auth.models import AnonymousUser
 from django.test import RequestFactory
 from oscar.apps.partner import availability
 
@@ -23,6 +24,34 @@ class DefaultStrategyTests(DiscoveryTestMixin, TestCase):
         """ Verify the property returns the course seat Product Class. """
         self.assertEqual(self.strategy.seat_class, self.seat_product_class)
 
+    def test_seat_class_cached(self):
+        """ Verify the seat Product Class is loaded once per process, until a Product Class is saved. """
+        seat_class = self.strategy.seat_class
+        with self.assertNumQueries(0):
+            self.assertIs(DefaultStrategy().seat_class, seat_class)
+
+        seat_class.save()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.strategy.seat_class, seat_class)
+
+    def test_fetch_for_product_memoized(self):
+        """ Verify the purchase info of a product is fetched once per stock record, until a product is saved. """
+        stock_record = self.honor_seat.stockrecords.first()
+        purchase_info = self.strategy.fetch_for_product(self.honor_seat)
+        self.assertEqual(purchase_info.stockrecord, stock_record)
+
+        with self.assertNumQueries(0):
+            self.assertIs(self.strategy.fetch_for_product(self.honor_seat), purchase_info)
+            self.assertIsNot(self.strategy.fetch_for_product(self.honor_seat, stock_record), purchase_info)
+            self.assertIs(
+                self.strategy.fetch_for_product(self.honor_seat, stock_record),
+                self.strategy.fetch_for_product(self.honor_seat, stock_record)
+            )
+
+        stock_record.price_excl_tax = 10
+        stock_record.save()
+        self.assertEqual(self.strategy.fetch_for_product(self.honor_seat).price.excl_tax, 10)
+
     def test_availability_policy_not_expired(self):
         """ If the course seat's expiration date has not passed, the seat should be available for purchase. """
         product = self.honor_seat
@@ -71,3 +100,10 @@ class SelectorTests(TestCase):
         """ Verify our own DefaultStrategy is returned. """
         actual = Selector().strategy()
         self.assertIsInstance(actual, DefaultStrategy)
+
+    def test_strategy_of_request(self):
+        """ Verify the strategy of the request is shared, rather than a new strategy created. """
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        request.strategy = Selector().strategy(request=request)
+        self.assertIs(Selector().strategy(request=request), request.strategy)
@@ -4,6 +4,7 @@ import logging
 
 from django.conf import settings
 from django.db import models
+from django.utils.timezone import now
 from django.utils.translation import ugettext_lazy as _
 from django_extensions.db.models import TimeStampedModel
 from ecommerce_worker.sailthru.v1.tasks import send_course_refund_email
@@ -40,12 +41,8 @@ class StatusMixin(object):
         """Returns all possible statuses that this object can move to."""
         return self.pipeline.get(self.status, ())
 
-    # pylint: disable=access-member-before-definition,attribute-defined-outside-init
-    def set_status(self, new_status):
-        """Set a new status for this object.
-
-        If the requested status is not valid, then ``InvalidStatus`` is raised.
-        """
+    def _validate_status(self, new_status):
+        """Raises ``InvalidStatus`` if this object cannot move to the requested status."""
         if new_status not in self.available_statuses():
             msg = " Transition from '{status}' to '{new_status}' is invalid for {model_name} {id}.".format(
                 new_status=new_status,
@@ -55,9 +52,36 @@ class StatusMixin(object):
             )
             raise InvalidStatus(msg)
 
+    # pylint: disable=access-member-before-definition,attribute-defined-outside-init
+    def set_status(self, new_status):
+        """Set a new status for this object.
+
+        If the requested status is not valid, then ``InvalidStatus`` is raised.
+        """
+        self._validate_status(new_status)
+
         self.status = new_status
         self.save()
 
+    @classmethod
+    def set_status_in_bulk(cls, objects, new_status):
+        """Set a new status for each of the given objects, with a single update.
+
+        If the requested status is not valid for any of them, then ``InvalidStatus`` is raised,
+        and none of them is updated.
+        """
+        if not objects:
+            return
+
+        for obj in objects:
+            obj._validate_status(new_status)  # pylint: disable=protected-access
+
+        modified = now()
+        cls.objects.filter(id__in=[obj.id for obj in objects]).update(status=new_status, modified=modified)
+        for obj in objects:
+            obj.status = new_status
+            obj.modified = modified
+
     def __str__(self):
         return unicode(self.id)
 
@@ -103,7 +127,13 @@ class Refund(StatusMixin, TimeStampedModel):
             None: If no unrefunded order lines have been provided.
             Refund: With RefundLines corresponding to each given unrefunded order line.
         """
-        unrefunded_lines = [line for line in lines if not line.refund_lines.exclude(status=REFUND_LINE.DENIED).exists()]
+        lines = list(lines)
+        refunded_line_ids = set(
+            RefundLine.objects.filter(order_line__in=lines).exclude(
+                status=REFUND_LINE.DENIED
+            ).values_list('order_line_id', flat=True)
+        )
+        unrefunded_lines = [line for line in lines if line.id not in refunded_line_ids]
 
         if unrefunded_lines:
             status = getattr(settings, 'OSCAR_INITIAL_REFUND_STATUS', REFUND.OPEN)
@@ -125,14 +155,15 @@ class Refund(StatusMixin, TimeStampedModel):
             )
 
             status = getattr(settings, 'OSCAR_INITIAL_REFUND_LINE_STATUS', REFUND_LINE.OPEN)
-            for line in unrefunded_lines:
-                RefundLine.objects.create(
+            RefundLine.objects.bulk_create([
+                RefundLine(
                     refund=refund,
                     order_line=line,
                     line_credit_excl_tax=line.line_price_excl_tax,
                     quantity=line.quantity,
                     status=status
-                )
+                ) for line in unrefunded_lines
+            ])
 
             if total_credit_excl_tax == 0:
                 refund.approve(notify_purchaser=False)
@@ -259,8 +290,7 @@ class Refund(StatusMixin, TimeStampedModel):
             logger.info('Skipping the revocation step for refund [%d].', self.id)
             # Mark the status complete as it does not involve the revocation.
             self.set_status(REFUND.COMPLETE)
-            for refund_line in self.lines.all():
-                refund_line.set_status(REFUND_LINE.COMPLETE)
+            RefundLine.set_status_in_bulk(list(self.lines.all()), REFUND_LINE.COMPLETE)
 
         if self.status == REFUND.COMPLETE:
             post_refund.send_robust(sender=self.__class__, refund=self)
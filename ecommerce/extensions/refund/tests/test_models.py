@@ -71,6 +71,26 @@ class StatusTestsMixin(object):
                 instance.set_status(new_status)
                 self.assertEqual(instance.status, new_status, 'Refund status was not updated!')
 
+    def test_set_status_in_bulk(self):
+        """ Verify the status of every instance is updated at once, unless it is invalid for any of them. """
+        for status, valid_statuses in self.pipeline.iteritems():
+            for new_status in valid_statuses:
+                instances = [self._get_instance(status=status) for __ in range(2)]
+                with self.assertNumQueries(1):
+                    type(instances[0]).set_status_in_bulk(instances, new_status)
+
+                for instance in instances:
+                    self.assertEqual(instance.status, new_status)
+                    instance.refresh_from_db()
+                    self.assertEqual(instance.status, new_status, 'Status was not saved!')
+
+        for status, valid_statuses in self.pipeline.iteritems():
+            invalid_statuses = set(self.pipeline.keys()) - set(valid_statuses)
+            for new_status in invalid_statuses:
+                instance = self._get_instance(status=status)
+                self.assertRaises(InvalidStatus, type(instance).set_status_in_bulk, [instance], new_status)
+                self.assertEqual(instance.status, status)
+
 
 @ddt.ddt
 class RefundTests(RefundTestMixin, StatusTestsMixin, TestCase):
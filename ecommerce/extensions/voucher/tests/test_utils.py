@@ -6,8 +6,9 @@ import uuid
 import ddt
 import httpretty
 from django.core.exceptions import ValidationError
-from django.db import IntegrityError
+from django.db import IntegrityError, connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils.translation import ugettext_lazy as _
 from factory.fuzzy import FuzzyText
 from oscar.templatetags.currency_filters import currency
@@ -205,6 +206,25 @@ class UtilTests(CouponMixin, DiscoveryMockMixin, DiscoveryTestMixin, LmsApiMockM
         self.assertEqual(voucher.start_datetime, self.data['start_datetime'])
         self.assertEqual(voucher.usage, Voucher.SINGLE_USE)
 
+    @ddt.data(Voucher.SINGLE_USE, Voucher.MULTI_USE)
+    def test_create_vouchers_queries(self, voucher_type):
+        """ Verify the number of queries made to create vouchers does not depend on the number of vouchers. """
+        self.data['voucher_type'] = voucher_type
+
+        def get_query_count(quantity):
+            self.data['quantity'] = quantity
+            with CaptureQueriesContext(connection) as context:
+                vouchers = create_vouchers(**self.data)
+            self.assertEqual(len(vouchers), quantity)
+            self.assertEqual(len(set(voucher.code for voucher in vouchers)), quantity)
+            for voucher in vouchers:
+                self.assertEqual(voucher.offers.count(), 1)
+            return len(context.captured_queries)
+
+        # The first vouchers also create the range, condition and benefit shared by all vouchers.
+        get_query_count(1)
+        self.assertEqual(get_query_count(2), get_query_count(20))
+
     def test_create_voucher_with_long_name(self):
         self.data.update({
             'name': (
@@ -396,6 +416,7 @@ class UtilTests(CouponMixin, DiscoveryMockMixin, DiscoveryTestMixin, LmsApiMockM
 
         self.mock_course_api_response(course=self.course)
         field_names, rows = generate_coupon_report(self.coupon_vouchers)
+        rows = list(rows)
 
         self.assertEqual(field_names, [
             'Code',
@@ -448,6 +469,7 @@ class UtilTests(CouponMixin, DiscoveryMockMixin, DiscoveryTestMixin, LmsApiMockM
         )
         coupon_voucher = CouponVouchers.objects.get(coupon=dynamic_coupon)
         __, rows = generate_coupon_report([coupon_voucher])
+        rows = list(rows)
         voucher = coupon_voucher.vouchers.first()
         self.assert_report_first_row(rows[0], dynamic_coupon, voucher)
 
@@ -461,6 +483,7 @@ class UtilTests(CouponMixin, DiscoveryMockMixin, DiscoveryTestMixin, LmsApiMockM
         self.coupon_vouchers.first().vouchers.add(*vouchers)
 
         __, rows = generate_coupon_report(self.coupon_vouchers)
+        rows = list(rows)
 
         # The data that is the same for all vouchers like Coupon Name, Coupon Type, etc.
         # are only shown in row[0]
@@ -475,6 +498,7 @@ class UtilTests(CouponMixin, DiscoveryMockMixin, DiscoveryTestMixin, LmsApiMockM
         self.mock_course_runs_endpoint(self.site_configuration.discovery_api_url)
         query_coupon = self.create_catalog_coupon(catalog_query=catalog_query)
         field_names, rows = generate_coupon_report([query_coupon.attr.coupon_vouchers])
+        rows = list(rows)
 
         empty_fields = (
             'Discount Amount',
@@ -564,6 +588,7 @@ class UtilTests(CouponMixin, DiscoveryMockMixin, DiscoveryTestMixin, LmsApiMockM
         vouchers = coupon.attr.coupon_vouchers.vouchers.all()
         self.use_voucher('TEST', vouchers[0], self.user)
         __, rows = generate_coupon_report([coupon.attr.coupon_vouchers])
+        rows = list(rows)
 
         # rows[0] - This row is different from other rows
         # rows[1] - first voucher header row
@@ -574,6 +599,29 @@ class UtilTests(CouponMixin, DiscoveryMockMixin, DiscoveryTestMixin, LmsApiMockM
         self.assertEqual(rows[2]['Redeemed By Username'], self.user.username)
         self.assertEqual(rows[3]['Redemption Count'], 0)
 
+    def test_generate_coupon_report_queries(self):
+        """ Verify the number of queries depends on the number of voucher batches, not the number of vouchers. """
+        coupon = self.create_coupon(title='Test batches', catalog=self.catalog, quantity=2)
+        coupon_vouchers = coupon.attr.coupon_vouchers
+
+        def get_query_count():
+            with CaptureQueriesContext(connection) as context:
+                __, rows = generate_coupon_report([coupon_vouchers], batch_size=10)
+                rows = list(rows)
+            return len(context.captured_queries), len(rows)
+
+        for voucher in coupon_vouchers.vouchers.all():
+            self.use_voucher('TEST-{}'.format(voucher.id), voucher, self.user)
+        query_count, row_count = get_query_count()
+
+        self.data['quantity'] = 4
+        vouchers = create_vouchers(**self.data)
+        coupon_vouchers.vouchers.add(*vouchers)
+        for voucher in vouchers:
+            self.use_voucher('TEST-{}'.format(voucher.id), voucher, self.user)
+
+        self.assertEqual(get_query_count(), (query_count, row_count + 8))
+
     def test_generate_coupon_report_for_used_query_coupon(self):
         """Test that used query coupon voucher reports which course was it used for."""
         catalog_query = '*:*'
@@ -589,6 +637,7 @@ class UtilTests(CouponMixin, DiscoveryMockMixin, DiscoveryTestMixin, LmsApiMockM
         voucher.offers.first().condition.range.add_product(self.verified_seat)
         self.use_voucher('TESTORDER4', voucher, self.user)
         field_names, rows = generate_coupon_report([query_coupon.attr.coupon_vouchers])
+        rows = list(rows)
 
         self.assertIn('Redeemed For Course ID', field_names)
         self.assertIn('Redeemed By Username', field_names)
@@ -613,6 +662,7 @@ class UtilTests(CouponMixin, DiscoveryMockMixin, DiscoveryTestMixin, LmsApiMockM
         voucher = query_coupon.attr.coupon_vouchers.vouchers.first()
         voucher.record_usage(order, self.user)
         field_names, rows = generate_coupon_report([query_coupon.attr.coupon_vouchers])
+        rows = list(rows)
 
         expected_redemed_course_ids = '{}, {}'.format(course1, course2)
         self.assertEqual(rows[-1]['Redeemed For Course IDs'], expected_redemed_course_ids)
@@ -674,6 +724,7 @@ class UtilTests(CouponMixin, DiscoveryMockMixin, DiscoveryTestMixin, LmsApiMockM
             program_uuid=program_uuid,
         )
         field_names, rows = generate_coupon_report([program_coupon.attr.coupon_vouchers])
+        rows = list(rows)
 
         for field in ('Discount Amount', 'Price'):
             self.assertIsNone(rows[0][field])
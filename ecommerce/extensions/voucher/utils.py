@@ -6,15 +6,18 @@ import datetime
 import hashlib
 import logging
 import uuid
+from collections import defaultdict
 from decimal import Decimal, DecimalException
 
 import dateutil.parser
 import pytz
 from django.conf import settings
+from django.db import transaction
 from django.urls import reverse
 from django.utils.translation import ugettext_lazy as _
 from opaque_keys.edx.keys import CourseKey
 from oscar.core.loading import get_model
+from oscar.core.utils import slugify
 from oscar.templatetags.currency_filters import currency
 
 from ecommerce.cache_utils.utils import TieredCache
@@ -43,6 +46,9 @@ StockRecord = get_model('partner', 'StockRecord')
 Voucher = get_model('voucher', 'Voucher')
 VoucherApplication = get_model('voucher', 'VoucherApplication')
 
+COUPON_REPORT_BATCH_SIZE = 1000
+VOUCHER_BATCH_SIZE = 500
+
 
 def _add_redemption_course_ids(new_row_to_append, header_row, redemption_course_ids):
     if any(row in [_('Catalog Query'), _('Program UUID')] for row in header_row):
@@ -199,16 +205,92 @@ def _get_voucher_info_for_coupon_report(voucher):
     return coupon_data
 
 
-def generate_coupon_report(coupon_vouchers):
+def _get_voucher_batches(coupon_voucher, batch_size):
+    """
+    Yields the vouchers of a coupon in batches of at most batch_size vouchers, with their offers.
+
+    Batches are selected by ID, rather than by offset, so that every batch costs the same.
+    """
+    vouchers = coupon_voucher.vouchers.order_by('id').prefetch_related('offers')
+    last_id = 0
+    while True:
+        batch = list(vouchers.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1].id
+
+
+def _get_applications_by_voucher(vouchers):
+    """
+    Returns the applications of the given vouchers, with their users and order lines, keyed by voucher ID.
+    """
+    applications_by_voucher = defaultdict(list)
+    redeemed_voucher_ids = [voucher.id for voucher in vouchers if voucher.num_orders > 0]
+    if redeemed_voucher_ids:
+        applications = VoucherApplication.objects.filter(
+            voucher_id__in=redeemed_voucher_ids
+        ).select_related('user', 'order').prefetch_related('order__lines__product').order_by('id')
+        for application in applications:
+            applications_by_voucher[application.voucher_id].append(application)
+    return applications_by_voucher
+
+
+def _generate_coupon_report_rows(coupon_rows, batch_size):
+    """
+    Yields the rows of a coupon report.
+
+    Vouchers, and their applications, are loaded batch_size vouchers at a time, so memory use
+    and the number of queries per batch do not depend on the number of vouchers.
+
+    Args:
+        coupon_rows (List[tuple]): CouponVouchers, and the row applying to all of their vouchers.
+        batch_size (int): Number of vouchers to load per batch.
+    """
+    for coupon_voucher, coupon_row in coupon_rows:
+        yield coupon_row
+
+        for vouchers in _get_voucher_batches(coupon_voucher, batch_size):
+            applications_by_voucher = _get_applications_by_voucher(vouchers)
+
+            for voucher in vouchers:
+                row = _get_voucher_info_for_coupon_report(voucher)
+
+                for item in (_('Order Number'), _('Redeemed By Username'),):
+                    row[item] = ''
+
+                yield row
+
+                for application in applications_by_voucher[voucher.id]:
+                    redemption_course_ids = [line.product.course_id for line in application.order.lines.all()]
+
+                    new_row = row.copy()
+                    _add_redemption_course_ids(new_row, coupon_row, redemption_course_ids)
+                    new_row.update({
+                        _('Status'): _('Redeemed'),
+                        _('Order Number'): application.order.number,
+                        _('Redeemed By Username'): application.user.username,
+                        _('Maximum Coupon Usage'): 1,
+                        _('Redemption Count'): 1,
+                    })
+                    yield new_row
+
+
+def generate_coupon_report(coupon_vouchers, batch_size=COUPON_REPORT_BATCH_SIZE):
     """
     Generate coupon report data
 
+    The rows applying to all vouchers of a coupon are built immediately, so that errors,
+    e.g. a missing coupon stock record, are raised before any row is returned. The other
+    rows are generated as they are consumed.
+
     Args:
         coupon_vouchers (List[CouponVouchers]): List of coupon_vouchers the report should be generated for
+        batch_size (int): Number of vouchers to load at a time.
 
     Returns:
         List[str]
-        List[dict]
+        Iterator[dict]
     """
 
     field_names = [
@@ -240,51 +322,22 @@ def generate_coupon_report(coupon_vouchers):
         _('Coupon Expiry Date'),
         _('Email Domains'),
     ]
-    rows = []
+    coupon_rows = []
 
     for coupon_voucher in coupon_vouchers:
         coupon = coupon_voucher.coupon
-        client = Invoice.objects.get(order__lines__product=coupon).business_client.name
-        rows.append(_get_info_for_coupon_report(coupon, coupon_voucher.vouchers.first()))
-        rows[0][_('Client')] = client
-
-        for voucher in coupon_voucher.vouchers.all().prefetch_related('offers'):
-            row = _get_voucher_info_for_coupon_report(voucher)
-
-            for item in (_('Order Number'), _('Redeemed By Username'),):
-                row[item] = ''
-
-            rows.append(row)
+        coupon_row = _get_info_for_coupon_report(coupon, coupon_voucher.vouchers.first())
+        coupon_row[_('Client')] = Invoice.objects.get(order__lines__product=coupon).business_client.name
+        coupon_rows.append((coupon_voucher, coupon_row))
 
-            if voucher.num_orders > 0:
-                voucher_applications = VoucherApplication.objects.filter(
-                    voucher=voucher).prefetch_related('user', 'order__lines')
-
-                for application in voucher_applications:
-                    redemption_course_ids = []
-                    redemption_user_username = application.user.username
-
-                    for line in application.order.lines.all():
-                        redemption_course_ids.append(line.product.course_id)
-
-                    new_row = row.copy()
-                    _add_redemption_course_ids(new_row, rows[0], redemption_course_ids)
-                    new_row.update({
-                        _('Status'): _('Redeemed'),
-                        _('Order Number'): application.order.number,
-                        _('Redeemed By Username'): redemption_user_username,
-                        _('Maximum Coupon Usage'): 1,
-                        _('Redemption Count'): 1,
-                    })
-                    rows.append(new_row)
-
-    if _('Program UUID') in rows[0]:
+    first_row = coupon_rows[0][1]
+    if _('Program UUID') in first_row:
         field_names.remove(_('Course ID'))
         field_names.remove(_('Organization'))
         field_names.remove(_('Catalog Query'))
         field_names.remove(_('Course Seat Types'))
         field_names.remove(_('Redeemed For Course ID'))
-    elif _('Catalog Query') in rows[0]:
+    elif _('Catalog Query') in first_row:
         field_names.remove(_('Course ID'))
         field_names.remove(_('Organization'))
         field_names.remove(_('Program UUID'))
@@ -295,37 +348,13 @@ def generate_coupon_report(coupon_vouchers):
         field_names.remove(_('Redeemed For Course IDs'))
         field_names.remove(_('Program UUID'))
 
-    return field_names, rows
+    return field_names, _generate_coupon_report_rows(coupon_rows, batch_size)
 
 
-def _get_or_create_offer(
-        product_range, benefit_type, benefit_value, coupon_id=None,
-        max_uses=None, offer_number=None, email_domains=None, program_uuid=None, site=None
-):
+def _get_or_create_condition_and_benefit(product_range, benefit_type, benefit_value, coupon_id, program_uuid):
     """
-    Return an offer for a catalog with condition and benefit.
-
-    If offer doesn't exist, new offer will be created and associated with
-    provided Offer condition and benefit.
-
-    Args:
-        product_range (Range): Range of products associated with condition
-        benefit_type (str): Type of benefit associated with the offer
-        benefit_value (Decimal): Value of benefit associated with the offer
-    Kwargs:
-        coupon_id (int): ID of the coupon
-        max_uses (int): number of maximum global application number an offer can have
-        offer_number (int): number of the consecutive offer - used in case of a multiple
-                            multi-use coupon
-        email_domains (str): a comma-separated string of email domains allowed to apply
-                            this offer
-        program_uuid (str): the Program UUID
-        site (site): Site for which the Coupon is created. Defaults to None.
-
-    Returns:
-        Offer
+    Return the condition and benefit of a coupon offer, and the name of the offer.
     """
-
     if program_uuid:
         try:
             offer_condition = ProgramCourseRunSeatsCondition.objects.get(program_uuid=program_uuid)
@@ -363,6 +392,40 @@ def _get_or_create_offer(
             'Failed to create Benefit. Benefit value must be a positive number or 0.'
         )
 
+    return offer_condition, offer_benefit, offer_name
+
+
+def _get_or_create_offer(
+        product_range, benefit_type, benefit_value, coupon_id=None,
+        max_uses=None, offer_number=None, email_domains=None, program_uuid=None, site=None
+):
+    """
+    Return an offer for a catalog with condition and benefit.
+
+    If offer doesn't exist, new offer will be created and associated with
+    provided Offer condition and benefit.
+
+    Args:
+        product_range (Range): Range of products associated with condition
+        benefit_type (str): Type of benefit associated with the offer
+        benefit_value (Decimal): Value of benefit associated with the offer
+    Kwargs:
+        coupon_id (int): ID of the coupon
+        max_uses (int): number of maximum global application number an offer can have
+        offer_number (int): number of the consecutive offer - used in case of a multiple
+                            multi-use coupon
+        email_domains (str): a comma-separated string of email domains allowed to apply
+                            this offer
+        program_uuid (str): the Program UUID
+        site (site): Site for which the Coupon is created. Defaults to None.
+
+    Returns:
+        Offer
+    """
+    offer_condition, offer_benefit, offer_name = _get_or_create_condition_and_benefit(
+        product_range, benefit_type, benefit_value, coupon_id, program_uuid
+    )
+
     if offer_number:
         offer_name = "{} [{}]".format(offer_name, offer_number)
 
@@ -380,6 +443,86 @@ def _get_or_create_offer(
     return offer
 
 
+def _get_or_create_offers(
+        quantity, product_range, benefit_type, benefit_value, coupon_id=None,
+        max_uses=None, email_domains=None, program_uuid=None, site=None
+):
+    """
+    Return quantity offers for a catalog with condition and benefit, numbered from 0.
+
+    Behaves like calling _get_or_create_offer for each offer number, except that missing
+    offers are inserted in batches, and the number of queries does not depend on quantity
+    beyond one query per batch.
+
+    Returns:
+        List[Offer]
+    """
+    offer_condition, offer_benefit, offer_name = _get_or_create_condition_and_benefit(
+        product_range, benefit_type, benefit_value, coupon_id, program_uuid
+    )
+    offer_names = [
+        "{} [{}]".format(offer_name, offer_number) if offer_number else offer_name
+        for offer_number in range(quantity)
+    ]
+    offer_fields = {
+        'offer_type': ConditionalOffer.VOUCHER,
+        'condition': offer_condition,
+        'benefit': offer_benefit,
+        'max_global_applications': max_uses,
+        'email_domains': email_domains,
+        'site': site,
+        'priority': OFFER_PRIORITY_VOUCHER,
+    }
+
+    def get_offers_by_name():
+        offers_by_name = {}
+        for batch in _batches(offer_names):
+            offers_by_name.update(
+                (offer.name, offer) for offer in ConditionalOffer.objects.filter(name__in=batch, **offer_fields)
+            )
+        return offers_by_name
+
+    offers_by_name = get_offers_by_name()
+    new_offers = [
+        ConditionalOffer(name=name, **offer_fields) for name in offer_names if name not in offers_by_name
+    ]
+    if new_offers:
+        # bulk_create does not call save, which validates offers.
+        for offer in new_offers:
+            offer.clean()
+        _set_offer_slugs(new_offers)
+        ConditionalOffer.objects.bulk_create(new_offers, batch_size=VOUCHER_BATCH_SIZE)
+        # IDs of bulk created objects are not set by all database backends.
+        offers_by_name = get_offers_by_name()
+
+    return [offers_by_name[name] for name in offer_names]
+
+
+def _set_offer_slugs(offers):
+    """
+    Sets the slugs of new offers, checking that they are unused in batches.
+
+    The slug field would otherwise check each slug with a separate query when the offer is
+    inserted. It still does so for the offers whose slug is taken, which are left without a slug.
+    """
+    max_length = ConditionalOffer._meta.get_field('slug').max_length  # pylint: disable=protected-access
+    slugs = [slugify(offer.name)[:max_length].strip('-') for offer in offers]
+    taken_slugs = set()
+    for batch in _batches(slugs):
+        taken_slugs.update(ConditionalOffer.objects.filter(slug__in=batch).values_list('slug', flat=True))
+
+    for offer, slug in zip(offers, slugs):
+        if slug and slug not in taken_slugs:
+            offer.slug = slug
+            taken_slugs.add(slug)
+
+
+def _batches(items, batch_size=VOUCHER_BATCH_SIZE):
+    """ Yields consecutive slices of at most batch_size items. """
+    for start in range(0, len(items), batch_size):
+        yield items[start:start + batch_size]
+
+
 def _generate_code_string(length):
     """
     Create a string of random characters of specified length
@@ -398,33 +541,67 @@ def _generate_code_string(length):
 
     h = hashlib.sha256()
     h.update(uuid.uuid4().get_bytes())
-    voucher_code = base64.b32encode(h.digest())[0:length]
-    if Voucher.objects.filter(code__iexact=voucher_code).exists():
-        return _generate_code_string(length)
+    return base64.b32encode(h.digest())[0:length]
 
-    return voucher_code
 
+def _generate_code_strings(length, count):
+    """
+    Create count distinct strings of random characters of specified length, which are not used by any voucher.
+
+    Candidate codes are checked against existing vouchers in batches, and codes which
+    are taken are replaced until enough unused codes are found.
+
+    Args:
+        length (int): Defines the length of randomly generated strings.
+        count (int): Number of strings to generate.
 
-def _create_new_voucher(code, end_datetime, name, offer, start_datetime, voucher_type):
+    Raises:
+        ValueError raised if length is less than one.
+
+    Returns:
+        List[str]
     """
-    Creates a voucher.
+    codes = set()
+    taken_codes = set()
+    while len(codes) < count:
+        candidates = set()
+        while len(candidates) < count - len(codes):
+            code = _generate_code_string(length)
+            if code not in taken_codes and code not in codes:
+                candidates.add(code)
+
+        # Generated codes are upper case, like the codes of saved vouchers.
+        for batch in _batches(list(candidates)):
+            taken_codes.update(Voucher.objects.filter(code__in=batch).values_list('code', flat=True))
+        codes.update(code for code in candidates if code not in taken_codes)
+
+    return list(codes)
 
-    If randomly generated voucher code already exists, new code will be generated and reverified.
+
+def _create_new_vouchers(code, end_datetime, name, offers, start_datetime, voucher_type):
+    """
+    Creates a voucher for each of the given offers.
+
+    Vouchers, and their links to offers, are inserted in batches. Voucher codes are generated
+    unless provided; a generated code is replaced if it is used by an existing voucher.
 
     Args:
-        code (str): Code associated with vouchers. If not provided, one will be generated.
+        code (str): Code associated with vouchers. If not provided, codes will be generated.
         end_datetime (datetime): Voucher end date.
         name (str): Voucher name.
-        offer (Offer): Offer associated with voucher.
+        offers (List[Offer]): Offer associated with each voucher.
         start_datetime (datetime): Voucher start date.
         voucher_type (str): Voucher usage.
 
     Returns:
-        Voucher
+        List[Voucher]
     """
-    if offer.benefit.type == Benefit.PERCENTAGE and offer.benefit.value == 100 and code:
+    if not offers:
+        return []
+
+    benefit = offers[0].benefit
+    if benefit.type == Benefit.PERCENTAGE and benefit.value == 100 and code:
         log_message_and_raise_validation_error('Failed to create Voucher. Code may not be set for enrollment coupon.')
-    voucher_code = code or _generate_code_string(settings.VOUCHER_CODE_LENGTH)
 
     if not end_datetime:
         log_message_and_raise_validation_error('Failed to create Voucher. Voucher end datetime field must be set.')
@@ -446,16 +623,42 @@ def _create_new_voucher(code, end_datetime, name, offer, start_datetime, voucher
                 'Failed to create Voucher. Voucher start datetime [{date}] is invalid.'.format(date=start_datetime)
             )
 
-    voucher = Voucher.objects.create(
-        name=name[:128],
-        code=voucher_code,
-        usage=voucher_type,
-        start_datetime=start_datetime,
-        end_datetime=end_datetime
-    )
-    voucher.offers.add(offer)
+    voucher_codes = [code] * len(offers) if code else _generate_code_strings(settings.VOUCHER_CODE_LENGTH, len(offers))
+    vouchers = []
+    for voucher_code in voucher_codes:
+        voucher = Voucher(
+            name=name[:128],
+            code=voucher_code.upper(),
+            usage=voucher_type,
+            start_datetime=start_datetime,
+            end_datetime=end_datetime
+        )
+        # bulk_create does not call save, which validates vouchers.
+        voucher.clean()
+        vouchers.append(voucher)
 
-    return voucher
+    with transaction.atomic():
+        Voucher.objects.bulk_create(vouchers, batch_size=VOUCHER_BATCH_SIZE)
+
+        # IDs of bulk created objects are not set by all database backends.
+        voucher_ids = {}
+        for batch in _batches([voucher.code for voucher in vouchers]):
+            voucher_ids.update(Voucher.objects.filter(code__in=batch).values_list('code', 'id'))
+        for voucher in vouchers:
+            voucher.id = voucher_ids[voucher.code]
+            voucher._state.adding = False  # pylint: disable=protected-access
+            voucher._state.db = Voucher.objects.db  # pylint: disable=protected-access
+
+        VoucherOffers = Voucher.offers.through
+        VoucherOffers.objects.bulk_create(
+            [
+                VoucherOffers(voucher_id=voucher.id, conditionaloffer_id=offer.id)
+                for voucher, offer in zip(vouchers, offers)
+            ],
+            batch_size=VOUCHER_BATCH_SIZE
+        )
+
+    return vouchers
 
 
 def create_vouchers(
@@ -508,8 +711,6 @@ def create_vouchers(
         List[Voucher]
     """
     logger.info("Creating [%d] vouchers product [%s]", quantity, coupon.id)
-    vouchers = []
-    offers = []
 
     # Maximum number of uses can be set for each voucher type and disturb
     # the predefined behaviours of the different voucher types. Therefor
@@ -558,33 +759,26 @@ def create_vouchers(
     multi_offer = True if (
         voucher_type == Voucher.MULTI_USE or voucher_type == Voucher.ONCE_PER_CUSTOMER
     ) else False
-    num_of_offers = quantity if multi_offer else 1
-    for num in range(num_of_offers):
-        offer = _get_or_create_offer(
-            product_range=product_range,
-            benefit_type=benefit_type,
-            benefit_value=benefit_value,
-            max_uses=max_uses,
-            coupon_id=coupon.id,
-            offer_number=num,
-            email_domains=email_domains,
-            program_uuid=program_uuid,
-            site=site
-        )
-        offers.append(offer)
-
-    for i in range(quantity):
-        voucher = _create_new_voucher(
-            end_datetime=end_datetime,
-            offer=offers[i] if multi_offer else offers[0],
-            start_datetime=start_datetime,
-            voucher_type=voucher_type,
-            code=code,
-            name=name
-        )
-        vouchers.append(voucher)
+    offers = _get_or_create_offers(
+        quantity if multi_offer else 1,
+        product_range=product_range,
+        benefit_type=benefit_type,
+        benefit_value=benefit_value,
+        max_uses=max_uses,
+        coupon_id=coupon.id,
+        email_domains=email_domains,
+        program_uuid=program_uuid,
+        site=site
+    )
 
-    return vouchers
+    return _create_new_vouchers(
+        end_datetime=end_datetime,
+        offers=offers if multi_offer else offers * quantity,
+        start_datetime=start_datetime,
+        voucher_type=voucher_type,
+        code=code,
+        name=name
+    )
 
 
 def get_voucher_discount_info(benefit, price):
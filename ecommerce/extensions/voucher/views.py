@@ -1,7 +1,7 @@
 import csv
 import logging
 
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.utils.text import slugify
 from django.utils.translation import ugettext_lazy as _
 from django.views.generic import View
@@ -19,7 +19,7 @@ StockRecord = get_model('partner', 'StockRecord')
 
 
 class CouponReportCSVView(StaffOnlyMixin, View):
-    """Generates coupon report and returns it in CSV format."""
+    """Generates coupon report and streams it in CSV format."""
 
     def get(self, request, coupon_id):  # pylint: disable=unused-argument
         """
@@ -38,15 +38,34 @@ class CouponReportCSVView(StaffOnlyMixin, View):
             return HttpResponse(_('Failed to find a matching stock record for coupon, report download canceled.'),
                                 status=404)
 
-        response = HttpResponse(content_type='text/csv')
+        response = StreamingHttpResponse(self._generate_csv(field_names, rows), content_type='text/csv')
         response['Content-Disposition'] = 'attachment; filename={}'.format(filename)
+        return response
 
-        writer = csv.DictWriter(response, fieldnames=field_names)
+    def _generate_csv(self, field_names, rows):
+        """ Yields the report as CSV, one line at a time. """
+        csv_buffer = _CSVBuffer()
+        writer = csv.DictWriter(csv_buffer, fieldnames=field_names)
         writer.writeheader()
+        yield csv_buffer.pop()
+
         for row in rows:
             for key, value in row.items():
                 if isinstance(row[key], unicode):
                     row[key] = value.encode('utf-8')
             writer.writerow(row)
+            yield csv_buffer.pop()
 
-        return response
+
+class _CSVBuffer(object):
+    """ File-like object holding the lines written by a CSV writer until they are streamed. """
+
+    def __init__(self):
+        self.value = ''
+
+    def write(self, value):
+        self.value += value
+
+    def pop(self):
+        value, self.value = self.value, ''
+        return value
@@ -3,6 +3,7 @@ import logging
 from django.conf import settings
 
 from ecommerce.cache_utils.utils import TieredCache
+from ecommerce.programs.compiled import CompiledProgram
 
 logger = logging.getLogger(__name__)
 
@@ -32,15 +33,30 @@ class ProgramsApiClient(object):
         program_uuid = str(uuid)
         cache_key = '{site_domain}-program-{uuid}'.format(site_domain=self.site_domain, uuid=program_uuid)
 
-        program_cached_response = TieredCache.get_cached_response(cache_key)
+        def get_program():
+            logging.info('Retrieving details of of program [%s]...', program_uuid)
+            program = self.client.programs(program_uuid).get()
+            logging.info('Program [%s] was successfully retrieved and cached.', program_uuid)
+            return program
 
-        if program_cached_response.is_hit:  # pragma: no cover
-            logger.debug('Program [%s] was found in the cache.', program_uuid)
-            return program_cached_response.value
+        return TieredCache.get_or_compute(cache_key, get_program, self.cache_ttl)
 
-        logging.info('Retrieving details of of program [%s]...', program_uuid)
-        program = self.client.programs(program_uuid).get()
+    def get_compiled_program(self, uuid):
+        """
+        Retrieve a single program, compiled for evaluating program offer conditions.
+
+        The compiled program is cached alongside the program details.
+
+        Args:
+            uuid (str|uuid): Program UUID.
+
+        Returns:
+            CompiledProgram
+        """
+        program_uuid = str(uuid)
+        cache_key = '{site_domain}-compiled-program-{uuid}'.format(site_domain=self.site_domain, uuid=program_uuid)
+
+        def compile_program():
+            return CompiledProgram(self.get_program(program_uuid))
 
-        TieredCache.set_all_tiers(cache_key, program, self.cache_ttl)
-        logging.info('Program [%s] was successfully retrieved and cached.', program_uuid)
-        return program
+        return TieredCache.get_or_compute(cache_key, compile_program, self.cache_ttl)
@@ -0,0 +1,84 @@
+"""
+Compiled representation of programs, used to evaluate program offer conditions.
+
+ProgramCourseRunSeatsCondition checks baskets, and the enrollments and entitlements of
+their owners, against the courses of a program. Rather than walking the program data
+returned by the Discovery Service on every check, the data is compiled once into sets of
+SKUs and maps keyed by course run key and course UUID, and cached alongside the program.
+"""
+
+
+class CompiledCourse(object):
+    """
+    A course of a program.
+
+    Attributes:
+        uuid (str): Course UUID.
+        run_keys (frozenset): Keys of the course's runs.
+        skus (frozenset): SKUs of the course's seats and entitlements of the program's applicable seat types.
+    """
+
+    def __init__(self, uuid, run_keys, skus):
+        self.uuid = uuid
+        self.run_keys = run_keys
+        self.skus = skus
+
+
+class CompiledProgram(object):
+    """
+    A program, compiled from the program details returned by the Discovery Service.
+
+    Attributes:
+        applicable_seat_types (frozenset): Seat types the program applies to.
+        courses (list): CompiledCourse for each course of the program, in program order.
+        applicable_skus (frozenset): SKUs of the seats and entitlements of the applicable seat types.
+        has_entitlements (bool): Whether any course of the program has an entitlement product.
+    """
+
+    def __init__(self, program):
+        self.applicable_seat_types = frozenset(program['applicable_seat_types'])
+        self.courses = []
+        self._courses_by_run_key = {}
+        self._courses_by_uuid = {}
+
+        for course in program['courses']:
+            run_keys = set(course_run.get('key') for course_run in course['course_runs'])
+            course_skus = set(
+                seat['sku']
+                for course_run in course['course_runs'] for seat in course_run['seats']
+                if seat['type'] in self.applicable_seat_types
+            )
+            course_skus.update(
+                entitlement['sku'] for entitlement in course['entitlements']
+                if entitlement['mode'].lower() in self.applicable_seat_types
+            )
+
+            compiled_course = CompiledCourse(course.get('uuid'), frozenset(run_keys), frozenset(course_skus))
+            self.courses.append(compiled_course)
+            for run_key in run_keys:
+                self._courses_by_run_key.setdefault(run_key, []).append(compiled_course)
+            self._courses_by_uuid.setdefault(compiled_course.uuid, []).append(compiled_course)
+
+        self.applicable_skus = frozenset().union(*(course.skus for course in self.courses))
+        self.has_entitlements = any(course['entitlements'] for course in program['courses'])
+
+    def get_owned_courses(self, enrollments, entitlements):
+        """
+        Returns the courses of the program which the user is enrolled in, or has an entitlement for,
+        in one of the applicable seat types.
+
+        Args:
+            enrollments (list): Enrollments of the user, as returned by the LMS Enrollment API.
+            entitlements (list): Entitlements of the user, as returned by the LMS Entitlement API.
+
+        Returns:
+            set: CompiledCourse objects.
+        """
+        owned_courses = set()
+        for enrollment in enrollments:
+            if enrollment['mode'] in self.applicable_seat_types:
+                owned_courses.update(self._courses_by_run_key.get(enrollment['course_details']['course_id'], ()))
+        for entitlement in entitlements:
+            if entitlement['mode'] in self.applicable_seat_types:
+                owned_courses.update(self._courses_by_uuid.get(entitlement['course_uuid'], ()))
+        return owned_courses
@@ -0,0 +1,179 @@
+"""
+Course enrollments and entitlements owned by users, used to evaluate program offer conditions.
+
+Every program offer condition of a basket checks the enrollments, and possibly the entitlements,
+of the basket owner. Rather than each condition calling the LMS, a snapshot of the user's
+enrollments and entitlements is fetched once, with the enrollment request made while the
+entitlement pages are traversed, and shared by every condition through the tiered cache.
+Fulfilling or revoking an enrollment or entitlement invalidates the snapshot of its user.
+"""
+from __future__ import unicode_literals
+
+import logging
+import sys
+import threading
+
+import six
+from django.conf import settings
+from requests.exceptions import ConnectionError, Timeout
+from slumber.exceptions import SlumberBaseException
+
+from ecommerce.cache_utils.utils import TieredCache
+from ecommerce.core.utils import deprecated_traverse_pagination, get_cache_key
+
+logger = logging.getLogger(__name__)
+
+ENROLLMENTS_RESOURCE = 'enrollments'
+ENTITLEMENTS_RESOURCE = 'entitlements'
+
+
+def _get_ownership_cache_key(site, username, resource_name):
+    return get_cache_key(site_domain=site.domain, resource=resource_name, username=username)
+
+
+def _fetch_lms_resource(username, resource_name, fetch):
+    """
+    Calls fetch(username), returning an empty list if the LMS cannot be reached.
+
+    Returns:
+        tuple: The resource, and whether it was retrieved and may be cached.
+    """
+    try:
+        return fetch(username) or [], True
+    except (ConnectionError, SlumberBaseException, Timeout) as exc:
+        logger.error('Failed to retrieve %s : %s', resource_name, str(exc))
+        return [], False
+
+
+def _fetch_entitlements(endpoint):
+    def fetch(username):
+        response = endpoint.get(user=username)
+        if isinstance(response, dict):
+            return deprecated_traverse_pagination(response, endpoint)
+        return response
+    return fetch
+
+
+def _get_fetchers(site_configuration, session=None):
+    """
+    Returns the functions fetching each LMS resource of a user, by resource name.
+
+    Requests are sent through the given session if any, or else the API clients of the site.
+    """
+    if session:
+        enrollment_api_client = site_configuration.create_enrollment_api_client(session)
+        entitlement_api_client = site_configuration.create_entitlement_api_client(session)
+    else:
+        enrollment_api_client = site_configuration.enrollment_api_client
+        entitlement_api_client = site_configuration.entitlement_api_client
+
+    return {
+        ENROLLMENTS_RESOURCE: lambda username: enrollment_api_client.enrollment.get(user=username),
+        ENTITLEMENTS_RESOURCE: _fetch_entitlements(entitlement_api_client.entitlements),
+    }
+
+
+class _FetchThread(threading.Thread):
+    """
+    Fetches an LMS resource in the background.
+
+    The thread only makes HTTP requests, authenticated with an access token resolved by the
+    thread that started it. Caching, and anything else touching the request cache, the Django
+    cache or the database, is left to that thread.
+    """
+
+    def __init__(self, username, resource_name, fetch):
+        super(_FetchThread, self).__init__()
+        self.daemon = True
+        self.username = username
+        self.resource_name = resource_name
+        self.fetch = fetch
+        self.result = None
+        self.exc_info = None
+
+    def run(self):
+        try:
+            self.result = _fetch_lms_resource(self.username, self.resource_name, self.fetch)
+        except Exception:  # pylint: disable=broad-except
+            self.exc_info = sys.exc_info()
+
+    def get_result(self):
+        self.join()
+        if self.exc_info:
+            six.reraise(*self.exc_info)
+        return self.result
+
+
+def get_user_ownership(site, user, include_entitlements=False):
+    """
+    Returns the course enrollments, and optionally the course entitlements, of the user.
+
+    Cached values are returned if available. Otherwise the enrollments are retrieved from the LMS
+    Enrollment API while the pages of the LMS Entitlement API are traversed, and both are cached
+    for ``settings.LMS_API_CACHE_TIMEOUT`` seconds. Resources which could not be retrieved are
+    returned as empty lists, and are not cached.
+
+    Args:
+        site (Site): Site whose LMS should be queried.
+        user (User): User whose enrollments and entitlements should be returned.
+        include_entitlements (bool): Whether entitlements should be retrieved.
+
+    Returns:
+        tuple: List of enrollments and list of entitlements. The entitlements are empty
+            unless include_entitlements is set.
+    """
+    site_configuration = site.siteconfiguration
+    resource_names = [ENROLLMENTS_RESOURCE, ENTITLEMENTS_RESOURCE] if include_entitlements else [ENROLLMENTS_RESOURCE]
+    cache_keys = {
+        resource_name: _get_ownership_cache_key(site, user.username, resource_name) for resource_name in resource_names
+    }
+    cached_responses = TieredCache.get_many(cache_keys.values())
+    ownership = {
+        resource_name: cached_responses[cache_key].value
+        for resource_name, cache_key in cache_keys.items() if cached_responses[cache_key].is_hit
+    }
+
+    missing = [resource_name for resource_name in sorted(resource_names) if resource_name not in ownership]
+    if missing:
+        # Only one resource is fetched in the current thread, which is the one allowed to query the
+        # database, e.g. for the waffle switch checked while traversing entitlement pages.
+        threads = []
+        if len(missing) > 1:
+            thread_fetchers = _get_fetchers(
+                site_configuration,
+                site_configuration.create_api_session(access_token=site_configuration.access_token)
+            )
+            threads = [
+                _FetchThread(user.username, resource_name, thread_fetchers[resource_name])
+                for resource_name in missing[:-1]
+            ]
+        for thread in threads:
+            thread.start()
+        fetch = _get_fetchers(site_configuration)[missing[-1]]
+        results = {missing[-1]: _fetch_lms_resource(user.username, missing[-1], fetch)}
+        for thread in threads:
+            results[thread.resource_name] = thread.get_result()
+
+        retrieved = {}
+        for resource_name, (value, cacheable) in results.items():
+            ownership[resource_name] = value
+            if cacheable:
+                retrieved[cache_keys[resource_name]] = value
+        TieredCache.set_many_all_tiers(retrieved, settings.LMS_API_CACHE_TIMEOUT)
+
+    return ownership[ENROLLMENTS_RESOURCE], ownership.get(ENTITLEMENTS_RESOURCE, [])
+
+
+def invalidate_user_ownership(site, user):
+    """
+    Discards the cached enrollments and entitlements of the user, e.g. after they changed.
+
+    Args:
+        site (Site): Site whose LMS the enrollments and entitlements were retrieved from, if any.
+        user (User): User whose enrollments and entitlements should be discarded.
+    """
+    if not site:
+        return
+
+    for resource_name in (ENROLLMENTS_RESOURCE, ENTITLEMENTS_RESOURCE):
+        TieredCache.delete_all_tiers(_get_ownership_cache_key(site, user.username, resource_name))
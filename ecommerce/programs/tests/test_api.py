@@ -4,6 +4,7 @@ import httpretty
 from requests import ConnectionError
 
 from ecommerce.programs.api import ProgramsApiClient
+from ecommerce.programs.compiled import CompiledProgram
 from ecommerce.programs.tests.mixins import ProgramTestMixin
 from ecommerce.tests.testcases import TestCase
 
@@ -35,3 +36,17 @@ class ProgramsApiClientTests(ProgramTestMixin, TestCase):
         self.client.site_domain = 'different-domain'
         with self.assertRaises(ConnectionError):
             self.client.get_program(program_uuid)
+
+    def test_get_compiled_program(self):
+        """ The method should return the compiled program. The compiled program should be cached. """
+        program_uuid = uuid.uuid4()
+        data = self.mock_program_detail_endpoint(program_uuid, self.site_configuration.discovery_api_url)
+        compiled_program = self.client.get_compiled_program(program_uuid)
+        self.assertIsInstance(compiled_program, CompiledProgram)
+        self.assertEqual(len(compiled_program.courses), len(data['courses']))
+
+        # Subsequent calls should pull from the cache
+        httpretty.disable()
+        self.assertEqual(
+            self.client.get_compiled_program(program_uuid).applicable_skus, compiled_program.applicable_skus
+        )
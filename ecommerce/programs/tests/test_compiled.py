@@ -0,0 +1,48 @@
+from ecommerce.programs.compiled import CompiledProgram
+from ecommerce.tests.testcases import TestCase
+
+
+class CompiledProgramTests(TestCase):
+    def setUp(self):
+        super(CompiledProgramTests, self).setUp()
+        self.program = {
+            'applicable_seat_types': ['verified', 'professional'],
+            'courses': [
+                {
+                    'uuid': 'course-1',
+                    'course_runs': [
+                        {'key': 'run-1a', 'seats': [{'type': 'audit', 'sku': 'A1'}, {'type': 'verified', 'sku': 'V1'}]},
+                        {'key': 'run-1b', 'seats': [{'type': 'verified', 'sku': 'V2'}]},
+                    ],
+                    'entitlements': [{'mode': 'Verified', 'sku': 'E1'}],
+                },
+                {
+                    'uuid': 'course-2',
+                    'course_runs': [{'key': 'run-2', 'seats': [{'type': 'professional', 'sku': 'P1'}]}],
+                    'entitlements': [],
+                },
+            ],
+        }
+        self.compiled_program = CompiledProgram(self.program)
+
+    def test_skus(self):
+        """ Verify the SKUs of the program are indexed by course. """
+        course_1, course_2 = self.compiled_program.courses  # pylint: disable=unbalanced-tuple-unpacking
+        self.assertEqual(course_1.skus, frozenset(['V1', 'V2', 'E1']))
+        self.assertEqual(course_1.run_keys, frozenset(['run-1a', 'run-1b']))
+        self.assertEqual(course_2.skus, frozenset(['P1']))
+        self.assertEqual(self.compiled_program.applicable_skus, frozenset(['V1', 'V2', 'E1', 'P1']))
+        self.assertTrue(self.compiled_program.has_entitlements)
+
+    def test_get_owned_courses(self):
+        """ Verify only enrollments and entitlements of applicable seat types count as owning a course. """
+        course_1, course_2 = self.compiled_program.courses  # pylint: disable=unbalanced-tuple-unpacking
+        enrollments = [
+            {'mode': 'verified', 'course_details': {'course_id': 'run-1b'}},
+            {'mode': 'audit', 'course_details': {'course_id': 'run-2'}},
+            {'mode': 'verified', 'course_details': {'course_id': 'other-run'}},
+        ]
+        self.assertEqual(self.compiled_program.get_owned_courses(enrollments, []), {course_1})
+
+        entitlements = [{'mode': 'professional', 'course_uuid': 'course-2'}]
+        self.assertEqual(self.compiled_program.get_owned_courses([], entitlements), {course_2})
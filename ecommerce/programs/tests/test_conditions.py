@@ -8,6 +8,7 @@ from slumber.exceptions import HttpNotFoundError, SlumberBaseException
 from ecommerce.core.constants import COURSE_ENTITLEMENT_PRODUCT_CLASS_NAME
 from ecommerce.courses.models import Course
 from ecommerce.extensions.test import factories
+from ecommerce.programs.compiled import CompiledProgram
 from ecommerce.programs.tests.mixins import ProgramTestMixin
 from ecommerce.tests.factories import ProductFactory, SiteConfigurationFactory
 from ecommerce.tests.testcases import TestCase
@@ -128,8 +129,8 @@ class ProgramCourseRunSeatsConditionTests(ProgramTestMixin, TestCase):
         # Verify the user enrollments are cached
         basket.site.siteconfiguration.enable_partial_program = True
         httpretty.disable()
-        with mock.patch('ecommerce.programs.conditions.get_program',
-                        return_value=program):
+        with mock.patch('ecommerce.programs.conditions.get_compiled_program',
+                        return_value=CompiledProgram(program)):
             self.assertTrue(self.condition.is_satisfied(offer, basket))
 
     @ddt.data(HttpNotFoundError, SlumberBaseException, Timeout)
@@ -139,7 +140,7 @@ class ProgramCourseRunSeatsConditionTests(ProgramTestMixin, TestCase):
         basket = factories.BasketFactory(site=self.site, owner=factories.UserFactory())
         basket.add_product(self.test_product)
 
-        with mock.patch('ecommerce.programs.conditions.get_program',
+        with mock.patch('ecommerce.programs.conditions.get_compiled_program',
                         side_effect=value):
             self.assertFalse(self.condition.is_satisfied(offer, basket))
 
@@ -236,8 +237,8 @@ class ProgramCourseRunSeatsConditionTests(ProgramTestMixin, TestCase):
         # Verify the user enrollments are cached
         basket.site.siteconfiguration.enable_partial_program = True
         httpretty.disable()
-        with mock.patch('ecommerce.programs.conditions.get_program',
-                        return_value=program):
+        with mock.patch('ecommerce.programs.conditions.get_compiled_program',
+                        return_value=CompiledProgram(program)):
             self.assertTrue(self.condition.is_satisfied(offer, basket))
 
     @httpretty.activate
@@ -267,28 +268,6 @@ class ProgramCourseRunSeatsConditionTests(ProgramTestMixin, TestCase):
                 if seat.attr.id_verification_required:
                     basket.add_product(seat)
 
-        with mock.patch('ecommerce.programs.conditions.deprecated_traverse_pagination') as mock_processing_entitlements:
+        with mock.patch('ecommerce.programs.ownership.deprecated_traverse_pagination') as mock_processing_entitlements:
             self.assertFalse(self.condition.is_satisfied(offer, basket))
             mock_processing_entitlements.assert_not_called()
-
-    @httpretty.activate
-    def test_get_lms_resource_for_user_caching_none(self):
-        """
-        LMS resource should be properly cached when enrollments is None.
-        """
-        basket = factories.BasketFactory(site=self.site, owner=factories.UserFactory())
-        resource_name = 'test_resource_name'
-        mock_endpoint = mock.Mock()
-        mock_endpoint.get.return_value = None
-
-        return_value = self.condition._get_lms_resource_for_user(basket, resource_name, mock_endpoint)  # pylint: disable=protected-access
-
-        self.assertEqual(return_value, [])
-        self.assertEquals(mock_endpoint.get.call_count, 1, 'Endpoint should be called before caching.')
-
-        mock_endpoint.reset_mock()
-
-        return_value = self.condition._get_lms_resource_for_user(basket, resource_name, mock_endpoint)  # pylint: disable=protected-access
-
-        self.assertEqual(return_value, [])
-        self.assertEquals(mock_endpoint.get.call_count, 0, 'Endpoint should NOT be called after caching.')
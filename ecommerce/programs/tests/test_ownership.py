@@ -0,0 +1,142 @@
+import json
+import threading
+
+import httpretty
+import mock
+from testfixtures import LogCapture
+
+from ecommerce.core.models import SiteConfiguration
+from ecommerce.core.url_utils import get_lms_enrollment_api_url, get_lms_entitlement_api_url
+from ecommerce.programs.ownership import get_user_ownership, invalidate_user_ownership
+from ecommerce.programs.tests.mixins import ProgramTestMixin
+from ecommerce.tests.testcases import TestCase
+
+LOGGER_NAME = 'ecommerce.programs.ownership'
+
+
+class UserOwnershipTests(ProgramTestMixin, TestCase):
+    def setUp(self):
+        super(UserOwnershipTests, self).setUp()
+        self.user = self.create_user()
+        self.enrollments = [{'mode': 'verified', 'course_details': {'course_id': 'course-v1:test-org+course+1'}}]
+        self.entitlements = [
+            {'mode': 'verified', 'course_uuid': '268afbfc-cc1e-415b-a5d8-c58d955bcfc1'},
+            {'mode': 'verified', 'course_uuid': '268afbfc-cc1e-415b-a5d8-c58d955bcfc2'},
+        ]
+
+    def mock_entitlement_pages(self):
+        """ Mocks two pages of entitlements on the LMS Entitlement API. """
+        url = '{}entitlements/'.format(get_lms_entitlement_api_url())
+        pages = [
+            {'results': self.entitlements[:1], 'next': '{}?user={}&page=2'.format(url, self.user.username)},
+            {'results': self.entitlements[1:], 'next': None},
+        ]
+        httpretty.register_uri(
+            httpretty.GET,
+            url,
+            responses=[
+                httpretty.Response(body=json.dumps(page), content_type='application/json') for page in pages
+            ]
+        )
+
+    @httpretty.activate
+    def test_get_user_ownership(self):
+        """ Enrollments and every page of entitlements should be retrieved, and cached for subsequent calls. """
+        self.mock_user_data(self.user.username, owned_products=self.enrollments)
+        self.mock_entitlement_pages()
+        expected = (self.enrollments, self.entitlements)
+
+        self.assertEqual(get_user_ownership(self.site, self.user, include_entitlements=True), expected)
+
+        httpretty.disable()
+        self.assertEqual(get_user_ownership(self.site, self.user, include_entitlements=True), expected)
+
+    @httpretty.activate
+    def test_get_user_ownership_access_token(self):
+        """ The access token should only be read by the calling thread, and sent by every request. """
+        self.mock_user_data(self.user.username, owned_products=self.enrollments)
+        self.mock_entitlement_pages()
+        reading_threads = []
+
+        def access_token():
+            reading_threads.append(threading.current_thread())
+            return 'token'
+
+        with mock.patch.object(SiteConfiguration, 'access_token', new_callable=mock.PropertyMock,
+                               side_effect=access_token):
+            get_user_ownership(self.site, self.user, include_entitlements=True)
+
+        self.assertTrue(reading_threads)
+        self.assertEqual(set(reading_threads), {threading.current_thread()})
+        for request in httpretty.httpretty.latest_requests:
+            self.assertEqual(request.headers.get('Authorization'), 'JWT token')
+
+    @httpretty.activate
+    def test_get_user_ownership_without_entitlements(self):
+        """ Entitlements should only be retrieved if requested. """
+        self.mock_user_data(self.user.username, owned_products=self.enrollments)
+
+        with mock.patch('ecommerce.programs.ownership.deprecated_traverse_pagination') as mock_traverse_pagination:
+            self.assertEqual(get_user_ownership(self.site, self.user), (self.enrollments, []))
+            self.assertFalse(mock_traverse_pagination.called)
+
+        self.assertFalse(any('entitlements' in request.path for request in httpretty.httpretty.latest_requests))
+
+    @httpretty.activate
+    def test_get_user_ownership_caching_none(self):
+        """ Resources returned as None should be cached as empty lists. """
+        self.mock_access_token_response()
+        httpretty.register_uri(
+            httpretty.GET, get_lms_enrollment_api_url(), body='null', content_type='application/json'
+        )
+
+        self.assertEqual(get_user_ownership(self.site, self.user), ([], []))
+
+        httpretty.disable()
+        self.assertEqual(get_user_ownership(self.site, self.user), ([], []))
+
+    @httpretty.activate
+    def test_get_user_ownership_failure(self):
+        """ Resources which cannot be retrieved should be logged, returned as empty lists, and not cached. """
+        self.mock_user_data(self.user.username, owned_products=self.enrollments)
+        self.mock_user_data(self.user.username, mocked_api='entitlements', response_code=500)
+
+        with LogCapture(LOGGER_NAME) as logger:
+            self.assertEqual(
+                get_user_ownership(self.site, self.user, include_entitlements=True), (self.enrollments, [])
+            )
+            self.assertEqual(logger.records[0].getMessage().split(' : ')[0], 'Failed to retrieve entitlements')
+
+        self.mock_user_data(self.user.username, mocked_api='entitlements', owned_products=self.entitlements)
+        self.assertEqual(
+            get_user_ownership(self.site, self.user, include_entitlements=True), (self.enrollments, self.entitlements)
+        )
+
+    @httpretty.activate
+    def test_get_user_ownership_background_error(self):
+        """ Unexpected errors raised while retrieving enrollments in the background should be re-raised. """
+        def fetch_lms_resource(username, resource_name, fetch):  # pylint: disable=unused-argument
+            if resource_name == 'enrollments':
+                raise ValueError
+            return [], True
+
+        self.mock_access_token_response()
+        with mock.patch('ecommerce.programs.ownership._fetch_lms_resource', side_effect=fetch_lms_resource):
+            with self.assertRaises(ValueError):
+                get_user_ownership(self.site, self.user, include_entitlements=True)
+
+    @httpretty.activate
+    def test_invalidate_user_ownership(self):
+        """ Invalidating the ownership of a user should discard their cached enrollments and entitlements. """
+        self.mock_user_data(self.user.username, owned_products=self.enrollments)
+        self.mock_user_data(self.user.username, mocked_api='entitlements', owned_products=self.entitlements)
+        get_user_ownership(self.site, self.user, include_entitlements=True)
+
+        self.mock_user_data(self.user.username, owned_products=[])
+        self.mock_user_data(self.user.username, mocked_api='entitlements', owned_products=[])
+        self.assertEqual(
+            get_user_ownership(self.site, self.user, include_entitlements=True), (self.enrollments, self.entitlements)
+        )
+
+        invalidate_user_ownership(self.site, self.user)
+        self.assertEqual(get_user_ownership(self.site, self.user, include_entitlements=True), ([], []))
@@ -36,3 +36,33 @@ def get_program(program_uuid, siteconfiguration):
         log.debug(msg)
 
     return response
+
+
+def get_compiled_program(program_uuid, siteconfiguration):
+    """
+    Returns the program identified by the program_uuid, compiled for evaluating program offer conditions.
+
+    Like the program details, compiled programs are cached for ``settings.PROGRAM_CACHE_TIMEOUT`` seconds.
+
+    Args:
+        siteconfiguration (SiteConfiguration): Configuration containing the requisite parameters
+            to connect to the Discovery Service.
+
+        program_uuid (uuid): id to query the specified program
+
+    Returns:
+        CompiledProgram
+        None if not found or another error occurs
+    """
+    response = None
+    try:
+        client = ProgramsApiClient(siteconfiguration.discovery_api_client, siteconfiguration.site.domain)
+        response = client.get_compiled_program(str(program_uuid))
+    except HttpNotFoundError:
+        msg = 'No program data found for {}'.format(program_uuid)
+        log.debug(msg)
+    except (ConnectionError, SlumberBaseException, Timeout):
+        msg = 'Failed to retrieve program details for {}'.format(program_uuid)
+        log.debug(msg)
+
+    return response
@@ -8,6 +8,7 @@ from oscar.core.loading import get_class, get_model
 from ecommerce.core.url_utils import get_lms_url
 from ecommerce.courses.utils import mode_for_product
 from ecommerce.extensions.analytics.utils import silence_exceptions
+from ecommerce.extensions.checkout.utils import get_basket_attribute_value
 
 logger = logging.getLogger(__name__)
 post_checkout = get_class('checkout.signals', 'post_checkout')
@@ -40,12 +41,7 @@ def process_checkout_complete(sender, order=None, user=None, request=None,  # py
         message_id = request.COOKIES.get('sailthru_bid')
 
     if not message_id:
-        saved_id = BasketAttribute.objects.filter(
-            basket=order.basket,
-            attribute_type=get_basket_attribute_type()
-        )
-        if len(saved_id) > 0:
-            message_id = saved_id[0].value_text
+        message_id = get_basket_attribute_value(order.basket, SAILTHRU_CAMPAIGN)
 
     # loop through lines in order
     #  If multi product orders become common it may be worthwhile to pass an array of
@@ -60,9 +60,10 @@ OSCAR_LINE_STATUS_PIPELINE = {
         LINE.FULFILLMENT_SERVER_ERROR,
     ),
     LINE.FULFILLMENT_CONFIGURATION_ERROR: (LINE.COMPLETE,),
-    LINE.FULFILLMENT_NETWORK_ERROR: (LINE.COMPLETE,),
-    LINE.FULFILLMENT_TIMEOUT_ERROR: (LINE.COMPLETE,),
-    LINE.FULFILLMENT_SERVER_ERROR: (LINE.COMPLETE,),
+    # Retrying fulfillment after a network or server error may fail with a different error.
+    LINE.FULFILLMENT_NETWORK_ERROR: (LINE.COMPLETE, LINE.FULFILLMENT_TIMEOUT_ERROR, LINE.FULFILLMENT_SERVER_ERROR),
+    LINE.FULFILLMENT_TIMEOUT_ERROR: (LINE.COMPLETE, LINE.FULFILLMENT_NETWORK_ERROR, LINE.FULFILLMENT_SERVER_ERROR),
+    LINE.FULFILLMENT_SERVER_ERROR: (LINE.COMPLETE, LINE.FULFILLMENT_NETWORK_ERROR, LINE.FULFILLMENT_TIMEOUT_ERROR),
     LINE.COMPLETE: (),
 }
 
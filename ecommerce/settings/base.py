@@ -180,10 +180,13 @@ TEMPLATES = [
         ),
         'OPTIONS': {
             'loaders': [
-                # ThemeTemplateLoader should come before any other loader to give theme templates
-                # priority over system templates
-                'ecommerce.theming.template_loaders.ThemeTemplateLoader',
-                'django.template.loaders.app_directories.Loader',
+                # Compiled templates are cached separately for each theme.
+                ('ecommerce.theming.template_loaders.CachedThemeTemplateLoader', [
+                    # ThemeTemplateLoader should come before any other loader to give theme templates
+                    # priority over system templates
+                    'ecommerce.theming.template_loaders.ThemeTemplateLoader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
             ],
             'context_processors': (
                 'django.contrib.auth.context_processors.auth',
@@ -219,7 +222,7 @@ MIDDLEWARE_CLASSES = (
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.auth.middleware.SessionAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
-    'django_sites_extensions.middleware.CurrentSiteWithDefaultMiddleware',
+    'ecommerce.core.middleware.CurrentSiteMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'waffle.middleware.WaffleMiddleware',
     # NOTE: The overridden BasketMiddleware relies on request.site. This middleware
@@ -245,6 +248,19 @@ COMMERCE_API_TIMEOUT = 7
 
 # Cache course info from course API.
 COURSES_API_CACHE_TIMEOUT = 3600  # Value is in seconds
+
+# Cache failed Discovery and Enterprise API calls, so that later requests fail fast.
+API_ERROR_CACHE_TIMEOUT = 30  # Value is in seconds.
+
+# Number of consecutive failures after which calls to the Discovery and Enterprise
+# services fail fast, and for how long.
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = 5
+CIRCUIT_BREAKER_RESET_TIMEOUT = 30  # Value is in seconds.
+
+# Keep-alive connection pool shared by API clients: the number of hosts connections are kept to,
+# and the number of connections kept to each host.
+API_CLIENT_POOL_CONNECTIONS = 10
+API_CLIENT_POOL_MAXSIZE = 10
 PROGRAM_CACHE_TIMEOUT = 3600  # Value is in seconds.
 
 # PROVIDER DATA PROCESSING
@@ -254,8 +270,15 @@ CREDIT_PROVIDER_CACHE_TIMEOUT = 600
 # Anonymous User Calculate Cache timeout
 ANONYMOUS_BASKET_CALCULATE_CACHE_TIMEOUT = 3600  # Value is in seconds.
 
+# Maximum number of baskets calculated by a single request to the batch calculate endpoint
+BASKET_CALCULATE_BATCH_MAX_BASKETS = 50
+
 # LMS API settings used for fetching information from LMS
 LMS_API_CACHE_TIMEOUT = 30  # Value is in seconds.
+
+# Maximum number of entries held in the per-request cache. Least recently used
+# entries are evicted once the limit is reached. Set to None for no limit.
+REQUEST_CACHE_MAX_ENTRIES = 1000
 # END URL CONFIGURATION
 
 VOUCHER_CACHE_TIMEOUT = 10  # Value is in seconds.
@@ -501,6 +524,7 @@ BROKER_HEARTBEAT_CHECKRATE = 2
 # See http://celery.readthedocs.io/en/latest/userguide/configuration.html#imports.
 CELERY_IMPORTS = (
     'ecommerce_worker.fulfillment.v1.tasks',
+    'ecommerce.extensions.fulfillment.tasks',
 )
 
 CELERY_ROUTES = {
@@ -516,6 +540,11 @@ CELERYD_HIJACK_ROOT_LOGGER = False
 # Execute tasks locally (synchronously) instead of sending them to the queue.
 # See http://celery.readthedocs.io/en/latest/userguide/configuration.html#task-always-eager.
 CELERY_ALWAYS_EAGER = False
+
+# Maximum number of retries of an order line fulfillment task, see ecommerce.extensions.fulfillment.tasks.
+FULFILLMENT_TASK_MAX_RETRIES = 5
+# Seconds before the first retry of an order line fulfillment task. The delay doubles after every retry.
+FULFILLMENT_TASK_RETRY_BACKOFF = 30
 # END CELERY
 
 
@@ -598,3 +627,11 @@ if os.environ.get('ENABLE_DJANGO_TOOLBAR', False):
 
 # Determines if events are actually sent to Segment. This should only be set to False for testing purposes.
 SEND_SEGMENT_EVENTS = True
+
+# Segment events are buffered in each process, and sent from a background thread, in batches of up to
+# SEGMENT_EVENT_BATCH_SIZE events, at most SEGMENT_EVENT_FLUSH_INTERVAL seconds after they are buffered.
+# Events are dropped once SEGMENT_EVENT_BUFFER_SIZE events are waiting.
+SEGMENT_EVENT_BUFFER_ENABLED = True
+SEGMENT_EVENT_BUFFER_SIZE = 10000
+SEGMENT_EVENT_BATCH_SIZE = 100
+SEGMENT_EVENT_FLUSH_INTERVAL = 1
@@ -11,6 +11,9 @@ from ecommerce.settings.base import *
 DEBUG = True
 ALLOWED_HOSTS = ['*']
 INTERNAL_IPS = ['127.0.0.1']
+
+# Reload templates as they are edited, rather than caching them.
+TEMPLATES[0]['OPTIONS']['loaders'] = TEMPLATES[0]['OPTIONS']['loaders'][0][1]
 # END DEBUG CONFIGURATION
 
 # EMAIL CONFIGURATION
@@ -160,6 +160,9 @@ ENTERPRISE_API_URL = urljoin(ENTERPRISE_SERVICE_URL, 'api/v1/')
 # Don't bother sending fake events to Segment. Doing so creates unnecessary threads.
 SEND_SEGMENT_EVENTS = False
 
+# Track events with the Segment client of the site configuration, so tests can assert on them synchronously.
+SEGMENT_EVENT_BUFFER_ENABLED = False
+
 # SPEED
 DEBUG = False
 TEMPLATE_DEBUG = False
@@ -6,6 +6,7 @@ Components:
     Template Loaders (ecommerce.theming.template_loaders.ThemeTemplateLoader):
         Theming aware template loaders, this loader will first look in template directories of current theme and then
         it will look at system template dirs.
+        CachedThemeTemplateLoader wraps it, caching compiled templates separately for each theme.
         ThemeFilesFinder looks for static assets inside theme directories. It creates separate storage for each theme.
 
     Static Files Finders (ecommerce.theming.finders.ThemeFilesFinder):
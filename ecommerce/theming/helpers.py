@@ -11,6 +11,10 @@ from threadlocals.threadlocals import get_current_request
 
 logger = logging.getLogger(__name__)
 
+# Base directories of themes, keyed by COMPREHENSIVE_THEME_DIRS and theme directory name. Themes are
+# only looked up on the filesystem once per process, so themes added or moved require a restart.
+_theme_base_dirs = {}
+
 
 def get_current_site_theme():
     """
@@ -65,8 +69,14 @@ def get_theme_base_dir(theme_dir_name, suppress_error=False):
     Returns:
         (str): Base directory that contains the given theme
     """
+    key = (tuple(settings.COMPREHENSIVE_THEME_DIRS), theme_dir_name)
+    themes_dir = _theme_base_dirs.get(key)
+    if themes_dir:
+        return themes_dir
+
     for themes_dir in get_theme_base_dirs():
         if theme_dir_name in (_dir for _dir in os.listdir(themes_dir) if is_theme_dir(themes_dir / _dir)):
+            _theme_base_dirs[key] = themes_dir
             return themes_dir
 
     if suppress_error:
@@ -1,6 +1,9 @@
 """
 Tests for Management commands of comprehensive theming.
 """
+import shutil
+import tempfile
+
 from django.conf import settings
 from django.core.management import CommandError, call_command
 from django.test import TestCase, override_settings
@@ -12,9 +15,12 @@ from ecommerce.theming.management.commands.update_assets import (
     SYSTEM_SASS_PATHS,
     Command,
     compile_sass,
-    get_sass_directories
+    get_sass_directories,
+    group_sass_directories
 )
 
+UPDATE_ASSETS_MODULE = 'ecommerce.theming.management.commands.update_assets'
+
 
 class TestUpdateAssets(TestCase):
     """
@@ -126,6 +132,19 @@ class TestUpdateAssets(TestCase):
         returned_dirs = get_sass_directories(themes=[], system=True)
         self.assertItemsEqual(expected_directories, returned_dirs)
 
+    def test_group_sass_directories(self):
+        """ Sass directories compiled into the same css directory should be grouped, in order. """
+        themes_dir = settings.COMPREHENSIVE_THEME_DIRS[0]
+        groups = group_sass_directories(get_sass_directories(themes=get_themes(), system=True))
+
+        theme_dir = themes_dir / 'test-theme-2' / 'static'
+
+        self.assertEqual(
+            [sass_dir['sass_source_dir'] for sass_dir in groups[theme_dir / 'css' / 'base']],
+            [Path('ecommerce/static/sass/base'), theme_dir / 'sass' / 'base']
+        )
+        self.assertEqual(len(groups), 4)
+
     def test_non_existent_sass_dir_error(self):
         """
         Test ValueError is raised if sass directory provided to the compile_sass method does not exist.
@@ -157,3 +176,89 @@ class TestUpdateAssets(TestCase):
             call_command("update_assets", "--skip-collect", "--skip-system", themes=[])
 
             self.assertFalse(mock_call_command.called)
+
+
+class TestIncrementalUpdateAssets(TestCase):
+    """
+    Test parallel and incremental compilation of sass by the update_assets command.
+    """
+    def setUp(self):
+        super(TestIncrementalUpdateAssets, self).setUp()
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root)
+
+        partials_dir = self.root / 'sass' / 'partials'
+        partials_dir.makedirs_p()
+        (partials_dir / '_colors.scss').write_text('$primary: #000;')
+
+        vendor_dir = self.root.joinpath('vendor')
+        vendor_dir.makedirs_p()
+        (vendor_dir / '_grid.scss').write_text('.row { display: block; }')
+        (vendor_dir / 'grid.js').write_text('var grid;')
+
+        self.sass_dirs = []
+        for name in ('system', 'theme'):
+            sass_dir = self.root / name / 'sass'
+            sass_dir.makedirs_p()
+            (sass_dir / 'main.scss').write_text(
+                '@import "colors"; @import "../../vendor/grid"; body { color: $primary; }'
+            )
+            self.sass_dirs.append({
+                'sass_source_dir': sass_dir,
+                'css_destination_dir': self.root / name / 'css',
+                'lookup_paths': [partials_dir],
+            })
+
+        for target, value in (
+                ('get_sass_directories', Mock(return_value=self.sass_dirs)),
+                ('SASS_VENDOR_PATHS', [vendor_dir]),
+                ('SASS_MANIFEST_PATH', self.root / 'manifest.json'),
+        ):
+            patcher = patch('{}.{}'.format(UPDATE_ASSETS_MODULE, target), value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def update_assets(self, *args):
+        """ Runs update_assets, returning the sass directories which were compiled. """
+        with patch('{}.compile_sass'.format(UPDATE_ASSETS_MODULE), wraps=compile_sass) as mock_compile_sass:
+            call_command('update_assets', '--skip-collect', '--processes=1', *args)
+        return [call[1]['sass_source_dir'] for call in mock_compile_sass.call_args_list]
+
+    def test_unchanged_sources_skipped(self):
+        """ Sass directories should only be compiled again if their sources or compiled css changed. """
+        system_sass_dir, theme_sass_dir = [sass_dir['sass_source_dir'] for sass_dir in self.sass_dirs]
+
+        self.assertEqual(self.update_assets(), [system_sass_dir, theme_sass_dir])
+        self.assertIn('color: #000', (self.root / 'theme' / 'css' / 'main.css').text())
+        self.assertEqual(self.update_assets(), [])
+
+        (theme_sass_dir / 'main.scss').write_text(
+            '@import "colors"; @import "../../vendor/grid"; a { color: $primary; }'
+        )
+        self.assertEqual(self.update_assets(), [theme_sass_dir])
+
+        (self.root / 'sass' / 'partials' / '_colors.scss').write_text('$primary: #fff;')
+        self.assertEqual(self.update_assets(), [system_sass_dir, theme_sass_dir])
+
+        (self.root / 'vendor' / 'grid.js').write_text('var grid = {};')
+        self.assertEqual(self.update_assets(), [])
+
+        (self.root / 'vendor' / '_grid.scss').write_text('.row { display: flex; }')
+        self.assertEqual(self.update_assets(), [system_sass_dir, theme_sass_dir])
+        self.assertIn('display: flex', (self.root / 'theme' / 'css' / 'main.css').text())
+
+        (self.root / 'system' / 'css' / 'main.css').remove()
+        self.assertEqual(self.update_assets(), [system_sass_dir])
+
+        self.assertEqual(self.update_assets('--force'), [system_sass_dir, theme_sass_dir])
+        self.assertEqual(self.update_assets('--output-style=compressed'), [system_sass_dir, theme_sass_dir])
+
+    def test_parallel_compilation(self):
+        """ Each css directory should be compiled by a separate process. """
+        with patch('{}.Pool'.format(UPDATE_ASSETS_MODULE)) as mock_pool:
+            mock_pool.return_value.map.side_effect = map
+            call_command('update_assets', '--skip-collect', '--processes=4')
+
+        mock_pool.assert_called_once_with(2)
+        self.assertTrue((self.root / 'system' / 'css' / 'main.css').isfile())
+        self.assertTrue((self.root / 'theme' / 'css' / 'main.css').isfile())
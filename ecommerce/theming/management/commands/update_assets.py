@@ -5,7 +5,11 @@ Managements for asset compilation and collection.
 from __future__ import unicode_literals
 
 import datetime
+import hashlib
+import json
 import logging
+from collections import OrderedDict
+from multiprocessing import Pool, cpu_count
 
 import sass
 from django.conf import settings
@@ -25,6 +29,17 @@ SYSTEM_SASS_PATHS = [
     Path("ecommerce/static/sass"),
 ]
 
+# Directories of third-party stylesheets, which sass files import by relative path.
+SASS_VENDOR_PATHS = [
+    Path("ecommerce/static/bower_components"),
+    Path("ecommerce/static/vendor"),
+]
+SASS_SOURCE_EXTENSIONS = ('.scss', '.sass', '.css')
+
+# Content hashes of the sources of the css directories compiled by previous runs, keyed by css directory.
+# The file is hidden, so that collectstatic ignores it.
+SASS_MANIFEST_PATH = Path("ecommerce/static/css/.sass-manifest.json")
+
 
 class Command(BaseCommand):
     """
@@ -88,6 +103,22 @@ class Command(BaseCommand):
             help="Skip collection of static assets.",
         )
 
+        parser.add_argument(
+            '--force',
+            dest='force',
+            action='store_true',
+            default=False,
+            help="Compile sass even if its sources did not change since it was last compiled.",
+        )
+
+        parser.add_argument(
+            '--processes',
+            type=int,
+            dest='processes',
+            default=cpu_count(),
+            help="Number of processes compiling sass in parallel (default: number of CPUs).",
+        )
+
     @staticmethod
     def parse_arguments(*args, **options):  # pylint: disable=unused-argument
         """
@@ -140,7 +171,6 @@ class Command(BaseCommand):
         Handle update_assets command.
         """
         logger.info("Sass compilation started.")
-        info = []
 
         themes, system, source_comments, output_style, collect = self.parse_arguments(*args, **options)
 
@@ -148,20 +178,31 @@ class Command(BaseCommand):
             themes = []
             logger.info("Skipping theme sass compilation as theming is disabled.")
 
-        for sass_dir in get_sass_directories(themes, system):
-            result = compile_sass(
-                sass_source_dir=sass_dir['sass_source_dir'],
-                css_destination_dir=sass_dir['css_destination_dir'],
-                lookup_paths=sass_dir['lookup_paths'],
-                output_style=output_style,
-                source_comments=source_comments,
-            )
-            info.append(result)
+        force = options.get('force', False)
+        processes = options.get('processes') or 1
 
-        logger.info("Sass compilation completed.")
+        manifest = {} if force else load_sass_manifest()
+        pending, skipped = [], []
+        for css_dir, sass_dirs in group_sass_directories(get_sass_directories(themes, system)).items():
+            source_hash = get_sass_source_hash(sass_dirs, output_style, source_comments)
+            if manifest.get(css_dir) == source_hash and is_compiled(sass_dirs):
+                skipped.append(css_dir)
+            else:
+                pending.append((css_dir, sass_dirs, source_hash))
 
-        for sass_dir, css_dir, duration in info:
-            logger.info(">> %s -> %s in %ss", sass_dir, css_dir, duration)
+        results = compile_sass_in_parallel(
+            [sass_dirs for __, sass_dirs, __ in pending], output_style, source_comments, processes
+        )
+        for (css_dir, __, source_hash), (info, duration) in zip(pending, results):
+            manifest[css_dir] = source_hash
+            logger.info(">> %s compiled in %ss", get_theme_name(css_dir, themes), duration)
+            for sass_dir, destination_dir, sass_duration in info:
+                logger.info("   %s -> %s in %ss", sass_dir, destination_dir, sass_duration)
+        for css_dir in skipped:
+            logger.info(">> %s skipped, as its sources did not change.", get_theme_name(css_dir, themes))
+
+        save_sass_manifest(manifest)
+        logger.info("Sass compilation completed.")
         logger.info("\n")
 
         if collect and not settings.DEBUG:
@@ -226,6 +267,149 @@ def get_theme_sass_directories(themes):
     return applicable_dirs
 
 
+def group_sass_directories(sass_dirs):
+    """
+    Groups sass directories by the css directory they are compiled into, preserving their order.
+
+    Returns:
+        OrderedDict: Lists of sass directories, keyed by css destination directory.
+    """
+    groups = OrderedDict()
+    for sass_dir in sass_dirs:
+        groups.setdefault(sass_dir['css_destination_dir'], []).append(sass_dir)
+    return groups
+
+
+def get_theme_name(css_dir, themes):
+    """
+    Returns the name of the theme whose css directory is given, or 'system'.
+    """
+    for theme in themes:
+        if css_dir.startswith(theme.path):
+            return theme.theme_dir_name
+    return 'system'
+
+
+def _get_source_files(directory):
+    return sorted(directory.walkfiles()) if directory.isdir() else []
+
+
+def get_sass_source_hash(sass_dirs, output_style, source_comments):
+    """
+    Returns a hash of the contents of every file the given sass directories are compiled from.
+
+    The hash covers the sass source directories, their lookup paths and the stylesheets of the vendor
+    directories, along with the compilation options and the version of libsass, so that it changes
+    whenever the compiled css might.
+    """
+    source_files = []
+    for sass_dir in sass_dirs:
+        for directory in [sass_dir['sass_source_dir']] + list(sass_dir['lookup_paths']):
+            source_files.extend(_get_source_files(directory))
+    for directory in SASS_VENDOR_PATHS:
+        source_files.extend(
+            source_file for source_file in _get_source_files(directory) if source_file.ext in SASS_SOURCE_EXTENSIONS
+        )
+
+    source_hash = hashlib.sha1()
+    source_hash.update(json.dumps([sass.__version__, output_style, source_comments]))
+    for source_file in source_files:
+        source_hash.update(source_file.encode('utf-8'))
+        source_hash.update(source_file.bytes())
+    return source_hash.hexdigest()
+
+
+def is_compiled(sass_dirs):
+    """
+    Returns True if a css file exists for every sass file of the given sass directories.
+    """
+    for sass_dir in sass_dirs:
+        for source_file in _get_source_files(sass_dir['sass_source_dir']):
+            if source_file.ext not in ('.scss', '.sass') or source_file.name.startswith('_'):
+                continue
+            css_file = sass_dir['css_destination_dir'] / sass_dir['sass_source_dir'].relpathto(source_file)
+            if not (css_file.stripext() + '.css').isfile():
+                return False
+    return True
+
+
+def load_sass_manifest():
+    """
+    Returns the source hashes recorded by the previous run, if any.
+    """
+    if not SASS_MANIFEST_PATH.isfile():
+        return {}
+    try:
+        return json.loads(SASS_MANIFEST_PATH.text())
+    except ValueError:
+        logger.warning("Ignoring invalid sass manifest '%s'.", SASS_MANIFEST_PATH)
+        return {}
+
+
+def save_sass_manifest(manifest):
+    """
+    Records the source hashes of the compiled css directories, for the next run.
+    """
+    SASS_MANIFEST_PATH.parent.mkdir_p()
+    SASS_MANIFEST_PATH.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+
+
+def compile_sass_in_parallel(sass_dir_groups, output_style, source_comments, processes):
+    """
+    Compiles groups of sass directories, in parallel across a pool of processes.
+
+    The sass directories of a group are compiled into the same css directory, overriding each
+    other's output, so they are compiled in order, by the same process.
+
+    Args:
+        sass_dir_groups (list): Lists of sass directories, as returned by group_sass_directories.
+        output_style (str): Coding style for compiled css files.
+        source_comments (bool): Whether to add source comments to compiled css files.
+        processes (int): Maximum number of processes.
+
+    Returns:
+        List containing the compile_sass_directories result of each group.
+    """
+    tasks = [(sass_dirs, output_style, source_comments) for sass_dirs in sass_dir_groups]
+    if processes <= 1 or len(tasks) <= 1:
+        return [compile_sass_directories(task) for task in tasks]
+
+    pool = Pool(min(processes, len(tasks)))
+    try:
+        return pool.map(compile_sass_directories, tasks)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def compile_sass_directories(args):
+    """
+    Compiles the given sass directories in order.
+
+    This runs in the worker processes of update_assets, hence the single argument.
+
+    Args:
+        args (tuple): List of sass directories, as returned by get_sass_directories, output style
+            and whether to add source comments.
+
+    Returns:
+        A tuple containing the compile_sass result of each sass directory, and the total duration.
+    """
+    sass_dirs, output_style, source_comments = args
+    start = datetime.datetime.now()
+    info = [
+        compile_sass(
+            sass_source_dir=sass_dir['sass_source_dir'],
+            css_destination_dir=sass_dir['css_destination_dir'],
+            lookup_paths=sass_dir['lookup_paths'],
+            output_style=output_style,
+            source_comments=source_comments,
+        )
+        for sass_dir in sass_dirs
+    ]
+    return info, datetime.datetime.now() - start
+
+
 def compile_sass(sass_source_dir, css_destination_dir, lookup_paths, **kwargs):
     """
     Compile given sass files.
@@ -2,7 +2,7 @@
 Middleware for theming app
 
 Note:
-    This middleware depends on "django_sites_extensions.middleware.CurrentSiteWithDefaultMiddleware" middleware
+    This middleware depends on "ecommerce.core.middleware.CurrentSiteMiddleware" middleware
     So it must be added after this middleware in django settings files.
 """
 
@@ -12,10 +12,17 @@ from ecommerce.theming.models import SiteTheme
 class CurrentSiteThemeMiddleware(object):
     """
     Middleware that sets `site_theme` attribute to request object.
+
+    The theme is taken from the site bundle cached by CurrentSiteMiddleware, unless the site of the
+    request was replaced.
     """
 
     def process_request(self, request):
-        request.site_theme = SiteTheme.get_theme(request.site)
+        site_bundle = getattr(request, 'site_bundle', None)
+        if site_bundle and site_bundle.site is request.site:
+            request.site_theme = site_bundle.theme
+        else:
+            request.site_theme = SiteTheme.get_theme(request.site)
 
 
 class ThemePreviewMiddleware(object):
@@ -1,6 +1,7 @@
 """
 Theming aware template loaders.
 """
+from django.template.loaders.cached import Loader as CachedLoader
 from django.template.loaders.filesystem import Loader
 from threadlocals.threadlocals import get_current_request
 
@@ -28,3 +29,26 @@ class ThemeTemplateLoader(Loader):
             theme_dirs = get_all_theme_template_dirs()
 
         return theme_dirs + dirs
+
+
+class CachedThemeTemplateLoader(CachedLoader):  # pylint: disable=abstract-method
+    """
+    Cached template loader, keeping a separate cache of compiled templates for each theme.
+
+    Django's cached loader keys templates by name only, so the first theme to load a template
+    would have its version rendered for every site. This loader keys them by the theme that
+    ThemeTemplateLoader loads templates for, as well.
+    """
+    def cache_key(self, template_name, template_dirs, skip=None):
+        key = super(CachedThemeTemplateLoader, self).cache_key(template_name, template_dirs, skip)
+        return u'{theme}:{key}'.format(theme=self.get_theme_key(), key=key)
+
+    @staticmethod
+    def get_theme_key():
+        """ Returns the key identifying the template directories of the current theme. """
+        if get_current_request():
+            theme = get_current_theme()
+            return theme.path if theme else ''
+
+        # Outside of a request, templates are loaded from all themes.
+        return '*'
@@ -181,6 +181,20 @@ class TestHelpers(TestCase):
         self.assertEqual(get_theme_base_dir("test-theme-2"), theme_dirs[0])
         self.assertEqual(get_theme_base_dir("test-theme-3"), theme_dirs[1])
 
+    def test_get_theme_base_dir_cached(self):
+        """
+        Tests get_theme_base_dir only looks for a theme on the filesystem once.
+        """
+        theme_dirs = settings.COMPREHENSIVE_THEME_DIRS
+        get_theme_base_dir("test-theme-3")
+
+        with patch('ecommerce.theming.helpers.os.listdir') as mock_listdir:
+            self.assertEqual(get_theme_base_dir("test-theme-3"), theme_dirs[1])
+            self.assertFalse(mock_listdir.called)
+
+        with override_settings(COMPREHENSIVE_THEME_DIRS=theme_dirs[1:]):
+            self.assertEqual(get_theme_base_dir("test-theme-3"), theme_dirs[1])
+
     def test_get_theme_base_dir_error(self):
         """
         Tests get_theme_base_dir raises value error if theme is not found in themes dir.
@@ -0,0 +1,55 @@
+"""
+Tests of the theming template loaders.
+"""
+from django.template import engines
+from mock import patch
+
+from ecommerce.tests.testcases import TestCase
+from ecommerce.theming.models import SiteTheme
+from ecommerce.theming.template_loaders import CachedThemeTemplateLoader
+
+TEMPLATE_NAME = 'oscar/dashboard/index.html'
+
+
+class CachedThemeTemplateLoaderTests(TestCase):
+    """
+    Test the compiled template cache of each theme.
+    """
+
+    def setUp(self):
+        super(CachedThemeTemplateLoaderTests, self).setUp()
+        self.engine = engines['django'].engine
+        self.loader = self.engine.template_loaders[0]
+        self.assertIsInstance(self.loader, CachedThemeTemplateLoader)
+        self.loader.reset()
+        self.addCleanup(self.loader.reset)
+
+    def set_theme(self, theme_dir_name):
+        self.request.site_theme = SiteTheme(site=self.site, theme_dir_name=theme_dir_name)
+
+    def test_templates_cached_per_theme(self):
+        """ Each theme should get its own version of a template, compiled once. """
+        self.set_theme('test-theme')
+        template = self.engine.get_template(TEMPLATE_NAME)
+        self.assertIn('This is a Test Theme.', template.source)
+
+        self.set_theme('test-theme-2')
+        self.assertIn('This is second Test Theme.', self.engine.get_template(TEMPLATE_NAME).source)
+
+        self.set_theme('test-theme')
+        with patch('ecommerce.theming.helpers.os.listdir') as mock_listdir:
+            with patch.object(self.loader.loaders[0], 'get_template_sources') as mock_get_template_sources:
+                self.assertIs(self.engine.get_template(TEMPLATE_NAME), template)
+
+        self.assertFalse(mock_listdir.called)
+        self.assertFalse(mock_get_template_sources.called)
+
+    def test_get_theme_key(self):
+        """ Templates should be keyed by the directory of the current theme, or all themes outside of requests. """
+        self.assertEqual(self.loader.get_theme_key(), '')
+
+        self.set_theme('test-theme')
+        self.assertTrue(self.loader.get_theme_key().endswith('/test-theme'))
+
+        with patch('ecommerce.theming.template_loaders.get_current_request', return_value=None):
+            self.assertEqual(self.loader.get_theme_key(), '*')